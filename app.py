@@ -6,7 +6,6 @@ Start the program by running the command: `python app.py`
 from pulumi import automation as auto
 from pulumi_config import *
 import pulumi
-from dotenv import load_dotenv
 import os
 import sys
 import logging
@@ -21,17 +20,20 @@ logger = logging.getLogger(__name__)
 logging.getLogger("grpc").setLevel(logging.CRITICAL)  # Add this line
 os.environ["PULUMI_LOGLEVEL"] = "WARN" 
 
-# Load environment variables
-load_dotenv(".env")
+# Environment variables are loaded from .env by pulumi_config.config
 
-# RESOURCES
-from resources.s3 import bucket, upload_object
-from resources.ecr import ecr
-from resources.lambda_function import lambda_function_py
-from resources.rest_api_gateway import api_gateway_rest
-from resources.event_bridge import scheduler
-from resources.iam_role import iam_role
-from resources.cloudfront_s3 import cloudfront_s3
+# RESOURCES: imported on first call only (see resources/registry.py), operations that do not run the program skip them
+from resources.registry import lazy
+bucket = lazy("bucket")
+upload_object = lazy("upload_object")
+ecr = lazy("ecr")
+lambda_function_py = lazy("lambda_function.lambda_function_py")
+api_gateway_rest = lazy("api_gateway_rest")
+api_gateway_http = lazy("api_gateway_http")
+scheduler = lazy("scheduler")
+event_pipeline = lazy("event_pipeline")
+cloudfront_s3 = lazy("cloudfront_s3")
+export_outputs = lazy("export_outputs")
 
 
 
@@ -42,15 +44,20 @@ def pulumi_program():
     # RESOURCE: S3    
         # Bucket
         bucket_resource = bucket(PROJECT_NAME)
-        # Upload Object
-        Object = bucket_resource.apply(lambda bucket: upload_object(bucket=bucket,object_path="",key_path=""))
+        export_outputs(bucket_resource)
+        # Upload Object (set object_path to a local file to upload it)
+        object_path = ""
+        if object_path:
+            Object = upload_object(bucket=bucket_resource.id, object_path=object_path, key_path="")
         
     # RESOURCE: ECR
         ecr_repo = ecr(name=PROJECT_NAME, mutable=True, scan_on_push=False)
+        pulumi.export(f"{PROJECT_NAME}-ecr_uri", ecr_repo.repository_url.apply(lambda uri: f"{uri}:latest"))
 
     # RESOURCE: LAMBDA FUNCTION
         # Processor
         lambda_example = lambda_function_py(name=f"{PROJECT_NAME}", runtime="python3.13",handler="lambda_code.lambda_handler", codebase=["data/lambda_code.py"])
+        export_outputs(lambda_example)
 
     # RESOURCE: API GATEWAY
         endpoints = [
@@ -62,22 +69,26 @@ def pulumi_program():
             # You can add more endpoints here...
         ]
         processor_api = api_gateway_rest(PROJECT_NAME, endpoints)
+        export_outputs(processor_api)
+
+        # HTTP API: cheaper, lower latency alternative for the same endpoints
+        processor_http_api = api_gateway_http(f"{PROJECT_NAME}-http", endpoints, throttling={"burst_limit": 100, "rate_limit": 50})
+        export_outputs(processor_http_api)
                 
     # RESOURCE: EVENT BRIDGE
-        # IAM Role
-        role = iam_role(name=f"{PROJECT_NAME}", service="scheduler.amazonaws.com", actions=["lambda:InvokeFunction"], resource_arns=[lambda_example.arn])
-        
+        # Queue between the schedules and the function: bursts are buffered and read in batches, failures go to a DLQ
+        pipeline = event_pipeline(name=f"{PROJECT_NAME}-events", function=lambda_example, batch_size=10, maximum_concurrency=10)
+        export_outputs(pipeline)
+
         # Cron Scheduler
         expression = "cron(0 0 * * ? *)"
 
-        # Event Target
-        lambda_target = pulumi.Output.all(lambda_example.arn, role.arn).apply(lambda outputs: {"arn": outputs[0], "role_arn": outputs[1]})
-        
-        # Event Rule
-        schedule_event = scheduler(name=PROJECT_NAME, schedule_expression=expression, target=lambda_target)
+        # Event Rule: invocations spread over 15 minutes
+        schedule_event = scheduler(name=PROJECT_NAME, schedule_expression=expression, target=pipeline.target, flexible_time_window=15)
 
     # RESOURCE: CLOUDFRONT
-        cloudfront = pulumi.Output.all(bucket_resource).apply(lambda bucket: cloudfront_s3(name=PROJECT_NAME, bucket=bucket[0], path_pattern="media/*"))
+        cloudfront = cloudfront_s3(name=PROJECT_NAME, bucket=bucket_resource, path_pattern="media/*")
+        export_outputs(cloudfront)
 
         return "Resources Deployed Successfully"
     except Exception as e:
@@ -87,28 +98,72 @@ def pulumi_program():
 '''___________________________________________________________________________________________________________________'''
 def main():
     parser = argparse.ArgumentParser(description="Pulumi automation API template to run operations on Pulumi stacks")
-    parser.add_argument('operation', nargs='?', choices=['up', 'refresh', 'cancel', 'export', 'preview'], default='up', help="Pulumi operation to perform (default: 'up')")
+    parser.add_argument('operation', nargs='?', choices=['up', 'destroy', 'refresh', 'cancel', 'export', 'preview', 'outputs'], default='up', help="Pulumi operation to perform (default: 'up')")
+    parser.add_argument('--refresh', default='always', type=refresh_policy, help="Refresh policy before the operation: 'always', 'never' or the maximum age in minutes of the last refresh (default: 'always')")
+    add_operation_arguments(parser)
+    add_workspace_arguments(parser)
+    parser.add_argument('--profile', action='store_true', help="Record per-resource timings and write a Chrome trace with the critical path to profile/")
+    parser.add_argument('--force', action='store_true', help="Run up/preview even if nothing changed since the last successful up (see pulumi_config/change_detection.py)")
+    parser.add_argument('--spec', help="YAML/JSON stack spec compiled into the program instead of pulumi_program (e.g. data/stack.example.yaml)")
+    parser.add_argument('--stacks', help="Run the operation on several stacks in parallel: comma separated stack names or a JSON file with per-stack config")
+    parser.add_argument('--max-workers', type=int, default=4, help="Maximum number of stacks running at the same time with --stacks (default: 4)")
     args = parser.parse_args()
+
+    # Program: the stack spec when given, pulumi_program otherwise
+    program = pulumi_program
+    if args.spec:
+        validate_spec(load_spec(args.spec), {"project": PROJECT_NAME, "stack": STACK_NAME, "region": REGION})
+        program = spec_program(args.spec, {"project": PROJECT_NAME, "region": REGION})
+
+    # Workspace: backend, Pulumi home and checkpoint settings
+    workspace = workspace_from_args(args)
+
+    # Multi-stack mode: every stack runs in its own process with its own log file under logs/
+    if args.stacks:
+        specs = load_stack_specs(args.stacks, region=REGION)
+        results = run_stacks(specs, PROJECT_NAME, program, operation=args.operation.lower(), max_workers=args.max_workers, refresh=args.refresh, options=options_from_args(args), workspace=workspace, force=args.force, profile=args.profile)
+        sys.exit(0 if all(result["ok"] for result in results) else 1)
+
     try:
+        # Get operation from command line args
+        operation = args.operation.lower()
+        options = options_from_args(args)
+
+        # Skip up/preview when nothing changed since the last successful up
+        inputs = program_inputs(PROJECT_NAME, STACK_NAME, program, {"aws:region": REGION}, workspace)
+        if skip_unchanged(STACK_NAME, operation, inputs, options, force=args.force):
+            return None
+
         # Create or Select Stack
         stack = auto.create_or_select_stack(
             stack_name=STACK_NAME,
             project_name=PROJECT_NAME,
-            program=pulumi_program,
-            work_dir=os.getcwd()
+            program=program,
+            work_dir=os.getcwd(),
+            opts=workspace.local_workspace_options()
         )
 
-        # Check and install plugin if needed
-        setting_up_stack(stack,REGION)
+        # Check and install plugin if needed (not needed by the operations that do not run the program)
+        if operation not in NO_PROGRAM_OPERATIONS:
+            setting_up_stack(stack, REGION, refresh='never' if operation in NO_REFRESH_OPERATIONS else args.refresh, options=options)
 
         # Start pulumi by default using 'up' and Get operation from command line args; 
         #operation = 'up'
         #if len(sys.argv) > 1:
         #    operation = sys.argv[1].lower()
-        # Get operation from command line args
-        operation = args.operation.lower()
         
-        run_pulumi(stack, operation)
+        profiler = None
+        if args.profile:
+            profiler = DeploymentProfiler()
+            options.event_handlers.append(profiler.on_event)
+
+        if operation in STATE_OPERATIONS:
+            clear_fingerprint(STACK_NAME)
+        result = run_pulumi(stack, operation, options=options)
+        record_result(STACK_NAME, operation, inputs, result, options)
+
+        if profiler:
+            profiler.write_report(stack, name=f"{STACK_NAME}-{operation}")
 
 
     except Exception as e:
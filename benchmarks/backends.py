@@ -0,0 +1,90 @@
+'''
+Backend benchmark: wall time of `up` and `destroy` of the same stack on several backends / checkpoint settings.
+The program registers --resources component resources (no provider, no cloud calls), so the measure is dominated by
+the engine and the checkpoint writes to the backend. Every run uses a new stack that is removed at the end.
+Needs the Pulumi CLI only; the local backends are created in a temporary directory.
+
+Run from the project root: python benchmarks/backends.py [--resources 200] [--runs 3] [--backend s3://bucket/prefix]...
+'''
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pulumi
+from pulumi import automation as auto
+from pulumi_config.workspace import WorkspaceConfig
+
+PROJECT_NAME = "backend-benchmark"
+
+
+class Item(pulumi.ComponentResource):
+    def __init__(self, name, opts=None):
+        super().__init__("benchmark:index:Item", name, None, opts)
+        self.register_outputs({"name": name})
+
+
+def benchmark_program(resources: int):
+    def program():
+        for i in range(resources):
+            Item(f"item-{i}")
+    return program
+
+
+def measure(workspace: WorkspaceConfig, resources: int, runs: int = 3):
+    """Median up/destroy seconds of a new stack on the workspace backend."""
+    times = {"up": [], "destroy": []}
+    for _ in range(runs):
+        stack = auto.create_or_select_stack(
+            stack_name=f"bench-{uuid.uuid4().hex[:8]}",
+            project_name=PROJECT_NAME,
+            program=benchmark_program(resources),
+            opts=workspace.local_workspace_options(),
+        )
+        try:
+            for operation in ("up", "destroy"):
+                start = time.perf_counter()
+                getattr(stack, operation)()
+                times[operation].append(time.perf_counter() - start)
+        finally:
+            stack.workspace.remove_stack(stack.name)
+    return {operation: statistics.median(values) for operation, values in times.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare deploy times across backends and checkpoint settings")
+    parser.add_argument('--resources', type=int, default=200, help="Resources registered by the program (default: 200)")
+    parser.add_argument('--runs', type=int, default=3, help="Runs per backend (default: 3)")
+    parser.add_argument('--backend', action='append', default=[], help="Extra backend URL to measure (repeatable), e.g. s3://bucket/prefix or https://api.pulumi.com")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        local = f"file://{state_dir}"
+        # Throwaway stacks without secrets
+        workspaces = {
+            "file": WorkspaceConfig(backend=local, allow_empty_passphrase=True),
+            "file, skip checkpoints": WorkspaceConfig(backend=local, skip_checkpoints=True, allow_empty_passphrase=True),
+        }
+        for url in args.backend:
+            workspaces[url] = WorkspaceConfig(backend=url, allow_empty_passphrase=True)
+            workspaces[f"{url}, skip checkpoints"] = WorkspaceConfig(backend=url, skip_checkpoints=True, allow_empty_passphrase=True)
+        results = {name: measure(workspace, args.resources, args.runs) for name, workspace in workspaces.items()}
+
+    width = max(len(name) for name in results)
+    print(f"{'BACKEND'.ljust(width)}  {'UP (s)':>8}  {'DESTROY (s)':>11}")
+    for name, seconds in results.items():
+        print(f"{name.ljust(width)}  {seconds['up']:8.2f}  {seconds['destroy']:11.2f}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
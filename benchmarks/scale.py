@@ -0,0 +1,269 @@
+'''
+Offline scale benchmark of the program and the resource builders, run under pulumi.runtime.set_mocks (no engine,
+no cloud, no network). Every case runs at increasing sizes in a fresh Python process and reports the wall time of
+program evaluation (until all the resource registrations are done), the peak RSS and the registered resource count.
+
+Cases (the resource builders of resources/ and the whole program):
+  rest_routes   api_gateway_rest with N routes (10 -> 5,000)
+  http_routes   api_gateway_http with N routes (10 -> 1,000)
+  lambdas       N lambda_function_py (1 -> 500)
+  layers        N lambda_function_py sharing 2 local layers (1 -> 500)
+  s3_objects    upload_directory of N local files (100 -> 100,000)
+  cloudfront    cloudfront_distribution with S3 + API origins and N ordered behaviors (1 -> 25, the default quota)
+  pipelines     N event_pipeline, each with its function (1 -> 100)
+  schedules     schedule_fanout of N jobs (100 -> 10,000)
+  program       app.pulumi_program
+Not measured: ecr and iam_role (one resource, no per-item work) and s3_sync (a dynamic provider, its cost is the
+boto3 calls at deploy time, not the program evaluation).
+The mocks (tests/mocks.py) return the computed outputs the builders read (invoke_arn, execution_arn, ...).
+
+With --check, the run fails (exit code 1) when a result regresses past benchmarks/baseline.json: wall time or peak RSS
+above the baseline by more than the tolerance, or a different resource count. --update-baseline stores the results.
+
+Run from the project root: python benchmarks/scale.py [--cases rest_routes lambdas] [--max-size 1000] [--check | --update-baseline]
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+SIZES = {
+    "rest_routes": [10, 100, 1000, 5000],
+    "http_routes": [10, 100, 1000],
+    "lambdas": [1, 10, 100, 500],
+    "layers": [1, 10, 100, 500],
+    "s3_objects": [100, 1000, 10000, 100000],
+    "cloudfront": [1, 10, 25],
+    "pipelines": [1, 10, 100],
+    "schedules": [100, 1000, 10000],
+    "program": [1],
+}
+
+# Allowed regression over the baseline (ratio)
+TIME_TOLERANCE = 0.5
+RSS_TOLERANCE = 0.25
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def bench_functions(count: int):
+    import pulumi_aws as aws
+    return [aws.lambda_.Function(f"bench-fn-{i}", role="arn:aws:iam::123456789012:role/bench", runtime="python3.13",
+                                 handler="lambda.handler", code=None) for i in range(count)]
+
+
+def bench_endpoints(size: int):
+    functions = bench_functions(min(size // 10, 50) + 1)
+    return [{
+        "method": ("GET", "POST")[i % 2],
+        "path": f"/group{i // 100}/resource{i // 2}",
+        "function": functions[i % len(functions)],
+    } for i in range(size)]
+
+
+def rest_routes(size: int, work_dir: str):
+    from resources.rest_api_gateway import api_gateway_rest
+    api_gateway_rest("bench", bench_endpoints(size))
+
+
+def http_routes(size: int, work_dir: str):
+    from resources.http_api_gateway import api_gateway_http
+    api_gateway_http("bench", bench_endpoints(size))
+
+
+def write_handler(size: int, work_dir: str):
+    with open(os.path.join(work_dir, "handler.py"), "w") as file:
+        file.write("def handler(event, context):\n    return {'statusCode': 200}\n")
+
+
+def lambdas(size: int, work_dir: str):
+    from resources.lambda_function import lambda_function_py
+    for i in range(size):
+        lambda_function_py(f"bench-{i}", runtime="python3.13", handler="handler.handler", codebase=[os.path.join(work_dir, "handler.py")])
+
+
+def write_layers(size: int, work_dir: str):
+    write_handler(size, work_dir)
+    for layer in ("deps", "common"):
+        for i in range(50):
+            path = os.path.join(work_dir, layer, "python", f"module{i}.py")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                file.write(f"{layer.upper()} = {i}\n")
+
+
+def layers(size: int, work_dir: str):
+    from resources.lambda_function import lambda_function_py
+    for i in range(size):
+        lambda_function_py(f"bench-{i}", runtime="python3.13", handler="handler.handler", codebase=[os.path.join(work_dir, "handler.py")],
+                           layers=[os.path.join(work_dir, "deps"), os.path.join(work_dir, "common")])
+
+
+def write_files(size: int, work_dir: str):
+    for i in range(size):
+        path = os.path.join(work_dir, "site", f"dir{i // 1000}", f"file{i}.txt")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(str(i))
+
+
+def s3_objects(size: int, work_dir: str):
+    from resources.s3 import upload_directory
+    upload_directory("bench-bucket", os.path.join(work_dir, "site"), name="bench")
+
+
+def cloudfront(size: int, work_dir: str):
+    import pulumi_aws as aws
+    from resources.cloudfront import cloudfront_distribution
+    bucket = aws.s3.BucketV2("bench-bucket")
+    api = aws.apigateway.RestApi("bench-api")
+    behaviors = [{"origin": "s3"}] + [{
+        "origin": ("s3", "api")[i % 2],
+        "path_pattern": f"/path{i}/*",
+        "cache": {"default_ttl": 60 * (i + 1), "query_strings": ["id"]},
+        "origin_request": {"headers": ["Accept"]} if i % 2 else None,
+    } for i in range(size)]
+    cloudfront_distribution("bench", [{"id": "s3", "type": "s3", "bucket": bucket},
+                                      {"id": "api", "type": "api", "api": api, "origin_path": "/staging"}], behaviors)
+
+
+def pipelines(size: int, work_dir: str):
+    from resources.event_pipeline import event_pipeline
+    for i, function in enumerate(bench_functions(size)):
+        event_pipeline(f"bench-{i}", function, batch_size=10, maximum_concurrency=10)
+
+
+def schedules(size: int, work_dir: str):
+    from resources.schedule_planner import schedule_fanout
+    target = {"arn": "arn:aws:sqs:us-east-1:123456789012:bench", "role_arn": "arn:aws:iam::123456789012:role/bench"}
+    schedule_fanout("bench", [{"name": f"job-{i}", "target": target, "window": 360, "group": f"g{i % 10}"} for i in range(size)])
+
+
+def program(size: int, work_dir: str):
+    import app
+    if app.pulumi_program() is None:
+        raise RuntimeError("app.pulumi_program failed, see the log above")
+
+
+CASES = {"rest_routes": rest_routes, "http_routes": http_routes, "lambdas": lambdas, "layers": layers, "s3_objects": s3_objects,
+         "cloudfront": cloudfront, "pipelines": pipelines, "schedules": schedules, "program": program}
+
+# Inputs written before the measure
+SETUP = {"lambdas": write_handler, "layers": write_layers, "s3_objects": write_files}
+
+
+def run_case(case: str, size: int):
+    """Run one case in this process under mocks and return its measures."""
+    import pulumi
+    from tests.mocks import ProgramMocks
+
+    mocks = ProgramMocks()
+    pulumi.runtime.set_mocks(mocks, project="benchmark", stack="scale", preview=False)
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Only the evaluation is measured, not the setup of the inputs (e.g. writing the files)
+        if case in SETUP:
+            SETUP[case](size, work_dir)
+        timed = {}
+
+        @pulumi.runtime.test
+        def evaluate():
+            timed["start"] = time.perf_counter()
+            CASES[case](size, work_dir)
+
+        evaluate()
+        seconds = time.perf_counter() - timed["start"]
+    return {"case": case, "size": size, "seconds": round(seconds, 3), "peak_rss_mb": round(peak_rss_mb(), 1), "resources": len(mocks.resources)}
+
+
+def measure(case: str, size: int):
+    """Run the case in a fresh process (isolated caches and peak RSS)."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, PULUMI_CACHE_DIR=cache_dir, PULUMI_LOOKUP_TTL="0")
+        for key, value in {"PROJECT_NAME": "benchmark", "STACK_NAME": "scale", "REGION": "us-east-1"}.items():
+            env.setdefault(key, value)
+        output = subprocess.run([sys.executable, __file__, "--worker", case, str(size)], cwd=ROOT, env=env,
+                                capture_output=True, text=True)
+    if output.returncode != 0:
+        raise RuntimeError(f"{case} ({size}) failed:\n{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def regressions(results: list, baseline: dict, time_tolerance: float = TIME_TOLERANCE, rss_tolerance: float = RSS_TOLERANCE):
+    """Return the messages of the results that regress past the baseline."""
+    messages = []
+    for result in results:
+        key = f"{result['case']}:{result['size']}"
+        base = baseline.get(key)
+        if base is None:
+            messages.append(f"{key}: no baseline, run with --update-baseline")
+            continue
+        if result["resources"] != base["resources"]:
+            messages.append(f"{key}: {result['resources']} resources registered, baseline {base['resources']}")
+        if result["seconds"] > base["seconds"] * (1 + time_tolerance):
+            messages.append(f"{key}: {result['seconds']}s, baseline {base['seconds']}s (+{time_tolerance:.0%} allowed)")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + rss_tolerance):
+            messages.append(f"{key}: {result['peak_rss_mb']} MB peak RSS, baseline {base['peak_rss_mb']} MB (+{rss_tolerance:.0%} allowed)")
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scale benchmark of the program and the resource builders")
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    parser.add_argument('--max-size', type=int, help="Skip the sizes above this value")
+    parser.add_argument('--check', action='store_true', help="Fail when a result regresses past the baseline")
+    parser.add_argument('--update-baseline', action='store_true', help=f"Store the results in {os.path.relpath(BASELINE_PATH, ROOT)}")
+    parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE)
+    parser.add_argument('--rss-tolerance', type=float, default=RSS_TOLERANCE)
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'CASE':<12}  {'SIZE':>7}  {'SECONDS':>8}  {'PEAK RSS (MB)':>13}  {'RESOURCES':>9}")
+    for case in args.cases:
+        for size in SIZES[case]:
+            if args.max_size and size > args.max_size:
+                continue
+            result = measure(case, size)
+            results.append(result)
+            print(f"{case:<12}  {size:7}  {result['seconds']:8.3f}  {result['peak_rss_mb']:13.1f}  {result['resources']:9}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.update_baseline:
+        baseline = {}
+        if os.path.isfile(BASELINE_PATH):
+            with open(BASELINE_PATH) as file:
+                baseline = json.load(file)
+        baseline.update({f"{result['case']}:{result['size']}": result for result in results})
+        with open(BASELINE_PATH, "w") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE_PATH}")
+    elif args.check:
+        baseline = {}
+        if os.path.isfile(BASELINE_PATH):
+            with open(BASELINE_PATH) as file:
+                baseline = json.load(file)
+        messages = regressions(results, baseline, args.time_tolerance, args.rss_tolerance)
+        for message in messages:
+            print(f"REGRESSION {message}")
+        sys.exit(1 if messages else 0)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        sys.path.insert(0, ROOT)
+        print(json.dumps(run_case(sys.argv[2], int(sys.argv[3]))))
+    else:
+        main()
@@ -0,0 +1,61 @@
+'''
+Cold start benchmark of the CLI: time from interpreter start until each operation is ready to call the Pulumi engine.
+Every measure runs in a fresh Python process (nothing cached in sys.modules), the median of --runs is reported.
+Operations that run the program (up, preview, ...) also import the resource modules used by app.pulumi_program,
+the others (cancel, export, outputs) only import app.
+
+Run from the project root: python benchmarks/startup.py [--runs 5] [--operations up export]
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from pulumi_config.pulumi_config import NO_PROGRAM_OPERATIONS
+
+OPERATIONS = ['up', 'destroy', 'refresh', 'cancel', 'export', 'preview', 'outputs']
+
+MEASURE = '''
+import time
+start = time.perf_counter()
+import app
+if {runs_program}:
+    for component in vars(app).values():
+        if hasattr(component, "load"):
+            component.load()
+print(time.perf_counter() - start)
+'''
+
+
+def measure(operation: str, runs: int = 5):
+    """Median cold start time (seconds) of the operation over `runs` fresh processes."""
+    code = MEASURE.format(runs_program=operation not in NO_PROGRAM_OPERATIONS)
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        times.append(float(output.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold start time of every CLI operation")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh processes per operation (default: 5)")
+    parser.add_argument('--operations', nargs='+', default=OPERATIONS, choices=OPERATIONS)
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {operation: measure(operation, args.runs) for operation in args.operations}
+    print(f"{'OPERATION':<10}  COLD START (s)")
+    for operation, seconds in results.items():
+        print(f"{operation:<10}  {seconds:14.3f}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
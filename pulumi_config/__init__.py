@@ -1,2 +1,10 @@
 from .pulumi_config import *
-from .config import *
\ No newline at end of file
+from .config import *
+from .multi_stack import *
+from .operation_options import *
+from .profiler import *
+from .stack_spec import *
+from .state_inspect import *
+from .workspace import *
+from .plugin_cache import *
+from .change_detection import *
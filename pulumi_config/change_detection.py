@@ -0,0 +1,152 @@
+'''
+This script skips `up` and `preview` when nothing changed since the last successful `up` of the stack.
+The `compute_fingerprint` function hashes the inputs of a run: the Python sources of the project, the local files and
+directories read by the program (Lambda codebases, uploaded objects, recorded by resources/hash_cache.py during the
+last run), the stack config, the backend and the Pulumi SDK and plugin versions.
+The `skip_unchanged` function compares it with the fingerprint stored after the last successful `up`, an unchanged
+fingerprint skips the operation before the stack is even selected. `record_result` stores the fingerprint after a
+successful `up`, `clear_fingerprint` forgets it before the operations that change the state (`up`, `destroy`, `refresh`).
+The fingerprint does not see changes made outside the program (console edits, drift): run with `--force` (or `refresh`)
+to always run the operation.
+
+State file (.pulumi_cache/fingerprints/<stack>.json): {"fingerprint", "files", "directories", "time"}
+'''
+import hashlib
+import importlib.metadata
+import json
+import logging
+import os
+import time
+from .config import CACHE_DIR
+from .plugin_cache import required_plugins
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_DIR = os.path.join(CACHE_DIR, "fingerprints")
+
+# Operations skipped when the fingerprint is unchanged
+FINGERPRINT_OPERATIONS = ['up', 'preview']
+
+# Operations that change the state: the stored fingerprint is forgotten before they run
+STATE_OPERATIONS = ['up', 'destroy', 'refresh']
+
+# Directories never hashed as program sources: VCS, virtualenvs, tool caches, build output, the files written by the
+# runs themselves (logs, traces, state exports) and the code that is never part of the program (tests, benchmarks)
+IGNORED_DIRECTORIES = {".git", ".hg", ".venv", "venv", "env", ".tox", ".nox", "__pycache__", ".pytest_cache", ".mypy_cache",
+                       ".ruff_cache", ".ipynb_checkpoints", "node_modules", "build", "dist", "logs", "profile", "exports",
+                       "benchmarks", "tests"}
+
+
+def ignored_directory(path: str):
+    """True for the IGNORED_DIRECTORIES, *.egg-info and virtualenvs of any name (they hold a pyvenv.cfg)."""
+    name = os.path.basename(path)
+    return name in IGNORED_DIRECTORIES or name.endswith(".egg-info") or os.path.isfile(os.path.join(path, "pyvenv.cfg"))
+
+
+def fingerprint_path(stack_name: str, fingerprint_dir: str = FINGERPRINT_DIR):
+    return os.path.join(fingerprint_dir, f"{stack_name.replace('/', '_')}.json")
+
+
+def load_fingerprint(stack_name: str, fingerprint_dir: str = FINGERPRINT_DIR):
+    try:
+        with open(fingerprint_path(stack_name, fingerprint_dir)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_fingerprint(stack_name: str, state: dict, fingerprint_dir: str = FINGERPRINT_DIR):
+    os.makedirs(fingerprint_dir, exist_ok=True)
+    with open(fingerprint_path(stack_name, fingerprint_dir), "w") as file:
+        json.dump(state, file, indent=2)
+
+
+def clear_fingerprint(stack_name: str, fingerprint_dir: str = FINGERPRINT_DIR):
+    if os.path.isfile(fingerprint_path(stack_name, fingerprint_dir)):
+        os.remove(fingerprint_path(stack_name, fingerprint_dir))
+
+
+def source_files(root: str = "."):
+    """Python sources of the project, without the caches and the tooling directories."""
+    cache_dir = os.path.abspath(CACHE_DIR)
+    files = []
+    for directory, dirs, filenames in os.walk(root):
+        dirs[:] = sorted(name for name in dirs if not ignored_directory(os.path.join(directory, name))
+                         and os.path.abspath(os.path.join(directory, name)) != cache_dir)
+        files.extend(os.path.abspath(os.path.join(directory, name)) for name in sorted(filenames) if name.endswith(".py"))
+    return files
+
+
+def directory_listing(directory: str):
+    """Sorted relative paths under the directory: adding or removing a file changes the fingerprint."""
+    listing = []
+    for root, dirs, filenames in os.walk(directory):
+        dirs.sort()
+        listing.extend(os.path.relpath(os.path.join(root, name), directory) for name in sorted(filenames))
+    return listing
+
+
+def compute_fingerprint(inputs: dict, files=(), directories=(), fingerprint_dir: str = FINGERPRINT_DIR):
+    """SHA-256 of the inputs (project, stack, config, ...), the Pulumi and plugin versions, the project sources, the `files`
+    contents and the `directories` listings. File hashes are cached on (size, mtime), so unchanged files are not read."""
+    from resources.hash_cache import hash_files
+    paths = sorted(set(source_files()) | {os.path.abspath(path) for path in files if os.path.isfile(path)})
+    hashes = hash_files(paths, os.path.join(fingerprint_dir, "manifest.json"), record=False)
+
+    digest = hashlib.sha256()
+    versions = {"pulumi": importlib.metadata.version("pulumi"), "plugins": required_plugins()}
+    digest.update(json.dumps({"inputs": inputs, **versions}, sort_keys=True, default=str).encode())
+    for path in paths:
+        digest.update(f"\n{path}\0{hashes[path]}".encode())
+    for path in sorted(files):
+        if not os.path.isfile(path):
+            digest.update(f"\n{path}\0missing".encode())
+    for directory in sorted(directories):
+        digest.update(f"\n{directory}/\0".encode())
+        digest.update("\0".join(directory_listing(directory)).encode())
+    return digest.hexdigest()
+
+
+def partial(options=None):
+    """Operations limited to some resources (--target, --replace) do not deploy the whole program."""
+    return bool(options and (options.target or options.replace))
+
+
+def fingerprinted(operation: str, options=None, force: bool = False):
+    """Partial operations and --force always run."""
+    return not force and operation in FINGERPRINT_OPERATIONS and not partial(options)
+
+
+def skip_unchanged(stack_name: str, operation: str, inputs: dict, options=None, force: bool = False, log=None):
+    """True if the operation can be skipped: same fingerprint as the last successful `up`."""
+    log = log or logger
+    if not fingerprinted(operation, options, force):
+        return False
+    state = load_fingerprint(stack_name)
+    if not state:
+        return False
+    start = time.perf_counter()
+    fingerprint = compute_fingerprint(inputs, state.get("files", []), state.get("directories", []))
+    if fingerprint != state.get("fingerprint"):
+        return False
+    log.info(f"No changes since the last successful up of {stack_name} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(state['time']))}), "
+             f"{operation} skipped in {time.perf_counter() - start:.3f}s. Use --force to run it anyway.")
+    return True
+
+
+def record_result(stack_name: str, operation: str, inputs: dict, result=None, options=None):
+    """Store the fingerprint after a successful `up`, with the files and directories read by the program during the run.
+    Call clear_fingerprint before running a STATE_OPERATIONS operation, a failed run leaves no fingerprint.
+    A partial `up` (`options` with target/replace) stores none: the resources left out may still differ from the program."""
+    if partial(options):
+        clear_fingerprint(stack_name)
+        return
+    if operation == "up" and result:
+        from resources.hash_cache import referenced_files, referenced_directories
+        files, directories = sorted(referenced_files), sorted(referenced_directories)
+        save_fingerprint(stack_name, {
+            "fingerprint": compute_fingerprint(inputs, files, directories),
+            "files": files,
+            "directories": directories,
+            "time": time.time(),
+        })
@@ -16,3 +16,5 @@ REGION = os.getenv("REGION")
 PROJECT_NAME = os.getenv("PROJECT_NAME")
 STACK_NAME = os.getenv("STACK_NAME")
 
+# Local cache directory (setup state, hashes, manifests)
+CACHE_DIR = os.getenv("PULUMI_CACHE_DIR", ".pulumi_cache")
@@ -0,0 +1,179 @@
+'''
+This script is used to run the same Pulumi operation on several stacks at the same time.
+The `load_stack_specs` function reads the list of stacks from the command line value or from a JSON file.
+The `run_stack` function sets up a single stack and runs the operation, writing its output to its own log file.
+The `run_stacks` function runs `run_stack` for every stack in a bounded process (or thread) pool.
+A failing stack does not stop the others, every stack reports its result and wall-clock time in the summary.
+Stacks whose inputs did not change since their last successful `up` are skipped (SKIP), see change_detection.py.
+With `profile`, every stack writes its own trace to profile/<stack>-<operation>.json and its report to its log file.
+
+Stacks file example (stacks.json):
+[
+    {"name": "dev", "config": {"aws:region": "us-east-1"}},
+    {"name": "prod", "config": {"aws:region": "eu-west-1", "app:tier": "large"}}
+]
+'''
+import json
+import logging
+import os
+import time
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pulumi import automation as auto
+from .change_detection import STATE_OPERATIONS, clear_fingerprint, record_result, skip_unchanged
+from .operation_options import OperationOptions
+from .profiler import DeploymentProfiler
+from .pulumi_config import setting_up_stack, run_pulumi, NO_REFRESH_OPERATIONS, NO_PROGRAM_OPERATIONS
+
+logger = logging.getLogger(__name__)
+
+LOG_DIR = "logs"
+
+
+def load_stack_specs(stacks: str, region: str = None):
+    """Read stack specs from a JSON file path or a comma separated list of stack names."""
+    if os.path.isfile(stacks):
+        with open(stacks) as file:
+            specs = json.load(file)
+    else:
+        specs = [{"name": stack_name.strip()} for stack_name in stacks.split(",") if stack_name.strip()]
+
+    for spec in specs:
+        if "name" not in spec:
+            raise ValueError(f"Stack spec without a name: {spec}")
+        config = spec.setdefault("config", {})
+        # Fall back to the default region from .env
+        if region and "aws:region" not in config:
+            config["aws:region"] = region
+    return specs
+
+
+def stack_logger(stack_name: str, log_dir: str = LOG_DIR):
+    """Return a logger writing to its own file (logs/<stack>.log) for the given stack."""
+    os.makedirs(log_dir, exist_ok=True)
+    stack_log = logging.getLogger(f"stack.{stack_name}")
+    stack_log.setLevel(logging.INFO)
+    stack_log.propagate = False
+    if not stack_log.handlers:
+        handler = logging.FileHandler(os.path.join(log_dir, f"{stack_name}.log"))
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        stack_log.addHandler(handler)
+    return stack_log
+
+
+def program_inputs(project_name: str, stack_name: str, program, config: dict = None, workspace=None):
+    """Inputs of the stack fingerprint (see change_detection.py) besides the sources, files and plugin versions."""
+    return {
+        "project": project_name,
+        "stack": stack_name,
+        # The stack spec file (spec_program) or the program function
+        "program": getattr(program, "args", None) or getattr(program, "__qualname__", repr(program)),
+        "config": config or {},
+        "backend": workspace.backend if workspace else os.getenv("PULUMI_BACKEND_URL"),
+    }
+
+
+def run_stack(spec: dict, project_name: str, program, operation: str = "up", work_dir: str = None, log_dir: str = LOG_DIR, refresh="always", options=None, workspace=None, force=False, profile=False):
+    """Create or select a single stack, apply its config and run the operation.
+    `workspace` is a WorkspaceConfig (backend, Pulumi home, checkpoints), the Pulumi defaults are used if not given.
+    `up` and `preview` are skipped when the inputs did not change since the last successful `up`, unless `force`.
+    `profile` records the resource timings of the stack (DeploymentProfiler)."""
+    stack_name = spec["name"]
+    config = dict(spec.get("config", {}))
+    stack_log = stack_logger(stack_name, log_dir)
+    start = time.perf_counter()
+    error = None
+    skipped = False
+    try:
+        inputs = program_inputs(project_name, stack_name, program, config, workspace)
+        skipped = skip_unchanged(stack_name, operation, inputs, options, force, log=stack_log)
+    except Exception as e:
+        stack_log.exception(f"Stack {stack_name} failed.")
+        error = str(e)
+    if skipped or error:
+        return stack_result(stack_name, operation, error, start, log_dir, skipped)
+
+    try:
+        stack = auto.create_or_select_stack(
+            stack_name=stack_name,
+            project_name=project_name,
+            program=program,
+            work_dir=work_dir or os.getcwd(),
+            opts=workspace.local_workspace_options() if workspace else None
+        )
+
+        region = config.pop("aws:region", None)
+        if operation not in NO_PROGRAM_OPERATIONS:
+            setting_up_stack(stack, region, log=stack_log, config=config,
+                             refresh="never" if operation in NO_REFRESH_OPERATIONS else refresh, options=options)
+
+        # Own profiler per stack, the options shared by the stacks (threads) are not modified
+        profiler = None
+        if profile:
+            profiler = DeploymentProfiler()
+            options = options or OperationOptions()
+            options = replace(options, event_handlers=[*options.event_handlers, profiler.on_event])
+
+        if operation in STATE_OPERATIONS:
+            clear_fingerprint(stack_name)
+        result = run_pulumi(stack, operation, log=stack_log, options=options)
+        record_result(stack_name, operation, inputs, result, options)
+        if profiler:
+            profiler.write_report(stack, name=f"{stack_name}-{operation}", log=stack_log)
+        if result is None:
+            error = f"{operation} failed, check {stack_log.handlers[0].baseFilename}"
+    except Exception as e:
+        stack_log.exception(f"Stack {stack_name} failed.")
+        error = str(e)
+    return stack_result(stack_name, operation, error, start, log_dir)
+
+
+def stack_result(stack_name: str, operation: str, error: str, start: float, log_dir: str = LOG_DIR, skipped: bool = False):
+    return {
+        "stack": stack_name,
+        "operation": operation,
+        "ok": error is None,
+        "skipped": skipped,
+        "error": error,
+        "seconds": round(time.perf_counter() - start, 2),
+        "log": os.path.join(log_dir, f"{stack_name}.log"),
+    }
+
+
+def run_stacks(specs: list, project_name: str, program, operation: str = "up", max_workers: int = 4, use_threads: bool = False, work_dir: str = None, log_dir: str = LOG_DIR, refresh="always", options=None, workspace=None, force=False, profile=False):
+    """Run the operation on all stacks in parallel and return one result dict per stack.
+    Processes are used by default since every stack runs its own inline program; `program` must be a module level function."""
+    executor_class = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+    results = []
+    start = time.perf_counter()
+    with executor_class(max_workers=max(1, min(max_workers, len(specs)))) as executor:
+        futures = {
+            executor.submit(run_stack, spec, project_name, program, operation, work_dir, log_dir, refresh, options, workspace, force, profile): spec["name"]
+            for spec in specs
+        }
+        for future in as_completed(futures):
+            stack_name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker crashed before run_stack could report
+                result = {"stack": stack_name, "operation": operation, "ok": False, "error": str(e), "seconds": None, "log": None}
+            logger.info(f"Stack {stack_name} finished: {'SKIP' if result.get('skipped') else 'OK' if result['ok'] else 'FAILED'} ({result['seconds']}s)")
+            results.append(result)
+
+    results.sort(key=lambda result: result["stack"])
+    print_summary(results, round(time.perf_counter() - start, 2))
+    return results
+
+
+def print_summary(results: list, total_seconds: float = None):
+    """Print a table with the result and wall-clock time of every stack."""
+    width = max([len(result["stack"]) for result in results] + [5])
+    print(f"\n{'STACK'.ljust(width)}  STATUS  SECONDS  DETAILS")
+    for result in results:
+        status = "SKIP" if result.get("skipped") else "OK" if result["ok"] else "FAILED"
+        seconds = "-" if result["seconds"] is None else f"{result['seconds']:.2f}"
+        details = result["error"] or result["log"] or ""
+        print(f"{result['stack'].ljust(width)}  {status.ljust(6)}  {seconds.rjust(7)}  {details}")
+    failed = sum(1 for result in results if not result["ok"])
+    print(f"\n{len(results) - failed}/{len(results)} stacks succeeded" + (f" in {total_seconds:.2f}s" if total_seconds is not None else ""))
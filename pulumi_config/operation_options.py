@@ -0,0 +1,115 @@
+'''
+This script defines the engine options passed to the stack operations (up, preview, refresh, destroy).
+The `OperationOptions` class holds the options, `kwargs` returns the ones supported by a given operation.
+The `event_logger` function returns an `on_event` callback that logs structured engine events instead of raw output lines.
+The `add_operation_arguments` and `options_from_args` functions expose the options on the command line.
+'''
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+import logging
+
+# Engine options accepted by each Automation API operation
+SUPPORTED_OPTIONS = {
+    'up': ['parallel', 'message', 'target', 'target_dependents', 'replace', 'expect_no_changes', 'diff'],
+    'preview': ['parallel', 'message', 'target', 'target_dependents', 'replace', 'expect_no_changes', 'diff'],
+    'refresh': ['parallel', 'message', 'target', 'target_dependents', 'expect_no_changes', 'diff'],
+    'destroy': ['parallel', 'message', 'target', 'target_dependents', 'diff'],
+}
+ENGINE_OPTIONS = ['parallel', 'message', 'target', 'target_dependents', 'replace', 'expect_no_changes', 'diff']
+
+
+@dataclass
+class OperationOptions:
+    """Engine options for a stack operation, None/empty values are left to the Pulumi defaults."""
+    parallel: Optional[int] = None
+    message: Optional[str] = None
+    target: List[str] = field(default_factory=list)
+    target_dependents: bool = False
+    replace: List[str] = field(default_factory=list)
+    expect_no_changes: bool = False
+    diff: bool = False
+    # Log structured engine events instead of the raw output lines
+    events: bool = False
+    # Extra on_event callbacks (e.g. the deployment profiler)
+    event_handlers: List[Callable] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.parallel is not None and self.parallel < 1:
+            raise ValueError(f"parallel must be a positive number, got {self.parallel}")
+
+    def kwargs(self, operation: str, log=None):
+        """Return the keyword arguments for stack.<operation>(), including on_output/on_event."""
+        log = log or logging.getLogger(__name__)
+        kwargs = {}
+        supported = SUPPORTED_OPTIONS.get(operation, [])
+        for option in ENGINE_OPTIONS:
+            value = getattr(self, option)
+            if not value:
+                continue
+            if option in supported:
+                kwargs[option] = value
+            else:
+                log.warning(f"--{option.replace('_', '-')} is not supported by {operation}, ignored.")
+
+        handlers = list(self.event_handlers)
+        if self.events:
+            handlers.append(event_logger(log))
+        else:
+            kwargs['on_output'] = log.info
+        if handlers:
+            kwargs['on_event'] = handlers[0] if len(handlers) == 1 else lambda event: [handler(event) for handler in handlers]
+        return kwargs
+
+    def pre_refresh(self):
+        """Options of the refresh run before the operation: same targets and parallelism, no message, checks or
+        extra event handlers (the profiler times the operation only)."""
+        return OperationOptions(parallel=self.parallel, target=list(self.target), target_dependents=self.target_dependents,
+                                events=self.events)
+
+
+def event_logger(log):
+    """Return an on_event callback logging one line per resource step, diagnostic and summary."""
+    def on_event(event):
+        if event.resource_pre_event:
+            metadata = event.resource_pre_event.metadata
+            log.info(f"[{metadata.op.value}] {metadata.type} {metadata.urn}")
+        elif event.res_outputs_event:
+            metadata = event.res_outputs_event.metadata
+            log.info(f"[{metadata.op.value} done] {metadata.type} {metadata.urn}")
+        elif event.res_op_failed_event:
+            metadata = event.res_op_failed_event.metadata
+            log.error(f"[{metadata.op.value} failed] {metadata.type} {metadata.urn}")
+        elif event.diagnostic_event:
+            diagnostic = event.diagnostic_event
+            level = {"error": logging.ERROR, "warning": logging.WARNING}.get(diagnostic.severity, logging.INFO)
+            log.log(level, f"{diagnostic.urn or ''} {diagnostic.message.strip()}".strip())
+        elif event.summary_event:
+            summary = event.summary_event
+            log.info(f"Summary: {dict(summary.resource_changes)} in {summary.duration_seconds}s")
+    return on_event
+
+
+def add_operation_arguments(parser):
+    """Add the engine options to an argparse parser."""
+    parser.add_argument('--parallel', type=int, help="Maximum number of resource operations run in parallel by the engine")
+    parser.add_argument('--target', action='append', default=[], help="Only operate on the given resource URN (repeatable)")
+    parser.add_argument('--target-dependents', action='store_true', help="Also operate on the dependents of the targets")
+    parser.add_argument('--replace', action='append', default=[], help="Replace the given resource URN (repeatable)")
+    parser.add_argument('--expect-no-changes', action='store_true', help="Fail if the operation would change any resource")
+    parser.add_argument('--diff', action='store_true', help="Show the detailed diff")
+    parser.add_argument('--message', help="Message attached to the update")
+    parser.add_argument('--events', action='store_true', help="Log structured engine events instead of raw output lines")
+    return parser
+
+
+def options_from_args(args):
+    return OperationOptions(
+        parallel=args.parallel,
+        message=args.message,
+        target=args.target,
+        target_dependents=args.target_dependents,
+        replace=args.replace,
+        expect_no_changes=args.expect_no_changes,
+        diff=args.diff,
+        events=args.events,
+    )
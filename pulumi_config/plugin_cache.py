@@ -0,0 +1,231 @@
+'''
+This script keeps a local, content-addressed cache of the Pulumi resource plugins, so cold runners install them without network.
+The `required_plugins` function resolves the plugin versions from the installed Python provider packages (pulumi_aws, ...),
+so the plugin always matches the SDK in requirements.txt; a version pinned with PULUMI_PLUGIN_VERSIONS that differs from
+the package raises a `PluginVersionError`.
+The `populate_cache` function adds a plugin tarball to the cache (from a file, an installed plugin or a download),
+`verify_cache` checks every tarball against its SHA-256 and `install_plugins` installs the plugins of a workspace from
+the cache (`pulumi plugin install --file`), downloading only the ones missing unless offline.
+
+Cache layout (PULUMI_PLUGIN_CACHE_DIR, default .pulumi_cache/plugins, keep it in the CI cache):
+  blobs/<sha256>.tar.gz        plugin tarballs, named by their content hash
+  index.json                   {"resource-aws-v6.70.0-linux-amd64": {"name", "version", "sha256", "size"}}
+
+Usage: python -m pulumi_config.plugin_cache populate|verify|list
+'''
+import argparse
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import urllib.request
+from .config import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+PLUGIN_CACHE_DIR = os.getenv("PULUMI_PLUGIN_CACHE_DIR", os.path.join(CACHE_DIR, "plugins"))
+
+# Resource plugins and the Python package they come with
+PLUGIN_PACKAGES = {"aws": "pulumi_aws"}
+
+# Optional pins "aws=v6.70.0,...", must match the installed packages
+PINNED_VERSIONS = os.getenv("PULUMI_PLUGIN_VERSIONS", "")
+
+# Never download plugins, fail if they are not in the cache
+OFFLINE = os.getenv("PULUMI_PLUGINS_OFFLINE", "").lower() in ("1", "true")
+
+DOWNLOAD_URL = "https://get.pulumi.com/releases/plugins/pulumi-resource-{name}-{version}-{platform}.tar.gz"
+
+
+class PluginVersionError(RuntimeError):
+    """The plugin version does not match the installed Python package, or the plugin is not available."""
+
+
+def package_plugin_version(package: str):
+    """Plugin version of an installed provider package ("v6.70.0"), read without importing the package."""
+    spec = importlib.util.find_spec(package)
+    if spec is None:
+        raise PluginVersionError(f"The Python package {package} is not installed, install the requirements first")
+    for location in spec.submodule_search_locations or []:
+        path = os.path.join(location, "pulumi-plugin.json")
+        if os.path.isfile(path):
+            with open(path) as file:
+                return "v" + json.load(file)["version"].lstrip("v")
+    return "v" + importlib.metadata.version(package.replace("_", "-"))
+
+
+def parse_pins(pins: str):
+    return dict(pin.strip().split("=", 1) for pin in pins.split(",") if pin.strip())
+
+
+def required_plugins(pins: str = PINNED_VERSIONS):
+    """Return {plugin: version} from the installed packages, raise PluginVersionError if a pin differs."""
+    plugins = {name: package_plugin_version(package) for name, package in PLUGIN_PACKAGES.items()}
+    for name, version in parse_pins(pins).items():
+        version = "v" + version.lstrip("v")
+        if name in plugins and plugins[name] != version:
+            raise PluginVersionError(
+                f"The {name} plugin is pinned to {version} (PULUMI_PLUGIN_VERSIONS) but {PLUGIN_PACKAGES[name]} "
+                f"{plugins[name]} is installed: install {PLUGIN_PACKAGES[name].replace('_', '-')}=={version[1:]} or remove the pin")
+    return plugins
+
+
+def platform_name():
+    system = {"Darwin": "darwin", "Windows": "windows"}.get(platform.system(), "linux")
+    machine = {"x86_64": "amd64", "AMD64": "amd64", "aarch64": "arm64"}.get(platform.machine(), platform.machine().lower())
+    return f"{system}-{machine}"
+
+
+def plugin_key(name: str, version: str):
+    return f"resource-{name}-{version}-{platform_name()}"
+
+
+def load_index(cache_dir: str = PLUGIN_CACHE_DIR):
+    try:
+        with open(os.path.join(cache_dir, "index.json")) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(index: dict, cache_dir: str = PLUGIN_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+    with os.fdopen(fd, "w") as file:
+        json.dump(index, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(cache_dir, "index.json"))
+
+
+def blob_path(sha256: str, cache_dir: str = PLUGIN_CACHE_DIR):
+    return os.path.join(cache_dir, "blobs", f"{sha256}.tar.gz")
+
+
+def sha256_file(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def add_blob(tmp_path: str, cache_dir: str = PLUGIN_CACHE_DIR):
+    """Move a tarball into the blobs directory under its content hash, returns its hash and size."""
+    sha256 = sha256_file(tmp_path)
+    entry = {"sha256": sha256, "size": os.path.getsize(tmp_path)}
+    os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+    os.replace(tmp_path, blob_path(sha256, cache_dir))
+    return entry
+
+
+def installed_plugin_dir(name: str, version: str, pulumi_home: str = None):
+    pulumi_home = pulumi_home or os.getenv("PULUMI_HOME") or os.path.join(os.path.expanduser("~"), ".pulumi")
+    path = os.path.join(pulumi_home, "plugins", f"resource-{name}-{version}")
+    return path if os.path.isdir(path) and not os.path.exists(f"{path}.partial") else None
+
+
+def populate_cache(name: str, version: str, source: str = None, cache_dir: str = PLUGIN_CACHE_DIR, offline: bool = OFFLINE):
+    """Add a plugin to the cache and return its verified tarball path.
+    `source` is a tarball, otherwise the plugin installed in the Pulumi home is packed, or it is downloaded."""
+    cached = cached_plugin(name, version, cache_dir)
+    if cached:
+        return cached
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".partial")
+    os.close(fd)
+    try:
+        installed = installed_plugin_dir(name, version)
+        if source:
+            shutil.copyfile(source, tmp_path)
+        elif installed:
+            with tarfile.open(tmp_path, "w:gz") as tar:
+                for entry in sorted(os.listdir(installed)):
+                    tar.add(os.path.join(installed, entry), arcname=entry)
+        elif offline:
+            raise PluginVersionError(f"The {name} plugin {version} is not in the plugin cache {cache_dir} and downloads are disabled (PULUMI_PLUGINS_OFFLINE)")
+        else:
+            url = DOWNLOAD_URL.format(name=name, version=version, platform=platform_name())
+            logger.info(f"Downloading {url}...")
+            with urllib.request.urlopen(url) as response, open(tmp_path, "wb") as file:
+                shutil.copyfileobj(response, file, 1 << 20)
+        entry = add_blob(tmp_path, cache_dir)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    index = load_index(cache_dir)
+    index[plugin_key(name, version)] = {"name": name, "version": version, **entry}
+    save_index(index, cache_dir)
+    return blob_path(entry["sha256"], cache_dir)
+
+
+def cached_plugin(name: str, version: str, cache_dir: str = PLUGIN_CACHE_DIR):
+    """Path of the cached tarball of the plugin, None if missing or corrupted (corrupted tarballs are removed)."""
+    entry = load_index(cache_dir).get(plugin_key(name, version))
+    if not entry:
+        return None
+    path = blob_path(entry["sha256"], cache_dir)
+    if not os.path.isfile(path):
+        return None
+    if os.path.getsize(path) != entry["size"] or sha256_file(path) != entry["sha256"]:
+        logger.warning(f"Removing corrupted plugin tarball {path}")
+        os.remove(path)
+        return None
+    return path
+
+
+def verify_cache(cache_dir: str = PLUGIN_CACHE_DIR):
+    """Check every cached tarball against its hash, drop the bad entries and return their keys."""
+    index = load_index(cache_dir)
+    bad = [key for key, entry in index.items() if entry.get("name") and cached_plugin(entry["name"], entry["version"], cache_dir) is None]
+    if bad:
+        save_index({key: entry for key, entry in index.items() if key not in bad}, cache_dir)
+    return bad
+
+
+def install_plugins(workspace, log=None, plugins: dict = None, offline: bool = OFFLINE, cache_dir: str = PLUGIN_CACHE_DIR):
+    """Install the required plugins into the workspace (its Pulumi home) from the cache, returns {plugin: version}."""
+    log = log or logger
+    plugins = plugins or required_plugins()
+    installed = {(plugin.name, f"v{str(plugin.version).lstrip('v')}") for plugin in workspace.list_plugins() if plugin.kind == "resource"}
+    env = dict(os.environ, **(getattr(workspace, "env_vars", None) or {}))
+    if getattr(workspace, "pulumi_home", None):
+        env["PULUMI_HOME"] = workspace.pulumi_home
+    for name, version in plugins.items():
+        if (name, version) in installed:
+            continue
+        path = populate_cache(name, version, cache_dir=cache_dir, offline=offline)
+        log.info(f"Installing {name} plugin {version} from {path}...")
+        subprocess.run(["pulumi", "plugin", "install", "resource", name, version, "--file", path],
+                       env=env, check=True, capture_output=True, text=True)
+    return plugins
+
+
+def plugin_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local Pulumi plugin cache")
+    parser.add_argument("command", choices=["populate", "verify", "list"])
+    parser.add_argument("--plugin", choices=sorted(PLUGIN_PACKAGES), help="populate: only this plugin")
+    parser.add_argument("--file", help="populate: add this tarball for --plugin instead of packing or downloading the plugin")
+    args = parser.parse_args(argv)
+    if args.file and not args.plugin:
+        parser.error("--file requires --plugin")
+
+    if args.command == "populate":
+        for name, version in required_plugins().items():
+            if not args.plugin or name == args.plugin:
+                print(f"{name} {version}: {populate_cache(name, version, source=args.file)}")
+    elif args.command == "verify":
+        bad = verify_cache()
+        print(f"{len(bad)} corrupted plugins removed: {bad}" if bad else "All cached plugins verified")
+    else:
+        for key, entry in sorted(load_index().items()):
+            print(f"{key}  {entry['size'] / 1e6:8.1f} MB  {entry['sha256']}")
+
+
+if __name__ == "__main__":
+    plugin_cli()
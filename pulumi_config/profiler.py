@@ -0,0 +1,124 @@
+'''
+This script is used to profile a stack operation resource by resource.
+The `DeploymentProfiler` class subscribes to the Automation API engine events (through `OperationOptions.event_handlers`),
+records when each resource step starts and finishes, and works out the critical path through the dependency graph
+read from the stack export. Steps are keyed by (urn, op): a replacement runs several steps on the same resource
+(create-replacement, replace, delete-replaced) and every one of them is kept.
+The `write_report` method writes a Chrome tracing JSON (open in chrome://tracing or https://ui.perfetto.dev)
+and prints the top-N slowest resources and the critical path.
+'''
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = "profile"
+
+
+class DeploymentProfiler:
+    def __init__(self):
+        self.origin = time.monotonic()
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def on_event(self, event):
+        """Engine event callback, pass it in OperationOptions(event_handlers=[profiler.on_event])."""
+        now = time.monotonic() - self.origin
+        with self._lock:
+            if event.resource_pre_event:
+                metadata = event.resource_pre_event.metadata
+                self.steps[(metadata.urn, metadata.op.value)] = {"urn": metadata.urn, "type": metadata.type, "op": metadata.op.value, "start": now, "end": None, "failed": False}
+            elif event.res_outputs_event or event.res_op_failed_event:
+                metadata = (event.res_outputs_event or event.res_op_failed_event).metadata
+                step = self.steps.get((metadata.urn, metadata.op.value))
+                if step is not None:
+                    step["end"] = now
+                    step["failed"] = event.res_op_failed_event is not None
+
+    def durations(self):
+        """Return the finished steps with their duration, slowest first."""
+        finished = [dict(step, duration=step["end"] - step["start"]) for step in self.steps.values() if step["end"] is not None]
+        return sorted(finished, key=lambda step: step["duration"], reverse=True)
+
+    def critical_path(self, dependencies: dict):
+        """Walk back from the step that finished last, always following the dependency that finished last.
+        `dependencies` maps an URN to the URNs it depends on, the last finished step of a resource stands for it."""
+        finished = {}
+        for step in sorted(self.durations(), key=lambda step: step["end"]):
+            finished[step["urn"]] = step
+        if not finished:
+            return []
+        current = max(finished.values(), key=lambda step: step["end"])
+        path = [current]
+        while True:
+            parents = [finished[urn] for urn in dependencies.get(current["urn"], []) if urn in finished]
+            if not parents:
+                break
+            current = max(parents, key=lambda step: step["end"])
+            path.append(current)
+        return list(reversed(path))
+
+    def chrome_trace(self):
+        """Return the steps as Chrome trace complete events, packed in lanes that do not overlap."""
+        lanes = []
+        trace_events = []
+        for step in sorted(self.durations(), key=lambda step: step["start"]):
+            lane = next((i for i, lane_end in enumerate(lanes) if lane_end <= step["start"]), None)
+            if lane is None:
+                lanes.append(0)
+                lane = len(lanes) - 1
+            lanes[lane] = step["end"]
+            trace_events.append({
+                "name": step["urn"].split("::")[-1],
+                "cat": step["type"],
+                "ph": "X",
+                "ts": int(step["start"] * 1e6),
+                "dur": int(step["duration"] * 1e6),
+                "pid": 1,
+                "tid": lane,
+                "args": {"urn": step["urn"], "op": step["op"], "failed": step["failed"]},
+            })
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write_report(self, stack=None, name="profile", top: int = 10, profile_dir: str = PROFILE_DIR, log=None):
+        """Write <profile_dir>/<name>.json and print the top-N table and the critical path (to `log` when given,
+        e.g. the stack logger of multi_stack). The dependency graph is read from the stack export when a stack is given."""
+        dependencies = stack_dependencies(stack) if stack is not None else {}
+        os.makedirs(profile_dir, exist_ok=True)
+        trace_path = os.path.join(profile_dir, f"{name}.json")
+        trace = self.chrome_trace()
+        trace["criticalPath"] = [step["urn"] for step in self.critical_path(dependencies)]
+        with open(trace_path, "w") as file:
+            json.dump(trace, file, indent=1)
+
+        lines = [f"\nTop {top} slowest resources:", f"{'SECONDS':>8}  {'OP':<8}  RESOURCE"]
+        for step in self.durations()[:top]:
+            lines.append(f"{step['duration']:8.2f}  {step['op']:<8}  {step['urn'].split('::')[-2]}::{step['urn'].split('::')[-1]}")
+
+        path = self.critical_path(dependencies)
+        if path:
+            lines.append(f"\nCritical path ({path[-1]['end'] - path[0]['start']:.2f}s):")
+            for step in path:
+                lines.append(f"{step['duration']:8.2f}  {step['urn'].split('::')[-1]}")
+        if log:
+            log.info("\n".join(lines))
+        else:
+            print("\n".join(lines))
+        (log or logger).info(f"Trace written to {trace_path}")
+        return trace_path
+
+
+def stack_dependencies(stack):
+    """Return {urn: [dependency urns]} from the stack export."""
+    try:
+        deployment = stack.export_stack().deployment
+    except Exception as e:
+        logger.warning(f"Could not read the dependency graph from the stack export: {e}")
+        return {}
+    dependencies = {}
+    for resource in deployment.get("resources", []):
+        dependencies[resource["urn"]] = list(resource.get("dependencies", []))
+    return dependencies
@@ -1,82 +1,206 @@
 '''
 This script is used to create a pulumi stack, install plugin if needed, and perform stack operations.
-The `setting_up_stack` function is used to check if the AWS plugin is installed and install it if needed.
+The `setting_up_stack` function is used to check if the AWS plugin (version of the installed pulumi_aws package) is installed and install it from the plugin cache if needed, and to refresh the stack based on the refresh policy.
 The `handle_stack_operation` function is used to handle different stack operations (up, destroy, cancel, refresh).
 The `run_pulumi` function is used to perform the requested operation (up, destroy, cancel, refresh).
+The `save_export` function writes the state of the export operation to a file, for offline inspection with `state_inspect.py`.
 This script can be used to automate the deployment of Pulumi stacks and manage the stack operations.
 Used with the `cdk/app.py` script to deploy resources using Pulumi.
 '''
+import argparse
+import json
 import logging
+import os
+import time
 from pulumi import automation as auto
+from .config import CACHE_DIR
+from .operation_options import OperationOptions
+from .plugin_cache import install_plugins, required_plugins
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Directory of the state files written by the export operation (see state_inspect.py)
+EXPORT_DIR = "exports"
+
+# Operations that never need a refresh before running
+NO_REFRESH_OPERATIONS = ['cancel', 'export', 'refresh', 'outputs']
+
+# Operations that never run the Pulumi program (no plugins, config or resource modules needed)
+NO_PROGRAM_OPERATIONS = ['cancel', 'export', 'outputs']
+
 def main():
     ...
     
-def setting_up_stack(stack, region):
-    """Check if AWS plugin is installed and install if needed."""
+def setting_up_stack(stack, region, log=None, refresh="always", config: dict = None, options=None):
+    """Check if AWS plugin is installed and install if needed (from the local plugin cache, see plugin_cache.py).
+    The plugin versions come from the installed provider packages, a mismatch with a pin raises PluginVersionError.
+    Plugins and config already applied to the stack are recorded in a local state file and skipped on the next run.
+    `refresh` is the pre-refresh policy: "always", "never" or the maximum age in minutes of the last refresh.
+    The pre-refresh uses the --parallel and --target options of the operation (`options`, an OperationOptions);
+    a targeted refresh is not recorded as the last refresh of the stack."""
+    log = log or logger
+    state = load_setup_state(stack.name)
+    # The recorded setup only holds for the backend and Pulumi home it was made with
+    workspace = {
+        "backend": (getattr(stack.workspace, "env_vars", None) or {}).get("PULUMI_BACKEND_URL", os.getenv("PULUMI_BACKEND_URL")),
+        "pulumi_home": getattr(stack.workspace, "pulumi_home", None),
+    }
+    if state.get("workspace", workspace) != workspace:
+        state = {"plugins": {}, "config": {}, "last_refresh": None}
+    state["workspace"] = workspace
+    plugins = required_plugins()
     try:
-        if not stack.workspace.install_plugin("aws", "v6.70.0"):
-            print("Installing AWS plugin...")
-            stack.workspace.install_plugin("aws", "v6.70.0")
+        # Install plugins not recorded yet
+        missing = {plugin: version for plugin, version in plugins.items() if state["plugins"].get(plugin) != version}
+        if missing:
+            install_plugins(stack.workspace, log=log, plugins=missing)
+            state["plugins"].update(missing)
 
-        # Configure AWS region
-        if not stack.set_config("aws:region", auto.ConfigValue(value=region)):
-            print("Setting up AWS region configuration...")
-            stack.set_config("aws:region", auto.ConfigValue(value=region))
+        # Configure AWS region and extra config values
+        stack_config = dict(config or {})
+        if region:
+            stack_config["aws:region"] = region
+        for key, value in stack_config.items():
+            if state["config"].get(key) != str(value):
+                log.info(f"Setting up {key} configuration...")
+                stack.set_config(key, auto.ConfigValue(value=str(value)))
+                state["config"][key] = str(value)
 
         # Refresh stack state
-        print("Refreshing Stack...")
-        handle_stack_operation(stack, 'refresh')
+        if refresh_due(state.get("last_refresh"), refresh):
+            print("Refreshing Stack...")
+            refresh_options = options.pre_refresh() if options else None
+            if handle_stack_operation(stack, 'refresh', log=log, options=refresh_options) and not (refresh_options and refresh_options.target):
+                state["last_refresh"] = time.time()
+        else:
+            log.info(f"Skipping refresh (policy: {refresh}).")
 
         return None
     except Exception as e:
+        log.error(f"Stack setup failed: {e}")
         return None
+    finally:
+        save_setup_state(stack.name, state)
+
+
+def refresh_due(last_refresh, policy="always"):
+    """Return True if the stack must be refreshed under the given policy."""
+    if policy in (None, "always"):
+        return True
+    if policy == "never":
+        return False
+    try:
+        max_age = float(policy) * 60
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid refresh policy: {policy}. Use 'always', 'never' or a number of minutes.")
+    return last_refresh is None or time.time() - last_refresh > max_age
+
+
+def refresh_policy(value: str):
+    """argparse type of --refresh: 'always', 'never' or a number of minutes, any other value is a usage error."""
+    if value in ("always", "never"):
+        return value
+    try:
+        minutes = float(value)
+    except ValueError:
+        minutes = None
+    if minutes is None or minutes < 0:
+        raise argparse.ArgumentTypeError(f"invalid refresh policy {value!r}: use 'always', 'never' or a number of minutes")
+    return value
+
+
+def setup_state_path(stack_name):
+    return os.path.join(CACHE_DIR, "setup", f"{stack_name.replace('/', '_')}.json")
+
+
+def load_setup_state(stack_name):
+    """Load the recorded plugins, config and last refresh time of the stack."""
+    state = {"plugins": {}, "config": {}, "last_refresh": None}
+    try:
+        with open(setup_state_path(stack_name)) as file:
+            state.update(json.load(file))
+    except (OSError, ValueError):
+        pass
+    return state
+
+
+def save_setup_state(stack_name, state):
+    path = setup_state_path(stack_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(state, file, indent=2)
+
+
+def clear_setup_state(stack_name):
+    """Forget the recorded setup, the next run installs plugins and applies config again."""
+    if os.path.isfile(setup_state_path(stack_name)):
+        os.remove(setup_state_path(stack_name))
+
+
+def save_export(stack_name, deployment, export_dir=EXPORT_DIR):
+    """Write the exported state to <export_dir>/<stack>-<UTC time>.json (`pulumi stack export` format) and return the path."""
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"{stack_name.replace('/', '-')}-{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}.json")
+    with open(path, "w") as file:
+        json.dump({"version": deployment.version, "deployment": deployment.deployment}, file)
+    return path
 
 
-def handle_stack_operation(stack, operation):
-    """Handle different stack operations (up, destroy, cancel, refresh)."""
+def handle_stack_operation(stack, operation, log=None, options=None):
+    """Handle different stack operations (up, destroy, cancel, refresh).
+    Output lines are written to `log`, the module logger is used if not given.
+    `options` is an OperationOptions with the engine options (parallel, target, replace, ...)."""
+    log = log or logger
+    options = options or OperationOptions()
     try:
-        logger.info(f"Starting {operation} operation...")
+        log.info(f"Starting {operation} operation...")
         
         if operation == 'up':
-            result = stack.up(on_output=logger.info)
+            result = stack.up(**options.kwargs('up', log))
         elif operation == 'destroy':
-            result = stack.destroy(on_output=logger.info)
+            result = stack.destroy(**options.kwargs('destroy', log))
         elif operation == 'cancel':
-            result = stack.cancel()
+            stack.cancel()
+            result = True
         elif operation == 'refresh':
-            result = stack.refresh(on_output=logger.info)
+            result = stack.refresh(**options.kwargs('refresh', log))
         elif operation == 'export':
             result = stack.export_stack()
-            print("Stack state:", result)
+            path = save_export(stack.name, result)
+            print(f"Stack state ({len(result.deployment.get('resources', []))} resources) written to {path}, inspect it with: python -m pulumi_config.state_inspect summary {path}")
+        elif operation == 'outputs':
+            outputs = stack.outputs()
+            result = {key: "[secret]" if output.secret else output.value for key, output in outputs.items()}
+            print("Stack outputs:", result)
+            result = True
         elif operation == 'preview':
-            result = stack.preview(on_output=logger.info)
+            result = stack.preview(**options.kwargs('preview', log))
             print("Preview result:", result)
         else:
             raise ValueError(f"Unknown operation: {operation}")
         if result:
-            logger.info(f"{operation.capitalize()} operation completed.")
-            return None
+            log.info(f"{operation.capitalize()} operation completed.")
+            return result
     except Exception as e:
-        logger.error(f"Deployment failed. Check the error above. {e}")
+        log.error(f"Deployment failed. Check the error above. {e}")
         return None
 
-def run_pulumi(stack,operation=None):
+def run_pulumi(stack,operation=None, log=None, options=None):
+    """Run the requested operation, returns the operation result or None if it failed."""
+    log = log or logger
     try:
         # Perform requested operation
         if operation is None:
             operation = 'up'
-        if operation in ['up', 'destroy', 'cancel', 'refresh']:
-            result = handle_stack_operation(stack, operation)
+        if operation in ['up', 'destroy', 'cancel', 'refresh', 'export', 'preview', 'outputs']:
+            result = handle_stack_operation(stack, operation, log=log, options=options)
             if result:
                 #logger.info(f"Stack {operation} completed successfully!")
                 return result
     except Exception as e:
-        logger.error(f"Stack {operation} Terminated!")
+        log.error(f"Stack {operation} Terminated!")
 
 
 
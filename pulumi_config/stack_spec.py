@@ -0,0 +1,176 @@
+'''
+This script compiles a declarative stack spec (YAML or JSON) into the resources of the Pulumi program.
+The `load_spec` function reads the spec file, `validate_spec` checks it and returns the components in dependency order.
+The `compile_spec` function calls the resource components (resources/registry.py) in that order; references between
+components are passed as plain inputs/Outputs (no Output.apply nesting), so every resource is visible to `preview`
+and the engine can create independent components in parallel.
+The `spec_program` function returns a program for `auto.create_or_select_stack` (picklable, usable with --stacks).
+
+Spec example (see data/stack.example.yaml):
+variables:
+  prefix: demo
+components:
+  - name: site
+    type: bucket
+    args: {name: "${project}"}
+  - name: cdn
+    type: cloudfront_s3
+    args: {name: "${project}", bucket: "${site}", path_pattern: "media/*"}
+exports:
+  cdn_domain: "${cdn.domain_name}"
+
+References: "${component}" is the object returned by the component, "${component.attribute}" one of its outputs,
+"${variable}" a variable (project, stack, region and the spec variables). References inside a longer string are
+concatenated: a plain string when they are all variables ("${project}-http"), else with pulumi.Output.concat.
+'''
+from functools import partial
+import inspect
+import json
+import os
+import re
+import pulumi
+from resources.hash_cache import reference
+from resources.registry import registry, resolve
+
+REFERENCE = re.compile(r"\$\{([^}]+)\}")
+
+
+class SpecError(ValueError):
+    """Invalid stack spec."""
+
+
+def load_spec(path: str):
+    """Read a .json, .yaml or .yml stack spec."""
+    with open(path) as file:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            return yaml.safe_load(file)
+        return json.load(file)
+
+
+def references(value):
+    """Names referenced by a spec value ("${name}" / "${name.attribute}")."""
+    if isinstance(value, str):
+        return {match.split(".", 1)[0] for match in REFERENCE.findall(value)}
+    if isinstance(value, dict):
+        return set().union(*[references(item) for item in value.values()]) if value else set()
+    if isinstance(value, list):
+        return set().union(*[references(item) for item in value]) if value else set()
+    return set()
+
+
+def validate_spec(spec: dict, variables: dict = None):
+    """Check the spec and return its components in dependency order. Raises SpecError."""
+    if not isinstance(spec, dict) or not isinstance(spec.get("components"), list):
+        raise SpecError("The spec must be a mapping with a 'components' list")
+    variables = dict(variables or {}, **(spec.get("variables") or {}))
+    known_types = registry()
+
+    components = {}
+    for component in spec["components"]:
+        if not isinstance(component, dict) or not component.get("name") or not component.get("type"):
+            raise SpecError(f"Every component needs a name and a type: {component}")
+        name = component["name"]
+        if name in components:
+            raise SpecError(f"Duplicate component name: {name}")
+        if name in variables:
+            raise SpecError(f"Component {name} has the same name as a variable")
+        component_type = component["type"]
+        if "." not in component_type:
+            modules = known_types.get(component_type, [])
+            if not modules:
+                raise SpecError(f"Component {name}: unknown type {component_type}")
+            if len(modules) > 1:
+                raise SpecError(f"Component {name}: type {component_type} is defined in {modules}, use 'module.{component_type}'")
+        if not isinstance(component.get("args", {}), dict):
+            raise SpecError(f"Component {name}: args must be a mapping")
+        components[name] = component
+
+    # Dependencies between components, unknown references are errors
+    dependencies = {}
+    for name, component in components.items():
+        refs = references(component.get("args", {}))
+        unknown = refs - set(components) - set(variables)
+        if unknown:
+            raise SpecError(f"Component {name}: unknown references {sorted(unknown)}")
+        dependencies[name] = refs & set(components)
+    unknown = references(spec.get("exports") or {}) - set(components) - set(variables)
+    if unknown:
+        raise SpecError(f"Exports: unknown references {sorted(unknown)}")
+
+    # Topological order (depth first), cycles are errors
+    order, state = [], {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise SpecError(f"Reference cycle: {' -> '.join(path + [name])}")
+        state[name] = "visiting"
+        for dependency in sorted(dependencies[name]):
+            visit(dependency, path + [name])
+        state[name] = "done"
+        order.append(components[name])
+
+    for name in components:
+        visit(name, [])
+    return order
+
+
+def resolve_value(value, objects: dict, variables: dict):
+    """Replace the references of a spec value by the component objects, their outputs or the variables."""
+    if isinstance(value, dict):
+        return {key: resolve_value(item, objects, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_value(item, objects, variables) for item in value]
+    if not isinstance(value, str) or "${" not in value:
+        return value
+
+    def lookup(reference):
+        name, *attributes = reference.split(".")
+        result = objects[name] if name in objects else variables[name]
+        for attribute in attributes:
+            result = result[attribute] if isinstance(result, dict) else getattr(result, attribute)
+        return result
+
+    match = REFERENCE.fullmatch(value)
+    if match:
+        return lookup(match.group(1))
+    # Reference inside a string: concatenate the parts, a plain string when they are all plain values (names)
+    parts, position = [], 0
+    for match in REFERENCE.finditer(value):
+        parts += [value[position:match.start()], lookup(match.group(1))]
+        position = match.end()
+    parts.append(value[position:])
+    if all(isinstance(part, (str, int, float)) for part in parts):
+        return "".join(str(part) for part in parts)
+    return pulumi.Output.concat(*[pulumi.Output.from_input(part).apply(str) for part in parts if part != ""])
+
+
+def compile_spec(spec: dict, variables: dict = None):
+    """Create the resources of the spec, returns {component name: object returned by the component}."""
+    variables = dict(variables or {}, **(spec.get("variables") or {}))
+    objects = {}
+    for component in validate_spec(spec, variables):
+        function = resolve(component["type"])
+        args = resolve_value(component.get("args", {}), objects, variables)
+        try:
+            inspect.signature(function).bind(**args)
+        except TypeError as e:
+            raise SpecError(f"Component {component['name']} ({component['type']}): {e}")
+        objects[component["name"]] = function(**args)
+
+    for key, value in (spec.get("exports") or {}).items():
+        pulumi.export(key, resolve_value(value, objects, variables))
+    return objects
+
+
+def run_spec(path: str, variables: dict = None):
+    # ${stack} is the stack running the program (one program is shared by all the stacks with --stacks)
+    reference(files=[path])
+    compile_spec(load_spec(path), {"stack": pulumi.get_stack(), **(variables or {})})
+
+
+def spec_program(path: str, variables: dict = None):
+    """Pulumi program compiling the spec file, `variables` (and ${stack}) are available as ${name} in the spec."""
+    return partial(run_spec, os.path.abspath(path), variables)
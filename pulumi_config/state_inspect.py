@@ -0,0 +1,215 @@
+'''
+This script is used to inspect and diff stack states offline, from the files written by the `export` operation.
+The `iter_resources` function streams the resources of an export file one by one (chunked reads, only one
+resource decoded in memory at a time), so exports of tens of MB are never parsed as a single blob.
+The `StateIndex` class indexes the resources by URN, type and provider and answers the queries: resource counts,
+largest resources, dependency fan-out and orphaned resources (dangling parent/provider/dependency, pending deletes).
+The `diff_exports` function compares two export files in one pass over each (per-field hashes, linear in their size).
+
+Usage (no stack, backend or network needed):
+python -m pulumi_config.state_inspect summary exports/dev-20240101-120000.json [--top 10] [--json]
+python -m pulumi_config.state_inspect diff exports/dev-old.json exports/dev-new.json [--json]
+'''
+from collections import Counter
+import argparse
+import hashlib
+import json
+import re
+
+CHUNK_SIZE = 1 << 20
+RESOURCES_ARRAY = re.compile(r'"resources"\s*:\s*\[')
+WHITESPACE = re.compile(r"[\s,]*")
+
+
+def iter_resources(path: str, chunk_size: int = CHUNK_SIZE):
+    """Yield (resource, size) for every resource of an export file, size is the length of its JSON text.
+    Accepts the `pulumi stack export` format ({"version", "deployment": {..., "resources": [...]}}) or a bare deployment."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as file:
+        buffer, match = "", None
+        while match is None:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            buffer += chunk
+            match = RESOURCES_ARRAY.search(buffer)
+            if match is None:
+                # Keep the tail in case the key is split between two chunks
+                buffer = buffer[-32:]
+        position = match.end()
+
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                resource, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Resource not complete in the buffer: drop what was already decoded and read more
+                chunk = file.read(max(chunk_size, len(buffer) - position))
+                if not chunk:
+                    raise ValueError(f"{path}: truncated resources array")
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield resource, end - position
+            position = end
+
+
+def provider_urn(reference: str):
+    """Provider URN of a provider reference ("<provider urn>::<provider id>")."""
+    return reference.rsplit("::", 1)[0] if reference else None
+
+
+def resource_key(resource: dict):
+    """Identity of a resource in a state: its URN, suffixed for the old copy of a resource pending deletion."""
+    return resource["urn"] + (" (pending delete)" if resource.get("delete") else "")
+
+
+class StateIndex:
+    def __init__(self):
+        self.resources = {}
+        self.by_type = {}
+        self.by_provider = {}
+
+    @classmethod
+    def from_file(cls, path: str):
+        index = cls()
+        for resource, size in iter_resources(path):
+            index.add(resource, size)
+        return index
+
+    def add(self, resource: dict, size: int = 0):
+        """Index a resource, only the fields needed by the queries are kept."""
+        key = resource_key(resource)
+        entry = {
+            "urn": resource["urn"],
+            "type": resource.get("type", ""),
+            "provider": provider_urn(resource.get("provider")),
+            "parent": resource.get("parent"),
+            "dependencies": sorted(set(resource.get("dependencies") or [])),
+            "delete": bool(resource.get("delete")),
+            "size": size,
+        }
+        self.resources[key] = entry
+        self.by_type.setdefault(entry["type"], []).append(key)
+        if entry["provider"]:
+            self.by_provider.setdefault(entry["provider"], []).append(key)
+
+    def counts(self, by: str = "type"):
+        """Number of resources per type or per provider, largest first."""
+        groups = self.by_type if by == "type" else self.by_provider
+        return Counter({group: len(keys) for group, keys in groups.items()}).most_common()
+
+    def largest(self, top: int = 10):
+        """The `top` resources with the largest state (inputs, outputs, ...), as (size, urn)."""
+        return sorted(((entry["size"], key) for key, entry in self.resources.items()), reverse=True)[:top]
+
+    def fan_out(self, top: int = 10):
+        """The `top` resources with the most dependents, as (dependents, urn)."""
+        dependents = Counter(dependency for entry in self.resources.values() for dependency in entry["dependencies"])
+        return [(count, urn) for urn, count in dependents.most_common(top)]
+
+    def orphans(self):
+        """Resources with a parent, provider or dependency missing from the state, and resources pending deletion."""
+        urns = {entry["urn"] for entry in self.resources.values()}
+        result = []
+        for key, entry in self.resources.items():
+            if entry["delete"]:
+                result.append((key, "pending delete"))
+            if entry["parent"] and entry["parent"] not in urns:
+                result.append((key, f"missing parent {entry['parent']}"))
+            if entry["provider"] and entry["provider"] not in urns:
+                result.append((key, f"missing provider {entry['provider']}"))
+            for dependency in entry["dependencies"]:
+                if dependency not in urns:
+                    result.append((key, f"missing dependency {dependency}"))
+        return result
+
+    def summary(self, top: int = 10):
+        return {
+            "resources": len(self.resources),
+            "bytes": sum(entry["size"] for entry in self.resources.values()),
+            "types": self.counts("type")[:top],
+            "providers": self.counts("provider"),
+            "largest": self.largest(top),
+            "fan_out": self.fan_out(top),
+            "orphans": self.orphans(),
+        }
+
+
+def fingerprint(resource: dict):
+    """Hash of every field of a resource, so two states are compared without keeping both in memory."""
+    return {field: hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest() for field, value in resource.items()}
+
+
+def diff_exports(old_path: str, new_path: str):
+    """Resources added, removed and changed (with the changed fields) between two export files."""
+    old = {resource_key(resource): fingerprint(resource) for resource, _ in iter_resources(old_path)}
+    added, changed = [], {}
+    for resource, _ in iter_resources(new_path):
+        key = resource_key(resource)
+        previous = old.pop(key, None)
+        if previous is None:
+            added.append(key)
+            continue
+        current = fingerprint(resource)
+        fields = sorted(field for field in set(previous) | set(current) if previous.get(field) != current.get(field))
+        if fields:
+            changed[key] = fields
+    return {"added": sorted(added), "removed": sorted(old), "changed": dict(sorted(changed.items()))}
+
+
+def print_state_summary(summary: dict):
+    print(f"{summary['resources']} resources, {summary['bytes'] / 1e6:.2f} MB of state")
+    print(f"\n{'COUNT':>7}  TYPE")
+    for resource_type, count in summary["types"]:
+        print(f"{count:7}  {resource_type}")
+    print(f"\n{'COUNT':>7}  PROVIDER")
+    for provider, count in summary["providers"]:
+        print(f"{count:7}  {provider.split('::')[-1]}")
+    print(f"\n{'BYTES':>10}  LARGEST RESOURCES")
+    for size, urn in summary["largest"]:
+        print(f"{size:10}  {urn}")
+    print(f"\n{'DEPENDENTS':>10}  RESOURCE")
+    for count, urn in summary["fan_out"]:
+        print(f"{count:10}  {urn}")
+    print(f"\n{len(summary['orphans'])} orphaned resources")
+    for urn, reason in summary["orphans"]:
+        print(f"  {urn}: {reason}")
+
+
+def print_state_diff(diff: dict):
+    for urn in diff["added"]:
+        print(f"+ {urn}")
+    for urn in diff["removed"]:
+        print(f"- {urn}")
+    for urn, fields in diff["changed"].items():
+        print(f"~ {urn} ({', '.join(fields)})")
+    print(f"\n{len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed")
+
+
+def state_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and diff exported stack states offline")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary_parser = commands.add_parser("summary", help="Resource counts, largest resources, fan-out and orphans of an export file")
+    summary_parser.add_argument("path")
+    summary_parser.add_argument("--top", type=int, default=10, help="Rows per table (default: 10)")
+    summary_parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    diff_parser = commands.add_parser("diff", help="Resources added, removed and changed between two export files")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    diff_parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        result = StateIndex.from_file(args.path).summary(args.top)
+        print(json.dumps(result, indent=2)) if args.json else print_state_summary(result)
+    else:
+        result = diff_exports(args.old, args.new)
+        print(json.dumps(result, indent=2)) if args.json else print_state_diff(result)
+    return result
+
+
+if __name__ == "__main__":
+    state_cli()
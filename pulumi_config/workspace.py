@@ -0,0 +1,151 @@
+'''
+This script configures the Pulumi workspace used by the stacks (backend, checkpoints and Pulumi home).
+The `WorkspaceConfig` class holds the settings, `local_workspace_options` returns the `auto.LocalWorkspaceOptions`
+passed to `auto.create_or_select_stack`.
+Backends: the Pulumi Cloud (default, PULUMI_ACCESS_TOKEN), a local directory ("local" or "file://<path>") or an
+S3-compatible bucket ("s3://<bucket>/<prefix>?endpoint=...&region=..."). Self-managed backends need a passphrase
+for the stack secrets (PULUMI_CONFIG_PASSPHRASE or PULUMI_CONFIG_PASSPHRASE_FILE), an empty passphrase is only used
+with `allow_empty_passphrase` (throwaway stacks).
+Checkpoint knobs: `skip_checkpoints` (PULUMI_SKIP_CHECKPOINTS, only the final state is written, for ephemeral CI
+stacks) requires `experimental` (PULUMI_EXPERIMENTAL).
+The `seed_plugins` function links the plugins of another Pulumi home into an isolated one, so a reusable (CI cached)
+Pulumi home starts with the plugins already installed.
+The `add_workspace_arguments` and `workspace_from_args` functions expose the settings on the command line.
+'''
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import logging
+import os
+from pulumi import automation as auto
+from .config import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Directory of the "local" backend
+LOCAL_BACKEND_DIR = os.path.join(CACHE_DIR, "backend")
+
+# Isolated Pulumi home reused between runs
+ISOLATED_PULUMI_HOME = os.path.join(CACHE_DIR, "pulumi_home")
+
+# Pulumi home of the user, source of the plugins seeded in an isolated home
+DEFAULT_PULUMI_HOME = os.path.join(os.path.expanduser("~"), ".pulumi")
+
+
+def backend_url(url: Optional[str]):
+    """Normalize a backend URL: "local" -> file://<LOCAL_BACKEND_DIR>, relative file:// paths are made absolute
+    (the inline program runs the CLI from a temporary directory). The local directory is created if needed."""
+    if not url:
+        return None
+    if url == "local":
+        url = f"file://{LOCAL_BACKEND_DIR}"
+    if url.startswith("file://"):
+        path = url[len("file://"):]
+        if path != "~" and not path.startswith("~/"):
+            path = os.path.abspath(path)
+            os.makedirs(path, exist_ok=True)
+        url = f"file://{path}"
+    return url
+
+
+def seed_plugins(pulumi_home: str, source_home: str = DEFAULT_PULUMI_HOME):
+    """Link the plugins of `source_home` missing from `pulumi_home`, returns the names of the linked plugins."""
+    source = os.path.join(source_home, "plugins")
+    target = os.path.join(pulumi_home, "plugins")
+    if not os.path.isdir(source) or os.path.abspath(source) == os.path.abspath(target):
+        return []
+    os.makedirs(target, exist_ok=True)
+    seeded = []
+    for name in sorted(os.listdir(source)):
+        # Skip the downloads in progress
+        if name.endswith(".partial") or os.path.lexists(os.path.join(target, name)):
+            continue
+        try:
+            os.symlink(os.path.join(source, name), os.path.join(target, name))
+        except FileExistsError:
+            # Seeded by another stack running at the same time
+            continue
+        seeded.append(name)
+    return seeded
+
+
+@dataclass
+class WorkspaceConfig:
+    """Workspace settings, None/False values are left to the Pulumi defaults."""
+    backend: Optional[str] = None
+    pulumi_home: Optional[str] = None
+    # Use ISOLATED_PULUMI_HOME when pulumi_home is not given
+    isolated_home: bool = False
+    # Link the plugins of the default Pulumi home into the isolated one
+    seed_plugins: bool = True
+    skip_checkpoints: bool = False
+    experimental: bool = False
+    skip_update_check: bool = True
+    # Encrypt the secrets of a self-managed backend with an empty passphrase when none is set
+    allow_empty_passphrase: bool = False
+    env_vars: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.backend = backend_url(self.backend or os.getenv("PULUMI_BACKEND_URL"))
+        if self.isolated_home and not self.pulumi_home:
+            self.pulumi_home = ISOLATED_PULUMI_HOME
+        if self.pulumi_home:
+            # The CLI of an inline program runs from a temporary directory
+            self.pulumi_home = os.path.abspath(os.path.expanduser(self.pulumi_home))
+        if self.skip_checkpoints:
+            # Skipping checkpoints is an experimental feature
+            self.experimental = True
+
+    @property
+    def self_managed(self):
+        return bool(self.backend) and not self.backend.startswith(("https://", "http://"))
+
+    def env(self):
+        """Environment variables of the Pulumi CLI."""
+        env = {}
+        if self.backend:
+            env["PULUMI_BACKEND_URL"] = self.backend
+        passphrase_set = any(name in os.environ or name in self.env_vars for name in ("PULUMI_CONFIG_PASSPHRASE", "PULUMI_CONFIG_PASSPHRASE_FILE"))
+        if self.self_managed and not passphrase_set:
+            if not self.allow_empty_passphrase:
+                raise ValueError(f"The backend {self.backend} encrypts the stack secrets with a passphrase: set PULUMI_CONFIG_PASSPHRASE "
+                                 f"or PULUMI_CONFIG_PASSPHRASE_FILE, or pass --allow-empty-passphrase for a throwaway stack")
+            logger.warning("PULUMI_CONFIG_PASSPHRASE is not set, the stack secrets of the self-managed backend use an empty passphrase.")
+            env["PULUMI_CONFIG_PASSPHRASE"] = ""
+        if self.skip_checkpoints:
+            env["PULUMI_SKIP_CHECKPOINTS"] = "true"
+        if self.experimental:
+            env["PULUMI_EXPERIMENTAL"] = "true"
+        if self.skip_update_check:
+            env["PULUMI_SKIP_UPDATE_CHECK"] = "true"
+        env.update(self.env_vars)
+        return env
+
+    def local_workspace_options(self):
+        """Return the auto.LocalWorkspaceOptions for auto.create_or_select_stack(..., opts=...)."""
+        if self.pulumi_home:
+            os.makedirs(self.pulumi_home, exist_ok=True)
+            if self.seed_plugins:
+                seeded = seed_plugins(self.pulumi_home)
+                if seeded:
+                    logger.info(f"Seeded {len(seeded)} plugins into {self.pulumi_home}")
+        return auto.LocalWorkspaceOptions(pulumi_home=self.pulumi_home, env_vars=self.env())
+
+
+def add_workspace_arguments(parser):
+    """Add the workspace settings to an argparse parser."""
+    parser.add_argument('--backend', help="Backend URL: 'local' (.pulumi_cache/backend), file://<path> or s3://<bucket> (default: PULUMI_BACKEND_URL or the Pulumi Cloud)")
+    parser.add_argument('--pulumi-home', help="Pulumi home directory (plugins, workspaces) used instead of ~/.pulumi")
+    parser.add_argument('--isolated-home', action='store_true', help="Use a reusable Pulumi home under .pulumi_cache/pulumi_home, seeded with the installed plugins")
+    parser.add_argument('--skip-checkpoints', action='store_true', help="Only write the final state of the update (PULUMI_SKIP_CHECKPOINTS, for ephemeral stacks)")
+    parser.add_argument('--allow-empty-passphrase', action='store_true', help="Use an empty secrets passphrase on a self-managed backend when PULUMI_CONFIG_PASSPHRASE(_FILE) is not set")
+    return parser
+
+
+def workspace_from_args(args):
+    return WorkspaceConfig(
+        backend=args.backend,
+        pulumi_home=args.pulumi_home,
+        isolated_home=args.isolated_home,
+        skip_checkpoints=args.skip_checkpoints,
+        allow_empty_passphrase=args.allow_empty_passphrase,
+    )
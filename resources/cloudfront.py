@@ -0,0 +1,266 @@
+# Doc: Distribution          - https://www.pulumi.com/registry/packages/aws/api-docs/cloudfront/distribution/
+# Doc: Cache Policy          - https://www.pulumi.com/registry/packages/aws/api-docs/cloudfront/cachepolicy/
+# Doc: Origin Request Policy - https://www.pulumi.com/registry/packages/aws/api-docs/cloudfront/originrequestpolicy/
+# Doc: Origin Shield         - https://docs.aws.amazon.com/AmazonCloudFront/latest/DeveloperGuide/origin-shield.html
+# Distribution builder: several S3 / API Gateway / custom origins behind one edge, ordered behaviors with their own
+# cache policies (explicit TTLs, normalized cache keys, Brotli/gzip), Origin Shield and failover origin groups.
+import pulumi
+import pulumi_aws as aws
+from resources.components import Component
+from resources.lookups import get_region
+
+# AWS managed policies, Doc: https://docs.aws.amazon.com/AmazonCloudFront/latest/DeveloperGuide/using-managed-cache-policies.html
+CACHING_DISABLED_POLICY_ID = "4135ea2d-6df8-44a3-9df3-4b5a84be39ad"
+ALL_VIEWER_EXCEPT_HOST_HEADER_POLICY_ID = "b689b0a8-53d0-40ab-baf2-68738e2966ac"
+CORS_S3_ORIGIN_POLICY_ID = "88a5eaf4-2fd4-4709-b370-b4c650ea3fcf"
+SIMPLE_CORS_RESPONSE_POLICY_ID = "60669652-455b-4ae9-85a4-c4c02393f86c"
+
+MANAGED_ORIGIN_REQUEST_POLICIES = {
+    "all-viewer": ALL_VIEWER_EXCEPT_HOST_HEADER_POLICY_ID,
+    "cors-s3": CORS_S3_ORIGIN_POLICY_ID,
+}
+
+READ_METHODS = ["GET", "HEAD"]
+ALL_METHODS = ["GET", "HEAD", "OPTIONS", "PUT", "POST", "PATCH", "DELETE"]
+
+
+def normalize_items(items: list, lower: bool = False):
+    """Sorted, de-duplicated cache key items, so equivalent policies produce the same cache key."""
+    return sorted({item.lower() if lower else item for item in items or []})
+
+
+def key_config(behavior_name: str, items, lower: bool = False):
+    """Cache key / forwarding config: None -> none, "all" -> all, list -> whitelist."""
+    if items == "all":
+        return {f"{behavior_name}_behavior": "all"}
+    items = normalize_items(items, lower)
+    if not items:
+        return {f"{behavior_name}_behavior": "none"}
+    return {f"{behavior_name}_behavior": "whitelist", f"{behavior_name}s": {"items": items}}
+
+
+def cache_policy(name: str, default_ttl: int = 86400, min_ttl: int = 0, max_ttl: int = 31536000,
+                 headers: list = None, cookies=None, query_strings=None, compress: bool = True, opts: pulumi.ResourceOptions = None):
+    """Create a cache policy with explicit TTLs and a normalized cache key (headers are case-insensitive)."""
+    if not min_ttl <= default_ttl <= max_ttl:
+        raise ValueError(f"Cache policy {name}: TTLs must satisfy min_ttl <= default_ttl <= max_ttl")
+    if headers == "all":
+        raise ValueError(f"Cache policy {name}: headers cannot be 'all' in a cache key, list them")
+    return aws.cloudfront.CachePolicy(name,
+        name=name,
+        default_ttl=default_ttl,
+        min_ttl=min_ttl,
+        max_ttl=max_ttl,
+        parameters_in_cache_key_and_forwarded_to_origin={
+            "enable_accept_encoding_brotli": compress,
+            "enable_accept_encoding_gzip": compress,
+            "headers_config": key_config("header", headers, lower=True),
+            "cookies_config": key_config("cookie", cookies),
+            "query_strings_config": key_config("query_string", query_strings),
+        },
+        opts=opts)
+
+
+def origin_request_policy(name: str, headers=None, cookies=None, query_strings=None, opts: pulumi.ResourceOptions = None):
+    """Create an origin request policy: values forwarded to the origin without being part of the cache key."""
+    header_config = key_config("header", headers, lower=True)
+    if header_config["header_behavior"] == "all":
+        header_config["header_behavior"] = "allViewer"
+    return aws.cloudfront.OriginRequestPolicy(name,
+        name=name,
+        headers_config=header_config,
+        cookies_config=key_config("cookie", cookies),
+        query_strings_config=key_config("query_string", query_strings),
+        opts=opts)
+
+
+def api_domain_name(api):
+    """Domain name of an API Gateway: HTTP API (apigatewayv2) or REST API."""
+    if hasattr(api, "api_endpoint"):
+        return api.api_endpoint.apply(lambda endpoint: endpoint.replace("https://", "").rstrip("/"))
+    return pulumi.Output.concat(api.id, ".execute-api.", get_region(), ".amazonaws.com")
+
+
+def build_origin(name: str, origin: dict, oac):
+    """Distribution origin from an origin spec: {"id", "type": "s3"|"api"|"custom", ...}."""
+    origin_type = origin.get("type", "s3")
+    result = {"origin_id": origin["id"]}
+    if origin_type == "s3":
+        result["domain_name"] = origin["bucket"].bucket_regional_domain_name
+        result["origin_access_control_id"] = oac.id
+    elif origin_type in ("api", "custom"):
+        result["domain_name"] = api_domain_name(origin["api"]) if origin_type == "api" else origin["domain_name"]
+        result["custom_origin_config"] = {
+            "http_port": 80,
+            "https_port": 443,
+            "origin_protocol_policy": "https-only",
+            "origin_ssl_protocols": ["TLSv1.2"],
+        }
+    else:
+        raise ValueError(f"Unknown origin type: {origin_type}")
+    if origin.get("origin_path"):
+        result["origin_path"] = origin["origin_path"]
+    if origin.get("origin_shield_region"):
+        result["origin_shield"] = {"enabled": True, "origin_shield_region": origin["origin_shield_region"]}
+    return result
+
+
+def build_behavior(name: str, index: int, behavior: dict, policies: dict, child_opts=pulumi.ResourceOptions):
+    """Cache behavior from a behavior spec, creating its cache and origin request policies.
+    Behaviors with identical settings share the same policy through `policies`."""
+    cache = behavior.get("cache", {})
+    compress = behavior.get("compress", True)
+    if cache == "disabled":
+        cache_policy_id = CACHING_DISABLED_POLICY_ID
+    else:
+        key = ("cache", repr(sorted(cache.items())), compress)
+        if key not in policies:
+            policies[key] = cache_policy(f"{name}-cache-{index}", compress=compress, opts=child_opts(), **cache).id
+        cache_policy_id = policies[key]
+
+    origin_request = behavior.get("origin_request")
+    if isinstance(origin_request, str):
+        # Managed policy name or policy id
+        origin_request_policy_id = MANAGED_ORIGIN_REQUEST_POLICIES.get(origin_request, origin_request)
+    elif origin_request:
+        key = ("origin_request", repr(sorted(origin_request.items())))
+        if key not in policies:
+            policies[key] = origin_request_policy(f"{name}-origin-request-{index}", opts=child_opts(), **origin_request).id
+        origin_request_policy_id = policies[key]
+    else:
+        origin_request_policy_id = None
+
+    allowed_methods = behavior.get("allowed_methods", READ_METHODS)
+    result = {
+        "target_origin_id": behavior["origin"],
+        "allowed_methods": allowed_methods,
+        "cached_methods": READ_METHODS,
+        "viewer_protocol_policy": behavior.get("viewer_protocol_policy", "redirect-to-https"),
+        "cache_policy_id": cache_policy_id,
+        "origin_request_policy_id": origin_request_policy_id,
+        "response_headers_policy_id": behavior.get("response_headers_policy_id"),
+        "compress": compress,
+    }
+    if behavior.get("path_pattern"):
+        result["path_pattern"] = behavior["path_pattern"]
+    return result
+
+
+def build_distribution(name: str, origins: list, behaviors: list, origin_groups: list = None,
+                       default_root_object: str = None, price_class: str = "PriceClass_All",
+                       georistriction_locations: list = None, tags: dict = None, child_opts=pulumi.ResourceOptions):
+    """
+    Create the resources of a CloudFront distribution with several origins and ordered cache behaviors, returns the
+    aws.cloudfront.Distribution. Used by the CloudFrontDistribution and CloudFrontS3 components.
+
+    origins: list of dicts with:
+      - "id": Origin id referenced by behaviors and origin groups
+      - "type": "s3" (with "bucket"), "api" (with "api", an API Gateway) or "custom" (with "domain_name")
+      - "origin_path" (optional): e.g. "/staging" for a REST API stage
+      - "origin_shield_region" (optional): Enables Origin Shield in that region
+    behaviors: list of dicts, the one without "path_pattern" is the default behavior, the others are ordered as given:
+      - "origin": Origin or origin group id
+      - "path_pattern": e.g. "/api/*"
+      - "cache": {"default_ttl", "min_ttl", "max_ttl", "headers", "cookies", "query_strings"} or "disabled"
+      - "origin_request" (optional): {"headers", "cookies", "query_strings"} forwarded to the origin,
+        or a managed policy ("all-viewer", "cors-s3") / policy id
+      - "allowed_methods", "compress" (default True), "viewer_protocol_policy", "response_headers_policy_id"
+    origin_groups: list of {"id", "primary", "failover", "status_codes"} for origin failover (GET/HEAD only).
+    child_opts: returns the options of every resource created (e.g. Component.child_opts).
+    """
+    name = name.lower().replace("_", "-").replace(".", "-").replace("/", "-").strip()
+    validate_distribution(origins, behaviors, origin_groups)
+
+    # Origin Access Control shared by the S3 origins
+    oac = None
+    if any(origin.get("type", "s3") == "s3" for origin in origins):
+        oac = aws.cloudfront.OriginAccessControl(f"{name}",
+            name=f"{name}",
+            description="OAC for S3 origin",
+            origin_access_control_origin_type="s3",
+            signing_behavior="always",
+            signing_protocol="sigv4",
+            opts=child_opts()
+        )
+
+    default_behavior = next(behavior for behavior in behaviors if not behavior.get("path_pattern"))
+    ordered_behaviors = [behavior for behavior in behaviors if behavior.get("path_pattern")]
+    policies = {}
+
+    distribution = aws.cloudfront.Distribution(f"{name}",
+        enabled=True,
+        is_ipv6_enabled=True,
+        http_version="http2and3",
+        price_class=price_class,
+        default_root_object=default_root_object,
+        origins=[build_origin(name, origin, oac) for origin in origins],
+        origin_groups=[{
+            "origin_id": group["id"],
+            "failover_criteria": {"status_codes": group.get("status_codes", [500, 502, 503, 504])},
+            "members": [{"origin_id": group["primary"]}, {"origin_id": group["failover"]}],
+        } for group in origin_groups or []],
+        default_cache_behavior=build_behavior(name, 0, default_behavior, policies, child_opts),
+        ordered_cache_behaviors=[build_behavior(name, i, behavior, policies, child_opts) for i, behavior in enumerate(ordered_behaviors, start=1)],
+        restrictions={
+            "geo_restriction": {
+                "restriction_type": "whitelist" if georistriction_locations else "none",
+                "locations": georistriction_locations if georistriction_locations else [],
+            },
+        },
+        tags=tags if tags else {},
+        viewer_certificate={
+            "cloudfront_default_certificate": True,
+        },
+        opts=child_opts()
+    )
+    return distribution
+
+
+class CloudFrontDistribution(Component):
+    """Multi-origin CloudFront distribution, see cloudfront_distribution."""
+
+    def __init__(self, name: str, origins: list, behaviors: list, origin_groups: list = None, default_root_object: str = None,
+                 price_class: str = "PriceClass_All", georistriction_locations: list = None, tags: dict = None,
+                 opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:cloudfront:Distribution", name, opts)
+        distribution = build_distribution(name, origins, behaviors, origin_groups, default_root_object, price_class,
+                                          georistriction_locations, tags, child_opts=self.child_opts)
+
+        # Same outputs as the aws.cloudfront.Distribution returned before
+        self.distribution = distribution
+        self.id = distribution.id
+        self.arn = distribution.arn
+        self.domain_name = distribution.domain_name
+        self.hosted_zone_id = distribution.hosted_zone_id
+        self.finish({"distribution_id": distribution.id, "distribution_domain_name": distribution.domain_name})
+
+
+def cloudfront_distribution(name: str, origins: list, behaviors: list, origin_groups: list = None,
+                            default_root_object: str = None, price_class: str = "PriceClass_All",
+                            georistriction_locations: list = None, tags: dict = None, opts: pulumi.ResourceOptions = None):
+    """
+    Create a CloudFrontDistribution component with several origins and ordered cache behaviors (see build_distribution
+    for the origins, behaviors and origin_groups specs). Outputs (export_outputs): distribution_id, distribution_domain_name.
+    """
+    name = name.lower().replace("_", "-").replace(".", "-").replace("/", "-").strip()
+    return CloudFrontDistribution(name, origins, behaviors, origin_groups, default_root_object, price_class,
+                                  georistriction_locations, tags, opts)
+
+
+def validate_distribution(origins: list, behaviors: list, origin_groups: list = None):
+    origin_ids = [origin["id"] for origin in origins]
+    group_ids = [group["id"] for group in origin_groups or []]
+    if len(set(origin_ids + group_ids)) != len(origin_ids + group_ids):
+        raise ValueError("Origin and origin group ids must be unique")
+    for group in origin_groups or []:
+        for member in (group["primary"], group["failover"]):
+            if member not in origin_ids:
+                raise ValueError(f"Origin group {group['id']}: unknown origin {member}")
+    defaults = [behavior for behavior in behaviors if not behavior.get("path_pattern")]
+    if len(defaults) != 1:
+        raise ValueError("Exactly one behavior without path_pattern (the default behavior) is required")
+    for behavior in behaviors:
+        if behavior["origin"] not in origin_ids + group_ids:
+            raise ValueError(f"Behavior {behavior.get('path_pattern', 'default')}: unknown origin {behavior['origin']}")
+        if behavior["origin"] in group_ids and set(behavior.get("allowed_methods", READ_METHODS)) - {"GET", "HEAD", "OPTIONS"}:
+            raise ValueError(f"Behavior {behavior.get('path_pattern', 'default')}: origin groups only support GET, HEAD and OPTIONS")
@@ -0,0 +1,47 @@
+# Doc: Component resources - https://www.pulumi.com/docs/iac/concepts/resources/components/
+# Doc: Aliases             - https://www.pulumi.com/docs/iac/concepts/options/aliases/
+# Base class of the resource components (bucket, lambda_function_py, api_gateway_rest, cloudfront_s3): every child is
+# parented to the component and named after it, outputs are registered on the component instead of pulumi.export,
+# so a component can be used any number of times in one stack without URN or export collisions.
+import pulumi
+
+
+class Component(pulumi.ComponentResource):
+    def __init__(self, type_name: str, name: str, opts: pulumi.ResourceOptions = None):
+        super().__init__(type_name, name, None, opts)
+        self.component_name = name
+        self.outputs = {}
+
+    def child_opts(self, former_name: str = None, **kwargs):
+        """Options of a child resource. The alias keeps the state of the resources created at the top level of the
+        stack before the components existed, so existing stacks are not replaced. `former_name` is the name of the
+        top-level resource when the child got a new name."""
+        aliases = [pulumi.Alias(parent=pulumi.ROOT_STACK_RESOURCE)]
+        if former_name:
+            aliases.append(pulumi.Alias(name=former_name, parent=pulumi.ROOT_STACK_RESOURCE))
+        return pulumi.ResourceOptions(parent=self, aliases=aliases, **kwargs)
+
+    def finish(self, outputs: dict):
+        """Register the outputs of the component, read them with export_outputs or component.outputs."""
+        self.outputs = outputs
+        self.register_outputs(outputs)
+
+
+def export_outputs(component: Component, prefix: str = None):
+    """Export the outputs of a component as "<prefix>-<output>" (prefix: the component name)."""
+    prefix = prefix or component.component_name
+    for key, value in component.outputs.items():
+        pulumi.export(f"{prefix}-{key}", value)
+
+
+def replicate(component, names: list, args=None, **shared_args):
+    """Create the component once per name, returns {name: component}.
+    `args` are the per-instance arguments: {name: dict} or a function name -> dict; `shared_args` go to every instance.
+    e.g. replicate(bucket, [f"{project}-{tenant}" for tenant in tenants])"""
+    if len(set(names)) != len(names):
+        raise ValueError("replicate: the names must be unique")
+    instances = {}
+    for name in names:
+        instance_args = args(name) if callable(args) else (args or {}).get(name, {})
+        instances[name] = component(name=name, **{**shared_args, **instance_args})
+    return instances
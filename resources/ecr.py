@@ -2,18 +2,28 @@
 # Push Command: (Get-ECRLoginCommand -ProfileName PROFILENAME -Region REGION).Password | docker login --username AWS --password-stdin ACCOUNT.dkr.ecr.REGION.amazonaws.com
 import pulumi
 import pulumi_aws as aws
+from resources.components import Component
 
-def ecr(name:str, mutable:bool=True, scan_on_push:bool=False):
-    name = name.lower().strip()
-    try:
-        ecr = aws.ecr.Repository(f"{name}",
+class EcrRepository(Component):
+    """ECR repository, see ecr."""
+
+    def __init__(self, name: str, mutable: bool = True, scan_on_push: bool = False, opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:ecr:Repository", name, opts)
+        repository = aws.ecr.Repository(f"{name}",
             name=name,
             image_tag_mutability="MUTABLE" if mutable else "IMMUTABLE",
             image_scanning_configuration={
                 "scan_on_push": True if scan_on_push else False,
-            })
-        
-        pulumi.export("ecr_uri", ecr.repository_url.apply(lambda uri: f"{uri}:latest"))
-        return ecr
-    except Exception as e:
-        raise None
\ No newline at end of file
+            },
+            opts=self.child_opts())
+
+        # Same outputs as the aws.ecr.Repository returned before
+        self.repository = repository
+        self.arn = repository.arn
+        self.repository_url = repository.repository_url
+        self.finish({"ecr_uri": repository.repository_url.apply(lambda uri: f"{uri}:latest")})
+
+def ecr(name:str, mutable:bool=True, scan_on_push:bool=False, opts: pulumi.ResourceOptions = None):
+    """Create an EcrRepository component, outputs (export_outputs): ecr_uri."""
+    name = name.lower().strip()
+    return EcrRepository(name, mutable, scan_on_push, opts)
@@ -1,16 +1,44 @@
 # Doc: https://www.pulumi.com/registry/packages/aws/api-docs/scheduler/schedule
 # Doc: https://docs.aws.amazon.com/scheduler/latest/UserGuide/schedule-types.html
+# Doc: https://docs.aws.amazon.com/scheduler/latest/UserGuide/managing-schedule-flexible-time-windows.html
 import pulumi
 import pulumi_aws as aws
+from resources.components import Component
 
-def scheduler(name: str, schedule_expression, target: dict,start_date=None, group_name: str=None, flexible_time_window: dict="OFF"):
+def flexible_window(flexible_time_window):
+    """Scheduler flexible time window: "OFF", a number of minutes (1-1440) the invocation is spread over, or the raw dict."""
+    if isinstance(flexible_time_window, dict):
+        return flexible_time_window
+    if flexible_time_window in (None, "OFF", 0):
+        return {"mode": "OFF"}
+    if isinstance(flexible_time_window, int) and 1 <= flexible_time_window <= 1440:
+        return {"mode": "FLEXIBLE", "maximum_window_in_minutes": flexible_time_window}
+    raise ValueError(f"flexible_time_window must be 'OFF', a number of minutes between 1 and 1440 or a dict, got {flexible_time_window!r}")
+
+class Scheduler(Component):
+    """EventBridge Scheduler schedule, see scheduler."""
+
+    def __init__(self, name: str, schedule_expression, target: dict, start_date=None, group_name: str=None, flexible_time_window="OFF", opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:scheduler:Schedule", name, opts)
+        schedule = aws.scheduler.Schedule(f"{name}",
+            name=f"{name}",
+            group_name=group_name,
+            flexible_time_window=flexible_window(flexible_time_window),
+            schedule_expression=schedule_expression,
+            start_date=start_date,
+            target=target,
+            opts=self.child_opts())
+
+        # Same outputs as the aws.scheduler.Schedule returned before
+        self.schedule = schedule
+        self.arn = schedule.arn
+        self.finish({"schedule_arn": schedule.arn})
+
+def scheduler(name: str, schedule_expression, target: dict,start_date=None, group_name: str=None, flexible_time_window="OFF", opts: pulumi.ResourceOptions = None):
+    """
+    Create a Scheduler component (EventBridge Scheduler schedule), outputs (export_outputs): schedule_arn.
+    `target` is {"arn", "role_arn", ...}: a Lambda function, or the queue of an event_pipeline (pipeline.target) to
+    absorb bursts. `flexible_time_window` in minutes spreads the invocations (jitter) instead of firing them all at once.
+    """
     name = name.lower().strip()
-    schedule = aws.scheduler.Schedule(f"{name}",
-        name=f"{name}",
-        group_name=group_name,
-        flexible_time_window={
-            "mode": flexible_time_window,
-        },
-        schedule_expression=schedule_expression,
-        start_date=start_date,
-        target=target)
\ No newline at end of file
+    return Scheduler(name, schedule_expression, target, start_date, group_name, flexible_time_window, opts)
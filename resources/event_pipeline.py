@@ -0,0 +1,151 @@
+# Doc: https://www.pulumi.com/registry/packages/aws/api-docs/sqs/queue/
+# Doc: https://www.pulumi.com/registry/packages/aws/api-docs/lambda/eventsourcemapping/
+# Doc: https://docs.aws.amazon.com/lambda/latest/dg/services-sqs-scaling.html
+# Doc: https://docs.aws.amazon.com/lambda/latest/dg/services-sqs-errorhandling.html
+# SQS buffer between schedules / EventBridge rules and a Lambda function: bursts are queued instead of throttled,
+# the function reads batches with a bounded concurrency, and messages failing max_receive_count times go to a DLQ.
+import json
+import pulumi
+import pulumi_aws as aws
+from resources.components import Component
+
+# Lambda recommends a visibility timeout of at least 6 times the function timeout (default 3s)
+VISIBILITY_TIMEOUT_FACTOR = 6
+DEFAULT_FUNCTION_TIMEOUT = 3
+
+
+class EventPipeline(Component):
+    """Queue with its dead-letter queue, read by a Lambda function through an event source mapping.
+    `target` is the EventBridge Scheduler target ({"arn", "role_arn"}) sending to the queue."""
+
+    def __init__(self, name: str, function, batch_size: int = 10, batching_window: int = 0, maximum_concurrency: int = None,
+                 report_batch_item_failures: bool = True, max_receive_count: int = 5, visibility_timeout: int = None,
+                 message_retention_seconds: int = 345600, dlq_retention_seconds: int = 1209600, event_rule_arns: list = None,
+                 opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:sqs:EventPipeline", name, opts)
+        if not 1 <= batch_size <= 10000:
+            raise ValueError(f"batch_size must be between 1 and 10000, got {batch_size}")
+        if batch_size > 10 and batching_window < 1:
+            raise ValueError("batch_size above 10 requires a batching_window of at least 1 second")
+        if not 0 <= batching_window <= 300:
+            raise ValueError(f"batching_window must be between 0 and 300 seconds, got {batching_window}")
+        if maximum_concurrency is not None and not 2 <= maximum_concurrency <= 1000:
+            raise ValueError(f"maximum_concurrency must be between 2 and 1000, got {maximum_concurrency}")
+
+        # LambdaFunction component or aws.lambda_.Function
+        lambda_function = getattr(function, "function", function)
+        if visibility_timeout is None:
+            visibility_timeout = lambda_function.timeout.apply(
+                lambda timeout: VISIBILITY_TIMEOUT_FACTOR * (timeout or DEFAULT_FUNCTION_TIMEOUT) + batching_window)
+
+        dlq = aws.sqs.Queue(f"{name}-dlq",
+            name=f"{name}-dlq",
+            message_retention_seconds=dlq_retention_seconds,
+            opts=self.child_opts())
+
+        queue = aws.sqs.Queue(f"{name}",
+            name=f"{name}",
+            visibility_timeout_seconds=visibility_timeout,
+            message_retention_seconds=message_retention_seconds,
+            redrive_policy=dlq.arn.apply(lambda arn: json.dumps({"deadLetterTargetArn": arn, "maxReceiveCount": max_receive_count})),
+            opts=self.child_opts())
+
+        # Only this queue can send its failed messages to the DLQ
+        aws.sqs.RedriveAllowPolicy(f"{name}-dlq",
+            queue_url=dlq.id,
+            redrive_allow_policy=queue.arn.apply(lambda arn: json.dumps({"redrivePermission": "byQueue", "sourceQueueArns": [arn]})),
+            opts=self.child_opts())
+
+        # Function permissions to read the queue (default role of lambda_function_py, or an aws.iam.Role)
+        depends_on = []
+        role = getattr(function, "role", None)
+        if isinstance(role, aws.iam.Role):
+            depends_on.append(aws.iam.RolePolicy(f"{name}-consumer",
+                role=role.id,
+                policy=pulumi.Output.json_dumps({
+                    "Version": "2012-10-17",
+                    "Statement": [{
+                        "Effect": "Allow",
+                        "Action": ["sqs:ReceiveMessage", "sqs:DeleteMessage", "sqs:GetQueueAttributes", "sqs:ChangeMessageVisibility"],
+                        "Resource": queue.arn,
+                    }]
+                }),
+                opts=self.child_opts()))
+        else:
+            pulumi.log.warn(f"{name}: the role of the function is not managed here, it must allow sqs:ReceiveMessage, "
+                            f"sqs:DeleteMessage and sqs:GetQueueAttributes on the queue")
+
+        # Role of the EventBridge Scheduler schedules sending to the queue
+        scheduler_role = aws.iam.Role(f"{name}-scheduler",
+            assume_role_policy=json.dumps({
+                "Version": "2012-10-17",
+                "Statement": [{
+                    "Action": "sts:AssumeRole",
+                    "Effect": "Allow",
+                    "Principal": {"Service": "scheduler.amazonaws.com"},
+                }]
+            }),
+            opts=self.child_opts())
+        aws.iam.RolePolicy(f"{name}-scheduler",
+            role=scheduler_role.id,
+            policy=pulumi.Output.json_dumps({
+                "Version": "2012-10-17",
+                "Statement": [{"Effect": "Allow", "Action": "sqs:SendMessage", "Resource": queue.arn}]
+            }),
+            opts=self.child_opts())
+
+        # EventBridge rules sending to the queue
+        if event_rule_arns:
+            aws.sqs.QueuePolicy(f"{name}",
+                queue_url=queue.id,
+                policy=pulumi.Output.json_dumps({
+                    "Version": "2012-10-17",
+                    "Statement": [{
+                        "Effect": "Allow",
+                        "Principal": {"Service": "events.amazonaws.com"},
+                        "Action": "sqs:SendMessage",
+                        "Resource": queue.arn,
+                        "Condition": {"ArnEquals": {"aws:SourceArn": event_rule_arns}},
+                    }]
+                }),
+                opts=self.child_opts())
+
+        mapping = aws.lambda_.EventSourceMapping(f"{name}",
+            event_source_arn=queue.arn,
+            # The alias ARN when the function has one (provisioned concurrency)
+            function_name=function.arn,
+            batch_size=batch_size,
+            maximum_batching_window_in_seconds=batching_window or None,
+            function_response_types=["ReportBatchItemFailures"] if report_batch_item_failures else None,
+            scaling_config={"maximum_concurrency": maximum_concurrency} if maximum_concurrency else None,
+            opts=self.child_opts(depends_on=depends_on))
+
+        self.queue = queue
+        self.dlq = dlq
+        self.mapping = mapping
+        self.scheduler_role = scheduler_role
+        self.arn = queue.arn
+        self.url = queue.url
+        self.target = {"arn": queue.arn, "role_arn": scheduler_role.arn}
+        self.finish({"queue_url": queue.url, "queue_arn": queue.arn, "dlq_arn": dlq.arn})
+
+
+def event_pipeline(name: str, function, batch_size: int = 10, batching_window: int = 0, maximum_concurrency: int = None,
+                   report_batch_item_failures: bool = True, max_receive_count: int = 5, visibility_timeout: int = None,
+                   message_retention_seconds: int = 345600, dlq_retention_seconds: int = 1209600, event_rule_arns: list = None,
+                   opts: pulumi.ResourceOptions = None):
+    """
+    Create an SQS queue (with a dead-letter queue) consumed by `function` (lambda_function_py component or aws Function).
+    - batch_size / batching_window: messages per invocation and seconds to wait for a full batch (required above 10 messages)
+    - maximum_concurrency: maximum concurrent invocations from this queue (2-1000), keeps the rest of the account capacity free
+    - report_batch_item_failures: the handler returns {"batchItemFailures": [{"itemIdentifier": message_id}]} so only the
+      failed messages are retried
+    - max_receive_count: receives before a message is moved to the DLQ
+    - visibility_timeout: default 6 x the function timeout + batching_window
+    - event_rule_arns: EventBridge rules allowed to send to the queue
+    Send schedules to it with scheduler(..., target=pipeline.target, flexible_time_window=15).
+    Outputs (export_outputs): queue_url, queue_arn, dlq_arn.
+    """
+    return EventPipeline(name, function, batch_size, batching_window, maximum_concurrency, report_batch_item_failures,
+                         max_receive_count, visibility_timeout, message_retention_seconds, dlq_retention_seconds,
+                         event_rule_arns, opts)
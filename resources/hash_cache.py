@@ -0,0 +1,78 @@
+# Persistent file hash cache shared by the resources that upload local files (Lambda packages, S3 objects).
+# Hashes are kept in a JSON manifest keyed on the file path and reused while (size, mtime) is unchanged,
+# stale files are hashed in a thread pool (hashlib releases the GIL while hashing).
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import tempfile
+
+# Local files and directories read by the program during this run, checked by pulumi_config/change_detection.py
+# to skip the next run when none of them changed
+referenced_files = set()
+referenced_directories = set()
+
+
+def reference(files=(), directories=()):
+    """Record local inputs of the program."""
+    referenced_files.update(os.path.abspath(path) for path in files)
+    referenced_directories.update(os.path.abspath(path) for path in directories)
+
+
+def load_manifest(path: str):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: dict, path: str):
+    write_atomic(path, json.dumps(manifest, sort_keys=True).encode())
+
+
+def write_atomic(path: str, data: bytes):
+    """Write through a temporary file so parallel runs never read a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def is_cached(path: str, manifest: dict, stat=None):
+    stat = stat or os.stat(path)
+    entry = manifest.get(path)
+    return bool(entry) and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns
+
+
+def compute_entry(path: str, algorithm: str = "sha256"):
+    """Hash the file and return its manifest entry."""
+    stat = os.stat(path)
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+def file_hash(path: str, manifest: dict, algorithm: str = "sha256"):
+    """Return the hash of the file, reading it only if its size or mtime changed since the last run."""
+    if not is_cached(path, manifest):
+        manifest[path] = compute_entry(path, algorithm)
+    return manifest[path]["hash"]
+
+
+def hash_files(paths: list, manifest_path: str, algorithm: str = "sha256", max_workers: int = None, record: bool = True):
+    """Return {path: hash} for all paths, hashing only the stale files in a thread pool.
+    The manifest is saved only when a file was hashed again. `record` adds the paths to the program inputs."""
+    if record:
+        reference(files=paths)
+    manifest = load_manifest(manifest_path)
+    stale = [path for path in paths if not is_cached(path, manifest)]
+    if stale:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for path, entry in zip(stale, executor.map(compute_entry, stale, [algorithm] * len(stale))):
+                manifest[path] = entry
+        save_manifest(manifest, manifest_path)
+    return {path: manifest[path]["hash"] for path in paths}
@@ -1,46 +1,171 @@
+# Doc: https://www.pulumi.com/registry/packages/aws/api-docs/apigatewayv2/api/
+# Doc: https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-jwt-authorizer.html
+import json
 import pulumi
 import pulumi_aws as aws
+from resources.components import Component
+from resources.rest_api_gateway import normalize_path, validate_throttling
 
-def api_gateway_http(name: str, lambda_function: str, methods: list, paths: list):
-    name = name.lower().strip()
-    
-    # Create HTTP API
-    api = aws.apigatewayv2.Api(f"{name}-api",
-        name=name,
-        protocol_type="HTTP",
-        description=f"HTTP API Gateway for {name}")
-    
-    # Create Lambda permission
-    lambda_permission = aws.lambda_.Permission(f"{name}-api-permission",
-        action="lambda:InvokeFunction",
-        function=lambda_function.id,
-        principal="apigateway.amazonaws.com",
-        source_arn=api.execution_arn.apply(lambda arn: f"{arn}/*/*/*"))
-    
-    # Create integration
-    integration = aws.apigatewayv2.Integration(f"{name}-integration",
-        api_id=api.id,
-        integration_type="AWS_PROXY",
-        integration_uri=lambda_function.invoke_arn,
-        payload_format_version="2.0")
-    
-    # Create routes and collect references
-    routes = []
-    for method in methods:
-        for path in paths:
-            route = aws.apigatewayv2.Route(f"{method}-{path.replace('/', '-')}",
+# Access log fields, Doc: https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-logging-variables.html
+ACCESS_LOG_FORMAT = json.dumps({
+    "requestId": "$context.requestId",
+    "ip": "$context.identity.sourceIp",
+    "requestTime": "$context.requestTime",
+    "routeKey": "$context.routeKey",
+    "status": "$context.status",
+    "responseLength": "$context.responseLength",
+    "integrationLatency": "$context.integrationLatency",
+    "latency": "$context.responseLatency",
+})
+
+class HttpApiGateway(Component):
+    """HTTP API Gateway (apigatewayv2) routing the endpoints to Lambda functions, see api_gateway_http."""
+
+    def __init__(self, name: str, endpoints: list, stage: str = "$default", throttling: dict = None, access_logs: bool = False,
+                 log_retention_days: int = 14, jwt_authorizer: dict = None, cors: dict = None, opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:apigatewayv2:HttpApi", name, opts)
+        validate_endpoints(endpoints, jwt_authorizer, throttling)
+
+        # Create HTTP API
+        api = aws.apigatewayv2.Api(f"{name}-api",
+            name=name,
+            protocol_type="HTTP",
+            description=f"HTTP API Gateway for {name}",
+            cors_configuration=cors,
+            opts=self.child_opts())
+
+        # JWT authorizer shared by the protected routes
+        authorizer = None
+        if jwt_authorizer:
+            authorizer = aws.apigatewayv2.Authorizer(f"{name}-jwt-authorizer",
                 api_id=api.id,
-                route_key=f"{method} {path}",
-                target=integration.id.apply(lambda id: f"integrations/{id}"))
-            routes.append(route)
-    
-    # Create stage with explicit dependency on routes
-    stage = aws.apigatewayv2.Stage(f"{name}-stage",
-        api_id=api.id,
-        name="$default",
-        auto_deploy=True,
-        opts=pulumi.ResourceOptions(depends_on=routes))  # Critical dependency
-    
-    # Export outputs
-    pulumi.export(f"{name}-api_endpoint", api.api_endpoint)
-    return api
\ No newline at end of file
+                name=f"{name}-jwt",
+                authorizer_type="JWT",
+                identity_sources=jwt_authorizer.get("identity_sources", ["$request.header.Authorization"]),
+                jwt_configuration={
+                    "issuer": jwt_authorizer["issuer"],
+                    "audiences": jwt_authorizer["audiences"],
+                },
+                opts=self.child_opts())
+
+        # One integration and one Lambda permission per function, shared by all its routes. They are named after the
+        # function so adding, removing or reordering endpoints does not move them to another function. The first
+        # function keeps the state of the single "<name>-api-permission" / "<name>-integration" of the former
+        # (lambda_function, methods, paths) form, the routes keep their former "<method>-<path with dashes>" names.
+        integrations = {}
+        routes = []
+        route_settings = []
+        for ep in endpoints:
+            lambda_function = ep["function"]
+            if id(lambda_function) not in integrations:
+                first = not integrations
+                function_name = lambda_function.pulumi_resource_name
+                aws.lambda_.Permission(f"{name}-api-permission-{function_name}",
+                    action="lambda:InvokeFunction",
+                    function=lambda_function.id,
+                    principal="apigateway.amazonaws.com",
+                    source_arn=pulumi.Output.concat(api.execution_arn, "/*"),
+                    opts=self.child_opts(former_name=f"{name}-api-permission" if first else None))
+
+                integrations[id(lambda_function)] = aws.apigatewayv2.Integration(f"{name}-integration-{function_name}",
+                    api_id=api.id,
+                    integration_type="AWS_PROXY",
+                    integration_uri=lambda_function.invoke_arn,
+                    payload_format_version="2.0",
+                    opts=self.child_opts(former_name=f"{name}-integration" if first else None))
+            integration = integrations[id(lambda_function)]
+
+            method = ep["method"].upper()
+            path = normalize_path(ep["path"])
+            route_key = f"{method} {path}"
+            routes.append(aws.apigatewayv2.Route(f"{name}-route-{method}{path}",
+                api_id=api.id,
+                route_key=route_key,
+                target=integration.id.apply(lambda id: f"integrations/{id}"),
+                authorization_type="JWT" if ep.get("authorize") else None,
+                authorizer_id=authorizer.id if ep.get("authorize") else None,
+                authorization_scopes=ep.get("scopes") if ep.get("authorize") else None,
+                opts=self.child_opts(former_name=f"{ep['method']}-{ep['path'].replace('/', '-')}")))
+
+            if ep.get("throttling"):
+                route_settings.append({"route_key": route_key, **throttling_settings(ep["throttling"])})
+
+        # Access logs
+        access_log_settings = None
+        if access_logs:
+            log_group = aws.cloudwatch.LogGroup(f"{name}-access-logs",
+                name=f"/aws/apigateway/{name}",
+                retention_in_days=log_retention_days,
+                opts=self.child_opts())
+            access_log_settings = {"destination_arn": log_group.arn, "format": ACCESS_LOG_FORMAT}
+
+        # Create stage with explicit dependency on routes
+        api_stage = aws.apigatewayv2.Stage(f"{name}-stage",
+            api_id=api.id,
+            name=stage,
+            auto_deploy=True,
+            default_route_settings=throttling_settings(throttling) if throttling else None,
+            route_settings=route_settings or None,
+            access_log_settings=access_log_settings,
+            opts=self.child_opts(depends_on=routes))  # Critical dependency
+
+        # Same outputs as the aws.apigatewayv2.Api returned before
+        self.api = api
+        self.stage = api_stage
+        self.id = api.id
+        self.execution_arn = api.execution_arn
+        self.api_endpoint = api.api_endpoint
+        self.finish({"api_endpoint": api.api_endpoint})
+
+
+def api_gateway_http(name: str, endpoints: list = None, lambda_function=None, methods: list = None, paths: list = None,
+                     stage: str = "$default", throttling: dict = None, access_logs: bool = False, log_retention_days: int = 14,
+                     jwt_authorizer: dict = None, cors: dict = None, opts: pulumi.ResourceOptions = None):
+    """
+    Create an HTTP API Gateway (apigatewayv2) routing to one or more Lambda functions.
+
+    Each endpoint in the endpoints list should be a dict with:
+      - "method": The HTTP method (e.g., "GET", "POST", "ANY")
+      - "path": The route path (e.g., "/media/{id}")
+      - "function": The corresponding Lambda function (lambda_function_py component or aws.lambda_.Function)
+      - "authorize" (optional): True to protect the route with the JWT authorizer
+      - "scopes" (optional): OAuth scopes required by the JWT authorizer
+      - "throttling" (optional): {"burst_limit": int, "rate_limit": float} for this route
+    The former form (lambda_function, methods, paths) is still accepted and routes every method x path to one function.
+
+    Stage options:
+      - throttling: Default {"burst_limit", "rate_limit"} of all routes
+      - access_logs: Write JSON access logs to a CloudWatch log group
+      - jwt_authorizer: {"issuer": str, "audiences": list, "identity_sources": list (optional)}
+      - cors: aws.apigatewayv2.Api cors_configuration
+
+    Returns an HttpApiGateway component (id, execution_arn, api_endpoint), outputs (export_outputs): api_endpoint.
+    """
+    name = name.lower().strip()
+    if endpoints is None:
+        endpoints = [{"method": method, "path": path, "function": lambda_function} for method in methods or [] for path in paths or []]
+    return HttpApiGateway(name, endpoints, stage, throttling, access_logs, log_retention_days, jwt_authorizer, cors, opts)
+
+def throttling_settings(throttling: dict):
+    return {
+        "throttling_burst_limit": throttling.get("burst_limit"),
+        "throttling_rate_limit": throttling.get("rate_limit"),
+    }
+
+def validate_endpoints(endpoints: list, jwt_authorizer: dict = None, throttling: dict = None):
+    """Raise ValueError on duplicate routes (after path normalization), invalid throttling settings or routes
+    protected without an authorizer."""
+    if throttling:
+        validate_throttling(throttling, "stage")
+    route_keys = set()
+    for ep in endpoints:
+        route_key = f"{ep['method'].upper()} {normalize_path(ep['path'])}"
+        if route_key in route_keys:
+            raise ValueError(f"Duplicate route: {route_key}")
+        route_keys.add(route_key)
+        if ep.get("throttling"):
+            validate_throttling(ep["throttling"], route_key)
+        if ep.get("authorize") and not jwt_authorizer:
+            raise ValueError(f"{route_key}: authorize requires a jwt_authorizer")
+    if jwt_authorizer and not (jwt_authorizer.get("issuer") and jwt_authorizer.get("audiences")):
+        raise ValueError("jwt_authorizer requires an issuer and audiences")
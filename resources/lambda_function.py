@@ -1,82 +1,70 @@
 # Doc: https://www.pulumi.com/registry/packages/aws/api-docs/lambda/function/
 # Invoke in CLI: aws lambda invoke --function-name NAME --payload '{}' --profile PROFILENAME --region REGIOM response.json
-from pathlib import Path
 import pulumi
 import pulumi_aws as aws
 import os
+from resources.components import Component
+from resources.hash_cache import reference
+from resources.lambda_layer import shared_layer
+from resources.lambda_package import package_archive
+from resources.lambda_performance import function_args, needs_alias, performance_alias, resolve_profile
 
-def lambda_function_py(name: str, runtime: str, handler: str = None, codebase: list = None, env = None, layers: list = None, role = None):
-    # Handle codebase archive creation
-    if codebase is None:
-        # Default codebase if none provided
-        codebase_archive = pulumi.FileArchive("./data/lambda_code.zip")
-    
-    elif any(code[:12].isdigit() for code in codebase):
-        codebase_archive = codebase[0]
-    else:
-        codebase_list = {}
-        for i, path in enumerate(codebase, start=1):
-            # Check if the path ends with a wildcard (*)
-            has_wildcard = path.endswith("*")
-            # Remove the wildcard if present
-            clean_path = path.rstrip("*").rstrip("/")  # Strip trailing "*" and "/"
-            
-            # Resolve the cleaned path to an absolute path
-            codebase_path = Path(clean_path).resolve()
-            
-            if codebase_path.is_dir():
-                # Include the base folder itself unless the path ends with "*"
-                base_folder_name = "" if has_wildcard else codebase_path.name
-                
-                for file in codebase_path.rglob("*"):  # Recursively find all files
-                    if file.is_file():
-                        # Compute the relative path from the base directory
-                        relative_path = file.relative_to(codebase_path).as_posix()
-                        # Prepend the base folder name if not using a wildcard
-                        relative_file_path = f"{base_folder_name}/{relative_path}" if base_folder_name else relative_path
-                        codebase_list[relative_file_path] = pulumi.FileAsset(str(file))
-            elif codebase_path.is_file():
-                # For individual files, use their relative path from the base directory
-                relative_file_path = codebase_path.name
-                codebase_list[relative_file_path] = pulumi.FileAsset(str(codebase_path))
-            else:
-                print(f"Warning: {codebase_path} does not exist and will be skipped.")
-        codebase_archive = pulumi.AssetArchive(codebase_list)
+class LambdaFunction(Component):
+    """Lambda function with its default role, layers and performance alias.
+    `arn`, `invoke_arn` and `id` are the ones of the alias when there is one, else of the function.
+    `role` is the default role (None when a role ARN is given)."""
+
+    def __init__(self, name: str, runtime: str, handler: str = None, codebase: list = None, env = None, layers: list = None, role = None,
+                 profile = None, memory_size: int = None, timeout: int = None, architectures: list = None, ephemeral_storage: int = None,
+                 reserved_concurrent_executions: int = None, snap_start: bool = None, provisioned_concurrency: int = None, autoscaling: dict = None,
+                 opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:lambda:Function", name, opts)
+        settings = resolve_profile(profile, memory_size=memory_size, timeout=timeout, architectures=architectures,
+                                   ephemeral_storage=ephemeral_storage, reserved_concurrent_executions=reserved_concurrent_executions,
+                                   snap_start=snap_start, provisioned_concurrency=provisioned_concurrency, autoscaling=autoscaling)
 
-    # Handle environment variables
-    env_vars = {}
-    if env is not None and isinstance(env, dict):
-        env_vars = env
-    elif env is not None and isinstance(env, str):
-        env_path = env if env.startswith(".") else f"./{env}"
-        if os.path.isfile(env_path):
-            with open(env_path) as file:
-                for line in file:
-                    key, value = line.strip().split("=", 1)
-                    env_vars[key] = value
+        # Handle codebase archive creation
+        if codebase is None:
+            # Default codebase if none provided
+            codebase_archive = pulumi.FileArchive("./data/lambda_code.zip")
+            reference(files=["./data/lambda_code.zip"])
+    
+        elif any(code[:12].isdigit() for code in codebase):
+            codebase_archive = codebase[0]
         else:
-            print(f"No environment file found at {env_path}")
+            # Deterministic zip built from the content hash of the codebase, reused from the local cache when unchanged
+            codebase_archive = package_archive(codebase)
 
-    # Handle layers
-    layers_list = []
-    if layers is not None:
-        for i, layer in enumerate(layers, start=1):
-            if layer.startswith("arn:"):
-                layers_list.append(layer)
+        # Handle environment variables
+        env_vars = {}
+        if env is not None and isinstance(env, dict):
+            env_vars = env
+        elif env is not None and isinstance(env, str):
+            env_path = env if env.startswith(".") else f"./{env}"
+            # Part of the inputs even when missing: creating the file changes the fingerprint
+            reference(files=[env_path])
+            if os.path.isfile(env_path):
+                with open(env_path) as file:
+                    for line in file:
+                        key, value = line.strip().split("=", 1)
+                        env_vars[key] = value
             else:
-                layer_path = layer if layer.startswith(".") else f"./{layer}"
-                layer_archive = aws.lambda_.LayerVersion(
-                    f"layer_{name}_{i}",
-                    layer_name=f"layer_{name}_{i}",
-                    code=pulumi.FileArchive(layer_path),
-                    compatible_runtimes=[runtime]
-                )
-                layers_list.append(layer_archive.arn)
+                print(f"No environment file found at {env_path}")
+
+        # Handle layers: local layers are shared by content hash with the other functions of the stack (see lambda_layer.py)
+        layers_list = []
+        if layers is not None:
+            for layer in layers:
+                if layer.startswith("arn:"):
+                    layers_list.append(layer)
+                else:
+                    layers_list.append(shared_layer(layer, runtime).arn)
 
-    # Create default role if not provided
-    if role is None:
-        lambda_role = aws.iam.Role(f"{name}-lambdaRole",
-            assume_role_policy="""{
+        # Create default role if not provided
+        self.role = None
+        if role is None:
+            lambda_role = aws.iam.Role(f"{name}-lambdaRole",
+                assume_role_policy="""{
                 "Version": "2012-10-17",
                 "Statement": [{
                     "Action": "sts:AssumeRole",
@@ -84,11 +72,12 @@ def lambda_function_py(name: str, runtime: str, handler: str = None, codebase: l
                     "Effect": "Allow",
                     "Sid": ""
                 }]
-            }"""
-        )
-        aws.iam.RolePolicy(f"{name}-lambdaRolePolicy",
-            role=lambda_role.id,
-            policy="""{
+            }""",
+                opts=self.child_opts()
+            )
+            aws.iam.RolePolicy(f"{name}-lambdaRolePolicy",
+                role=lambda_role.id,
+                policy="""{
                 "Version": "2012-10-17",
                 "Statement": [
                     {
@@ -110,22 +99,53 @@ def lambda_function_py(name: str, runtime: str, handler: str = None, codebase: l
                     "Resource": "*"
                     }
                 ]
-            }"""
+            }""",
+                opts=self.child_opts()
+            )
+            self.role = lambda_role
+            role = lambda_role.arn
+
+        # Create Lambda function
+        lambda_function = aws.lambda_.Function(name,
+            name=name,
+            role=role,
+            handler = handler or "lambda.handler" if not isinstance(codebase_archive, str) else None,
+            runtime=runtime if not isinstance(codebase_archive, str) else None,
+            layers=layers_list if not isinstance(codebase_archive, str) else None,
+            code = codebase_archive if not isinstance(codebase_archive, str) else None,
+            image_uri = codebase_archive if isinstance(codebase_archive, str) and codebase_archive[:12].isdigit() else None,
+            environment={"variables": env_vars} if env_vars else None,
+            package_type="Image" if isinstance(codebase_archive, str) and codebase_archive[:12].isdigit() else "Zip",
+            **function_args(settings),
+            opts=self.child_opts()
         )
-        role = lambda_role.arn
 
-    # Create Lambda function
-    lambda_function = aws.lambda_.Function(name,
-        name=name,
-        role=role,
-        handler = handler or "lambda.handler" if not isinstance(codebase_archive, str) else None,
-        runtime=runtime if not isinstance(codebase_archive, str) else None,
-        layers=layers_list if not isinstance(codebase_archive, str) else None,
-        code = codebase_archive if not isinstance(codebase_archive, str) else None,
-        image_uri = codebase_archive if isinstance(codebase_archive, str) and codebase_archive[:12].isdigit() else None,
-        environment={"variables": env_vars} if env_vars else None,
-        package_type="Image" if isinstance(codebase_archive, str) and codebase_archive[:12].isdigit() else "Zip"
-    )
-    pulumi.export(f"{name}-function_name", lambda_function.name)
-    pulumi.export(f"{name}-function_arn", lambda_function.arn)
-    return lambda_function
\ No newline at end of file
+        # Published version behind an alias with provisioned concurrency / auto scaling
+        alias = performance_alias(name, lambda_function, settings, self.child_opts) if needs_alias(settings) else None
+        target = alias or lambda_function
+
+        self.function = lambda_function
+        self.alias = alias
+        self.function_name = lambda_function.name
+        self.id = target.id
+        self.arn = target.arn
+        self.invoke_arn = target.invoke_arn
+        outputs = {"function_name": lambda_function.name, "function_arn": lambda_function.arn}
+        if alias:
+            outputs["alias_arn"] = alias.arn
+        self.finish(outputs)
+
+
+def lambda_function_py(name: str, runtime: str, handler: str = None, codebase: list = None, env = None, layers: list = None, role = None,
+                       profile = None, memory_size: int = None, timeout: int = None, architectures: list = None, ephemeral_storage: int = None,
+                       reserved_concurrent_executions: int = None, snap_start: bool = None, provisioned_concurrency: int = None, autoscaling: dict = None,
+                       opts: pulumi.ResourceOptions = None):
+    """
+    Create a Lambda function component.
+    `profile` is a performance preset from resources/lambda_performance.PROFILES ("latency-critical", "batch") or a dict
+    of settings; the explicit arguments override it. When provisioned concurrency, auto scaling or SnapStart are used the
+    function is published behind the "live" alias, and the component arn/invoke_arn are the ones of the alias.
+    Outputs (export_outputs): function_name, function_arn and alias_arn.
+    """
+    return LambdaFunction(name, runtime, handler, codebase, env, layers, role, profile, memory_size, timeout, architectures,
+                          ephemeral_storage, reserved_concurrent_executions, snap_start, provisioned_concurrency, autoscaling, opts)
\ No newline at end of file
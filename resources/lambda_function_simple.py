@@ -1,11 +1,9 @@
 import pulumi
 import pulumi_aws as aws
+from resources.components import Component
+from resources.hash_cache import reference
 
-def lambda_function_py(name):
-    # Create an IAM role for the Lambda functions
-    name = name.lower().strip()
-    lambda_role = aws.iam.Role(f"{name}-lambdaRole",
-        assume_role_policy="""{
+ASSUME_ROLE_POLICY = """{
             "Version": "2012-10-17",
             "Statement": [
                 {
@@ -17,12 +15,9 @@ def lambda_function_py(name):
                     "Sid": ""
                 }
             ]
-        }""")
+        }"""
 
-    # Attach a policy to the role
-    lambda_role_policy = aws.iam.RolePolicy(f"{name}-lambdaRolePolicy",
-        role=lambda_role.id,
-        policy="""{
+ROLE_POLICY = """{
             "Version": "2012-10-17",
             "Statement": [
                 {
@@ -32,20 +27,49 @@ def lambda_function_py(name):
                 },
                 {
                     "Effect": "Allow",
-                    "Action": ["s3:PutObject","s3:GetObject"]
+                    "Action": ["s3:PutObject","s3:GetObject"],
                     "Resource": "*"
                 }
             ]
-        }""")
-
-    lambda_function = aws.lambda_.Function(name,
-        name=name,
-        role=lambda_role.arn,
-        handler="lambda_code.handler",
-        runtime="python3.8",
-        code=pulumi.FileArchive("./data/lambda_code.zip")
-    )
-    pulumi.export(f"{name}-function_name", lambda_function.name)
-    pulumi.export(f"{name}-function_arn", lambda_function.arn)
-    return lambda_function
+        }"""
+
+class LambdaFunctionSimple(Component):
+    """Lambda function of ./data/lambda_code.zip with its role, see lambda_function_py."""
+
+    def __init__(self, name: str, opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:lambda:SimpleFunction", name, opts)
+
+        # Create an IAM role for the Lambda functions
+        lambda_role = aws.iam.Role(f"{name}-lambdaRole",
+            assume_role_policy=ASSUME_ROLE_POLICY,
+            opts=self.child_opts())
 
+        # Attach a policy to the role
+        aws.iam.RolePolicy(f"{name}-lambdaRolePolicy",
+            role=lambda_role.id,
+            policy=ROLE_POLICY,
+            opts=self.child_opts())
+
+        reference(files=["./data/lambda_code.zip"])
+        lambda_function = aws.lambda_.Function(name,
+            name=name,
+            role=lambda_role.arn,
+            handler="lambda_code.handler",
+            runtime="python3.8",
+            code=pulumi.FileArchive("./data/lambda_code.zip"),
+            opts=self.child_opts())
+
+        # Same outputs as the aws.lambda_.Function returned before
+        self.function = lambda_function
+        self.role = lambda_role
+        self.id = lambda_function.id
+        self.name = lambda_function.name
+        self.arn = lambda_function.arn
+        self.invoke_arn = lambda_function.invoke_arn
+        self.timeout = lambda_function.timeout
+        self.finish({"function_name": lambda_function.name, "function_arn": lambda_function.arn})
+
+def lambda_function_py(name, opts: pulumi.ResourceOptions = None):
+    """Create a LambdaFunctionSimple component, outputs (export_outputs): function_name, function_arn."""
+    name = name.lower().strip()
+    return LambdaFunctionSimple(name, opts)
@@ -0,0 +1,49 @@
+# Doc: https://www.pulumi.com/registry/packages/aws/api-docs/lambda/layerversion/
+# Content addressed Lambda layers shared by the functions of a stack: a layer directory (or zip) is hashed with the
+# lambda_package cache, and every function using the same content (and runtime) gets the ARN of one LayerVersion,
+# zipped and uploaded once. A new version is published only when the content hash changes (the resource name holds it).
+import os
+import weakref
+import pulumi
+import pulumi_aws as aws
+from resources.hash_cache import hash_files
+from resources.lambda_package import PACKAGE_DIR, build_package
+
+# {root stack resource: {(content hash, runtime): LayerVersion}}, one registry per program run
+_layers = weakref.WeakKeyDictionary()
+# Programs run without a root stack resource (unit tests under mocks)
+_unrooted_layers = {}
+
+
+def layer_package(layer: str, package_dir: str = PACKAGE_DIR):
+    """Return (archive, content_hash) of a layer directory (zipped from its content) or zip file."""
+    if os.path.isdir(layer):
+        zip_path, content_hash = build_package([os.path.join(layer, "*")], package_dir)
+        return pulumi.FileArchive(zip_path), content_hash
+    if not os.path.isfile(layer):
+        raise FileNotFoundError(f"Lambda layer {layer} does not exist")
+    content_hash = hash_files([layer], os.path.join(package_dir, "manifest.json"))[layer]
+    return pulumi.FileArchive(layer), content_hash
+
+
+def _registry():
+    root = pulumi.runtime.get_root_resource()
+    return _unrooted_layers if root is None else _layers.setdefault(root, {})
+
+
+def shared_layer(layer: str, runtime: str, layer_name: str = None):
+    """Return the LayerVersion of the layer content for the runtime, created on the first call of the program run.
+    `layer_name` (default: "<stack>-<directory or file name>") groups the published versions."""
+    archive, content_hash = layer_package(layer)
+    layers = _registry()
+    key = (content_hash, runtime)
+    if key not in layers:
+        label = os.path.splitext(os.path.basename(os.path.normpath(layer)))[0]
+        layer_name = layer_name or f"{pulumi.get_stack()}-{label}"
+        layers[key] = aws.lambda_.LayerVersion(
+            f"layer-{label}-{runtime}-{content_hash[:12]}",
+            layer_name=layer_name,
+            code=archive,
+            compatible_runtimes=[runtime],
+        )
+    return layers[key]
@@ -0,0 +1,99 @@
+# Doc: https://www.pulumi.com/docs/iac/concepts/assets-archives/
+# Builds deterministic, content addressed zip packages for Lambda functions and layers.
+# File hashes are kept in a local manifest keyed on (path, size, mtime) so unchanged files are never re-read,
+# and the zip of a given content hash is built once and reused from the cache on the next run.
+from pathlib import Path
+import hashlib
+import os
+import tempfile
+import zipfile
+import pulumi
+from pulumi_config.config import CACHE_DIR
+from resources.hash_cache import hash_files, reference
+
+PACKAGE_DIR = os.path.join(CACHE_DIR, "lambda")
+
+# Fixed zip entry timestamp (earliest date supported by the zip format)
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def collect_files(codebase: list):
+    """Resolve the codebase paths into {archive_path: local_path}.
+    A folder is added with its name as prefix unless the path ends with "*"."""
+    files = {}
+    for path in codebase:
+        # Check if the path ends with a wildcard (*)
+        has_wildcard = path.endswith("*")
+        # Remove the wildcard if present
+        clean_path = path.rstrip("*").rstrip("/")
+        codebase_path = Path(clean_path).resolve()
+
+        if codebase_path.is_dir():
+            reference(directories=[codebase_path])
+            base_folder_name = "" if has_wildcard else codebase_path.name
+            for root, dirs, filenames in os.walk(codebase_path):
+                dirs.sort()
+                for filename in filenames:
+                    file = Path(root, filename)
+                    # Broken symlinks cannot be read, they are left out of the package
+                    if not file.exists():
+                        print(f"Warning: {file} is a broken link and will be skipped.")
+                        continue
+                    relative_path = file.relative_to(codebase_path).as_posix()
+                    files[f"{base_folder_name}/{relative_path}" if base_folder_name else relative_path] = str(file)
+        elif codebase_path.is_file():
+            files[codebase_path.name] = str(codebase_path)
+        else:
+            print(f"Warning: {codebase_path} does not exist and will be skipped.")
+    return files
+
+
+def file_mode(path: str):
+    """Normalized zip permissions: 0o755 for executable files (scripts, binaries), 0o644 otherwise."""
+    return 0o755 if os.stat(path).st_mode & 0o111 else 0o644
+
+
+def package_hash(files: dict, hashes: dict):
+    """Hash of the sorted (archive path, file hash, executable) entries, identifies the package content."""
+    digest = hashlib.sha256()
+    for archive_path in sorted(files):
+        digest.update(archive_path.encode())
+        digest.update(b"\0")
+        digest.update(hashes[files[archive_path]].encode())
+        # Only executables add a marker, so the packages without any keep their former hash
+        if file_mode(files[archive_path]) == 0o755:
+            digest.update(b"\0x")
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def write_zip(files: dict, zip_path: str):
+    """Write a deterministic zip: sorted entries, fixed timestamps and normalized permissions (see file_mode)."""
+    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(zip_path), suffix=".zip")
+    with os.fdopen(fd, "wb") as output, zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        for archive_path in sorted(files):
+            info = zipfile.ZipInfo(archive_path, date_time=ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = file_mode(files[archive_path]) << 16
+            with open(files[archive_path], "rb") as file:
+                archive.writestr(info, file.read())
+    os.replace(tmp_path, zip_path)
+
+
+def build_package(codebase: list, package_dir: str = PACKAGE_DIR):
+    """Build (or reuse) the zip package of the codebase and return (zip_path, content_hash)."""
+    files = collect_files(codebase)
+    hashes = hash_files(list(files.values()), os.path.join(package_dir, "manifest.json"))
+
+    content_hash = package_hash(files, hashes)
+    zip_path = os.path.join(package_dir, f"{content_hash}.zip")
+    if not os.path.isfile(zip_path):
+        write_zip(files, zip_path)
+    return zip_path, content_hash
+
+
+def package_archive(codebase: list, package_dir: str = PACKAGE_DIR):
+    """Return a pulumi.FileArchive of the cached zip package of the codebase."""
+    zip_path, _ = build_package(codebase, package_dir)
+    return pulumi.FileArchive(zip_path)
@@ -0,0 +1,151 @@
+# Doc: Function                 - https://www.pulumi.com/registry/packages/aws/api-docs/lambda/function/
+# Doc: Provisioned concurrency  - https://www.pulumi.com/registry/packages/aws/api-docs/lambda/provisionedconcurrencyconfig/
+# Doc: Application Auto Scaling - https://docs.aws.amazon.com/lambda/latest/dg/provisioned-concurrency.html#managing-provisioned-concurency
+# Doc: SnapStart                - https://docs.aws.amazon.com/lambda/latest/dg/snapstart.html
+# Performance profiles for lambda_function_py: memory, timeout, architecture, storage, concurrency and SnapStart
+# are managed together; provisioned concurrency and its auto scaling are set on a "live" alias of a published version.
+import pulumi
+import pulumi_aws as aws
+
+PROFILES = {
+    "default": {},
+    # Fast cold starts and warm capacity for synchronous APIs
+    "latency-critical": {
+        "memory_size": 1024,
+        "timeout": 10,
+        "architectures": ["arm64"],
+        "provisioned_concurrency": 2,
+        "autoscaling": {
+            "min_capacity": 2,
+            "max_capacity": 20,
+            "target_utilization": 0.7,
+            "schedules": [
+                {"name": "business-hours", "schedule": "cron(0 8 ? * MON-FRI *)", "min_capacity": 5, "max_capacity": 50},
+                {"name": "off-hours", "schedule": "cron(0 20 ? * MON-FRI *)", "min_capacity": 2, "max_capacity": 20},
+            ],
+        },
+    },
+    # Long running, memory bound jobs
+    "batch": {
+        "memory_size": 3008,
+        "timeout": 900,
+        "architectures": ["arm64"],
+        "ephemeral_storage": 4096,
+    },
+}
+
+SETTINGS = ["memory_size", "timeout", "architectures", "ephemeral_storage", "reserved_concurrent_executions",
+            "snap_start", "provisioned_concurrency", "autoscaling", "alias"]
+
+
+def resolve_profile(profile=None, **overrides):
+    """Merge a preset (name) or custom profile (dict) with the explicit overrides (None values are ignored)."""
+    if profile is None:
+        settings = {}
+    elif isinstance(profile, dict):
+        settings = dict(profile)
+    elif profile in PROFILES:
+        settings = dict(PROFILES[profile])
+    else:
+        raise ValueError(f"Unknown Lambda performance profile: {profile}. Available: {list(PROFILES)}")
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown Lambda performance settings: {sorted(unknown)}")
+    validate_settings(settings)
+    return settings
+
+
+def validate_settings(settings: dict):
+    if "memory_size" in settings and not 128 <= settings["memory_size"] <= 10240:
+        raise ValueError(f"memory_size must be between 128 and 10240 MB, got {settings['memory_size']}")
+    if "timeout" in settings and not 1 <= settings["timeout"] <= 900:
+        raise ValueError(f"timeout must be between 1 and 900 seconds, got {settings['timeout']}")
+    if "ephemeral_storage" in settings and not 512 <= settings["ephemeral_storage"] <= 10240:
+        raise ValueError(f"ephemeral_storage must be between 512 and 10240 MB, got {settings['ephemeral_storage']}")
+    for architecture in settings.get("architectures", []):
+        if architecture not in ("x86_64", "arm64"):
+            raise ValueError(f"Unknown architecture: {architecture}")
+    if settings.get("snap_start") and (settings.get("provisioned_concurrency") or settings.get("autoscaling")):
+        raise ValueError("SnapStart cannot be used together with provisioned concurrency")
+    autoscaling = settings.get("autoscaling")
+    if autoscaling and autoscaling.get("min_capacity", 1) > autoscaling.get("max_capacity", 1):
+        raise ValueError("autoscaling min_capacity is greater than max_capacity")
+
+
+def needs_alias(settings: dict):
+    """Provisioned concurrency and SnapStart apply to published versions, served through an alias."""
+    return bool(settings.get("alias") or settings.get("provisioned_concurrency") or settings.get("autoscaling") or settings.get("snap_start"))
+
+
+def function_args(settings: dict):
+    """Keyword arguments for aws.lambda_.Function."""
+    return {
+        "memory_size": settings.get("memory_size"),
+        "timeout": settings.get("timeout"),
+        "architectures": settings.get("architectures"),
+        "ephemeral_storage": {"size": settings["ephemeral_storage"]} if settings.get("ephemeral_storage") else None,
+        "reserved_concurrent_executions": settings.get("reserved_concurrent_executions"),
+        "snap_start": {"apply_on": "PublishedVersions"} if settings.get("snap_start") else None,
+        "publish": True if needs_alias(settings) else None,
+    }
+
+
+def performance_alias(name: str, lambda_function, settings: dict, child_opts=pulumi.ResourceOptions):
+    """Create the alias of the published version with its provisioned concurrency and auto scaling.
+    `child_opts` returns the options of every resource created (e.g. Component.child_opts)."""
+    alias_name = settings.get("alias") or "live"
+    alias = aws.lambda_.Alias(f"{name}-{alias_name}",
+        name=alias_name,
+        function_name=lambda_function.name,
+        function_version=lambda_function.version,
+        opts=child_opts())
+
+    provisioned = settings.get("provisioned_concurrency")
+    autoscaling = settings.get("autoscaling")
+    if provisioned or autoscaling:
+        provisioned_config = aws.lambda_.ProvisionedConcurrencyConfig(f"{name}-{alias_name}-provisioned",
+            function_name=lambda_function.name,
+            qualifier=alias.name,
+            provisioned_concurrent_executions=provisioned or autoscaling.get("min_capacity", 1),
+            # Auto scaling owns the value once it is configured
+            opts=child_opts(ignore_changes=["provisioned_concurrent_executions"] if autoscaling else None))
+
+    if autoscaling:
+        target = aws.appautoscaling.Target(f"{name}-{alias_name}-scaling-target",
+            service_namespace="lambda",
+            scalable_dimension="lambda:function:ProvisionedConcurrency",
+            resource_id=pulumi.Output.concat("function:", lambda_function.name, ":", alias.name),
+            min_capacity=autoscaling.get("min_capacity", 1),
+            max_capacity=autoscaling.get("max_capacity", 10),
+            opts=child_opts(depends_on=[provisioned_config]))
+
+        aws.appautoscaling.Policy(f"{name}-{alias_name}-scaling-policy",
+            policy_type="TargetTrackingScaling",
+            service_namespace=target.service_namespace,
+            scalable_dimension=target.scalable_dimension,
+            resource_id=target.resource_id,
+            target_tracking_scaling_policy_configuration={
+                "target_value": autoscaling.get("target_utilization", 0.7),
+                "predefined_metric_specification": {
+                    "predefined_metric_type": "LambdaProvisionedConcurrencyUtilization",
+                },
+            },
+            opts=child_opts())
+
+        for schedule in autoscaling.get("schedules", []):
+            aws.appautoscaling.ScheduledAction(f"{name}-{alias_name}-{schedule['name']}",
+                name=f"{name}-{alias_name}-{schedule['name']}",
+                service_namespace=target.service_namespace,
+                scalable_dimension=target.scalable_dimension,
+                resource_id=target.resource_id,
+                schedule=schedule["schedule"],
+                timezone=schedule.get("timezone"),
+                scalable_target_action={
+                    "min_capacity": schedule.get("min_capacity"),
+                    "max_capacity": schedule.get("max_capacity"),
+                },
+                opts=child_opts())
+
+    return alias
@@ -0,0 +1,99 @@
+# Doc: https://www.pulumi.com/docs/iac/concepts/resources/functions/
+# Shared cache for data-source lookups (aws.get_caller_identity, aws.get_region, ...).
+# Each lookup is invoked at most once per program run (and stack) and returned as an Output, so it never blocks program evaluation.
+# Results can also be persisted across runs in .pulumi_cache/lookups.json for `ttl` seconds (PULUMI_LOOKUP_TTL by default),
+# keyed on the stack and the AWS credentials/profile/region in use so a cached value is never reused for another
+# stack or account (several stacks with their own aws:region can run in the same process with --stacks).
+import json
+import os
+import time
+import weakref
+import pulumi
+import pulumi_aws as aws
+from pulumi_config.config import CACHE_DIR
+from resources.hash_cache import write_atomic
+
+LOOKUP_CACHE_PATH = os.path.join(CACHE_DIR, "lookups.json")
+DEFAULT_TTL = int(os.getenv("PULUMI_LOOKUP_TTL", "0"))
+
+# {root stack resource: {key: Output}}, lookups already made during one program run
+_memory = weakref.WeakKeyDictionary()
+# Programs run without a root stack resource (unit tests under mocks)
+_unrooted_memory = {}
+
+
+def _run_memory():
+    root = pulumi.runtime.get_root_resource()
+    return _unrooted_memory if root is None else _memory.setdefault(root, {})
+
+
+def provider_region():
+    """Region of the default AWS provider: the aws:region stack config, else the environment."""
+    return pulumi.Config("aws").get("region") or os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or os.getenv("REGION", "")
+
+
+def context_key(name: str):
+    """Cache key of a lookup: its name, the stack and the AWS context it was made in."""
+    return "|".join([name, pulumi.get_stack() or "", os.getenv("AWS_PROFILE", ""), os.getenv("AWS_ACCESS_KEY_ID", ""), provider_region()])
+
+
+def load_cache(path: str = LOOKUP_CACHE_PATH):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def store(key: str, value: dict, path: str = LOOKUP_CACHE_PATH):
+    cache = load_cache(path)
+    cache[key] = {"time": time.time(), "value": value}
+    write_atomic(path, json.dumps(cache, sort_keys=True).encode())
+    return value
+
+
+def cached_lookup(name: str, invoke, ttl: int = None):
+    """Return an Output of the lookup result (a dict).
+    `invoke` is a function returning an Output of the result, it is only called when the value is not cached."""
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    key = context_key(name)
+    memory = _run_memory()
+    if key in memory:
+        return memory[key]
+
+    entry = load_cache().get(key) if ttl > 0 else None
+    if entry and time.time() - entry["time"] < ttl:
+        result = pulumi.Output.from_input(entry["value"])
+    else:
+        result = invoke()
+        if ttl > 0:
+            result = result.apply(lambda value: store(key, value))
+    memory[key] = result
+    return result
+
+
+def clear_lookups(path: str = LOOKUP_CACHE_PATH):
+    _memory.clear()
+    _unrooted_memory.clear()
+    if os.path.isfile(path):
+        os.remove(path)
+
+
+def get_caller_identity(ttl: int = None):
+    """Output of {"account_id", "arn", "user_id"} of the current credentials."""
+    return cached_lookup("caller_identity", lambda: aws.get_caller_identity_output().apply(
+        lambda identity: {"account_id": identity.account_id, "arn": identity.arn, "user_id": identity.user_id}), ttl)
+
+
+def get_account_id(ttl: int = None):
+    return get_caller_identity(ttl).apply(lambda identity: identity["account_id"])
+
+
+def get_region(ttl: int = None):
+    """Output of the provider region name."""
+    return cached_lookup("region", lambda: aws.get_region_output().apply(lambda region: {"name": region.name}), ttl).apply(lambda region: region["name"])
+
+
+def get_partition(ttl: int = None):
+    return cached_lookup("partition", lambda: aws.get_partition_output().apply(
+        lambda partition: {"partition": partition.partition, "dns_suffix": partition.dns_suffix}), ttl).apply(lambda partition: partition["partition"])
@@ -0,0 +1,73 @@
+# Component registry: finds the resource functions of the modules in resources/ without importing them (ast),
+# and imports a module (and pulumi_aws with it) only when one of its functions is called for the first time.
+# Commands that never run the Pulumi program (cancel, export, outputs) therefore never pay the AWS SDK import cost.
+import ast
+import importlib
+import os
+
+RESOURCES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that are not resource components
+EXCLUDED_MODULES = {"__init__", "registry"}
+
+_registry = None
+
+
+def discover(resources_dir: str = RESOURCES_DIR):
+    """Return {function_name: [module names]} of the public top level functions of every resource module."""
+    registry = {}
+    for filename in sorted(os.listdir(resources_dir)):
+        module_name, extension = os.path.splitext(filename)
+        if extension != ".py" or module_name in EXCLUDED_MODULES:
+            continue
+        with open(os.path.join(resources_dir, filename), encoding="utf-8") as file:
+            try:
+                tree = ast.parse(file.read(), filename)
+            except SyntaxError:
+                continue
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef) and not node.name.startswith("_") and node.name != "main":
+                registry.setdefault(node.name, []).append(f"resources.{module_name}")
+    return registry
+
+
+def registry():
+    global _registry
+    if _registry is None:
+        _registry = discover()
+    return _registry
+
+
+def resolve(name: str):
+    """Import and return a component: "bucket" or "lambda_function.lambda_function_py" when the name is ambiguous."""
+    if "." in name:
+        module_name, function_name = name.rsplit(".", 1)
+        module_name = module_name if module_name.startswith("resources.") else f"resources.{module_name}"
+    else:
+        function_name = name
+        modules = registry().get(name)
+        if not modules:
+            raise ImportError(f"No resource component named {name} in {RESOURCES_DIR}")
+        if len(modules) > 1:
+            raise ImportError(f"Resource component {name} is defined in {modules}, use 'module.{name}'")
+        module_name = modules[0]
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def lazy(name: str):
+    """Return a function importing the component on its first call."""
+    component = None
+
+    def load():
+        nonlocal component
+        if component is None:
+            component = resolve(name)
+        return component
+
+    def call(*args, **kwargs):
+        return load()(*args, **kwargs)
+
+    call.load = load
+    call.__name__ = name.rsplit(".", 1)[-1]
+    call.__doc__ = f"Lazy loaded resource component {name}."
+    return call
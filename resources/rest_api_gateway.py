@@ -1,6 +1,9 @@
+import hashlib
 import pulumi
 import pulumi_aws as aws
 from typing import List, Dict
+from resources.components import Component
+from resources.lookups import get_region
 
 def main():
     routes = [
@@ -18,103 +21,247 @@ def main():
 ]
     api_gateway_rest(PROJECT_NAME, routes)
     
-def api_gateway_rest(name: str, endpoints: list, stage="staging", binary_media_types=["*/*"]):
+# Doc: https://docs.aws.amazon.com/apigateway/latest/developerguide/api-gateway-caching.html
+CACHE_CLUSTER_SIZES = ["0.5", "1.6", "6.1", "13.5", "28.4", "58.2", "118", "237"]
+MAX_CACHE_TTL = 3600
+MAX_COMPRESSION_SIZE = 10485760
+
+class RestApiGateway(Component):
+    """REST API Gateway routing the endpoints to Lambda functions, see api_gateway_rest."""
+
+    def __init__(self, name: str, endpoints: list, stage="staging", binary_media_types=["*/*"],
+                 cache_cluster_size: str = None, cache_ttl: int = None, throttling: dict = None, minimum_compression_size: int = None,
+                 opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:apigateway:RestApi", name, opts)
+        validate_stage_options(endpoints, cache_cluster_size, cache_ttl, throttling, minimum_compression_size)
+    
+        # Create REST API
+        api = aws.apigateway.RestApi(f"{name}-rest-api",
+            name=f"{name}",
+            description=f"REST API Gateway for {name}",
+            endpoint_configuration={
+                "types": "REGIONAL"
+            },
+            binary_media_types=binary_media_types,
+            # Typed as a string by pulumi_aws 7.x, validated as a number by validate_stage_options
+            minimum_compression_size=str(minimum_compression_size) if minimum_compression_size is not None else None,
+            opts=self.child_opts()
+        )
+    
+        # Path tree: one aws.apigateway.Resource per unique path prefix, named after its full path so
+        # "/a/items" and "/b/items" never collide. Resources, methods and integrations alias their former names
+        # ("<name>-resource-<part>", ...): a create-before-delete replacement of the same path or method would fail
+        # with a ConflictException.
+        route_tree = build_route_tree(endpoints)
+        parts = [part for _, part in route_tree.values()]
+        resource_map = {}
+        for full_path, (parent_path, part) in route_tree.items():
+            resource_map[full_path] = aws.apigateway.Resource(f"{name}-resource{full_path}",
+                rest_api=api.id,
+                parent_id=resource_map[parent_path].id if parent_path else api.root_resource_id,
+                path_part=part,
+                # Path parts used twice could not be deployed under their former name
+                opts=self.child_opts(former_name=f"{name}-resource-{part}" if parts.count(part) == 1 else None))
+
+        # To ensure we only create one Lambda permission per function,
+        # track permissions already created.
+        lambda_permissions = {}
+        integrations = []
+
+        # Loop over each endpoint definition
+        for i, ep in enumerate(endpoints, start=1):
+            former_suffix = f"{ep['method']}-{ep['path'].replace('/', '-')}"
+            method = ep["method"].upper()
+            path = normalize_path(ep["path"])
+            lambda_function = ep["function"]
+            resource_id = resource_map[path].id if path != "/" else api.root_resource_id
+
+            cache_key_parameters = ep.get("cache_key_parameters") or []
+
+            # Create API Gateway method and setting the type
+            aws_method = aws.apigateway.Method(f"{name}-method-{method}{path}",
+                rest_api=api.id,
+                resource_id=resource_id,
+                http_method=method,
+                authorization="NONE",
+                request_parameters={parameter: False for parameter in cache_key_parameters} or None,
+                opts=self.child_opts(former_name=f"{name}-method-{former_suffix}"))
+
+            # Create API Gateway integration with Lambda
+            integrations.append(aws.apigateway.Integration(f"{name}-integration-{method}{path}",
+                rest_api=api.id,
+                resource_id=resource_id,
+                http_method=aws_method.http_method,
+                type="AWS_PROXY",
+                integration_http_method="POST",  # AWS Proxy integrations use POST
+                uri=lambda_function.invoke_arn,
+                cache_key_parameters=cache_key_parameters or None,
+                opts=self.child_opts(former_name=f"{name}-integration-{former_suffix}", depends_on=[aws_method])))
+
+            # Create Lambda permission if not already created for this function
+            if id(lambda_function) not in lambda_permissions:
+                # Numbered after the first endpoint of the function, as before the component
+                lambda_permission = aws.lambda_.Permission(f"{name}-api-permission-{i}",
+                    action="lambda:InvokeFunction",
+                    function=lambda_function.id,
+                    principal="apigateway.amazonaws.com",
+                    source_arn=pulumi.Output.concat(api.execution_arn, "/*"),
+                    opts=self.child_opts())
+                lambda_permissions[id(lambda_function)] = lambda_permission
+
+        # Create API Gateway Deployment, replaced only when the route table (methods, paths, integrations, cache keys) changes
+        deployment = aws.apigateway.Deployment(f"{name}-deployment",
+            rest_api=api.id,
+            triggers={"routes": route_hash(endpoints)},
+            opts=self.child_opts(depends_on=[api] + integrations))
+
+        # Create the API Gateway Stage
+        stage_name = stage  # Avoid variable name conflict
+        api_stage = aws.apigateway.Stage(f"{name}-stage-{stage_name}",
+            rest_api=api.id,
+            deployment=deployment.id,
+            stage_name=stage_name,
+            cache_cluster_enabled=bool(cache_cluster_size),
+            cache_cluster_size=cache_cluster_size,
+            opts=self.child_opts())
+
+        # Stage-wide method settings (cache and throttling defaults)
+        if cache_ttl is not None or throttling:
+            aws.apigateway.MethodSettings(f"{name}-method-settings-{stage_name}",
+                rest_api=api.id,
+                stage_name=api_stage.stage_name,
+                method_path="*/*",
+                settings=method_settings(cache_ttl, throttling),
+                opts=self.child_opts())
+
+        # Per-method settings override the stage defaults
+        for ep in endpoints:
+            if ep.get("cache_ttl") is None and not ep.get("throttling"):
+                continue
+            method = ep["method"].upper()
+            path = normalize_path(ep["path"])
+            aws.apigateway.MethodSettings(f"{name}-method-settings-{stage_name}-{method}{path}",
+                rest_api=api.id,
+                stage_name=api_stage.stage_name,
+                method_path=f"{path.strip('/')}/{method}",
+                settings=method_settings(ep.get("cache_ttl", cache_ttl), ep.get("throttling") or throttling),
+                opts=self.child_opts())
+
+        # API Gateway endpoint, same outputs as the aws.apigateway.RestApi returned before
+        self.api = api
+        self.stage = api_stage
+        self.id = api.id
+        self.execution_arn = api.execution_arn
+        self.root_resource_id = api.root_resource_id
+        self.url = pulumi.Output.format(
+            "https://{api_id}.execute-api.{region}.amazonaws.com/{stage}",
+            api_id=api.id,
+            region=get_region(),
+            stage=api_stage.stage_name)
+        self.finish({"api-endpoint": self.url})
+
+
+def api_gateway_rest(name: str, endpoints: list, stage="staging", binary_media_types=["*/*"],
+                     cache_cluster_size: str = None, cache_ttl: int = None, throttling: dict = None, minimum_compression_size: int = None,
+                     opts: pulumi.ResourceOptions = None):
     """
     Create a REST API Gateway that triggers one or more Lambda functions.
     
     Each endpoint in the endpoints list should be a dict with:
       - "method": The HTTP method (e.g., "GET", "POST", etc.)
       - "path": The resource path (e.g., "/media/channel")
-      - "function": The corresponding aws.lambda_.Function instance
+      - "function": The corresponding Lambda function (lambda_function_py component or aws.lambda_.Function)
+      - "cache_ttl" (optional): Seconds the response is cached (0-3600), requires cache_cluster_size
+      - "cache_key_parameters" (optional): Request parameters in the cache key (e.g., ["method.request.querystring.id"])
+      - "throttling" (optional): {"burst_limit": int, "rate_limit": float} for this method
+
+    Stage options:
+      - cache_cluster_size: Stage cache cluster size in GB (e.g., "0.5"), enables the cache cluster
+      - cache_ttl: Default cache TTL of all methods, requires cache_cluster_size
+      - throttling: Default {"burst_limit", "rate_limit"} of all methods
+      - minimum_compression_size: Payload size in bytes above which responses are compressed (0-10485760)
+
+    Returns a RestApiGateway component (id, execution_arn, url), outputs (export_outputs): api-endpoint.
     """
     name = name.lower().strip()
-    
-    # Create REST API
-    api = aws.apigateway.RestApi(f"{name}-rest-api",
-        name=f"{name}",
-        description=f"REST API Gateway for {name}",
-        endpoint_configuration={
-            "types": "REGIONAL"
-        },
-        binary_media_types=binary_media_types
-    )
-    
-    # Dictionary to track created resources
-    resource_map = {"/": api}
-    
-    # To ensure we only create one Lambda permission per function,
-    # track permissions already created.
-    lambda_permissions = {}
-
-    # Loop over each endpoint definition
-    for i, ep in enumerate(endpoints, start=1):
-        method = ep["method"]
-        path = ep["path"]
-        lambda_function = ep["function"]
-        
-
-        # Normalize and split the path into segments
-        path_parts = path.strip("/").split("/")
-        parent_id = api.root_resource_id
-        full_path = ""
+    return RestApiGateway(name, endpoints, stage, binary_media_types, cache_cluster_size, cache_ttl, throttling, minimum_compression_size, opts)
+
+def method_settings(cache_ttl: int = None, throttling: dict = None):
+    """MethodSettings.settings for the given cache TTL and throttling limits."""
+    settings = {}
+    if cache_ttl is not None:
+        settings["caching_enabled"] = cache_ttl > 0
+        settings["cache_ttl_in_seconds"] = cache_ttl
+    if throttling:
+        settings["throttling_burst_limit"] = throttling.get("burst_limit", -1)
+        settings["throttling_rate_limit"] = throttling.get("rate_limit", -1)
+    return settings
+
+def validate_throttling(throttling: dict, where: str):
+    unknown = set(throttling) - {"burst_limit", "rate_limit"}
+    if unknown:
+        raise ValueError(f"{where}: unknown throttling settings {sorted(unknown)}, use burst_limit and rate_limit")
+    for key, value in throttling.items():
+        if not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"{where}: {key} must be a positive number, got {value}")
 
-        # Create each segment of the path
-        for part in path_parts:
+def validate_stage_options(endpoints: list, cache_cluster_size=None, cache_ttl=None, throttling=None, minimum_compression_size=None):
+    """Raise ValueError on invalid cache, throttling or compression settings."""
+    if cache_cluster_size is not None and str(cache_cluster_size) not in CACHE_CLUSTER_SIZES:
+        raise ValueError(f"cache_cluster_size must be one of {CACHE_CLUSTER_SIZES}, got {cache_cluster_size}")
+    if minimum_compression_size is not None and not 0 <= minimum_compression_size <= MAX_COMPRESSION_SIZE:
+        raise ValueError(f"minimum_compression_size must be between 0 and {MAX_COMPRESSION_SIZE}, got {minimum_compression_size}")
+    if throttling:
+        validate_throttling(throttling, "stage")
+
+    for ep in [{"method": "*", "path": "*", "cache_ttl": cache_ttl}] + list(endpoints):
+        where = f"{ep['method']} {ep['path']}"
+        ttl = ep.get("cache_ttl")
+        if ttl is not None:
+            if not isinstance(ttl, int) or not 0 <= ttl <= MAX_CACHE_TTL:
+                raise ValueError(f"{where}: cache_ttl must be between 0 and {MAX_CACHE_TTL} seconds, got {ttl}")
+            if ttl > 0 and cache_cluster_size is None:
+                raise ValueError(f"{where}: cache_ttl requires a cache_cluster_size")
+        for parameter in ep.get("cache_key_parameters") or []:
+            if not parameter.startswith("method.request."):
+                raise ValueError(f"{where}: cache key parameter {parameter} must start with 'method.request.'")
+        if ep.get("throttling"):
+            validate_throttling(ep["throttling"], where)
+
+def normalize_path(path: str):
+    return "/" + "/".join(part for part in path.strip().split("/") if part)
+
+def build_route_tree(endpoints: list):
+    """Return {full_path: (parent_path, path_part)} for every path prefix used by the endpoints, parents first.
+    Raises ValueError on duplicate (method, path) routes."""
+    tree = {}
+    routes = set()
+    for ep in endpoints:
+        path = normalize_path(ep["path"])
+        route = (ep["method"].upper(), path)
+        if route in routes:
+            raise ValueError(f"Duplicate route: {route[0]} {route[1]}")
+        routes.add(route)
+
+        parent_path = None
+        full_path = ""
+        for part in path.strip("/").split("/"):
+            if not part:
+                continue
             full_path += f"/{part}"
-            if full_path not in resource_map:
-                resource = aws.apigateway.Resource(f"{name}-resource-{part}",
-                    rest_api=api.id,
-                    parent_id=parent_id,
-                    path_part=part)
-                resource_map[full_path] = resource
-            parent_id = resource_map[full_path]
-
-        # Create API Gateway method and setting the type
-        aws_method = aws.apigateway.Method(f"{name}-method-{method}-{path.replace('/', '-')}",
-            rest_api=api.id,
-            resource_id=parent_id,
-            http_method=method.upper(),
-            authorization="NONE")
+            if full_path not in tree:
+                tree[full_path] = (parent_path, part)
+            parent_path = full_path
+    return tree
 
-        # Create API Gateway integration with Lambda
-        aws.apigateway.Integration(f"{name}-integration-{method}-{path.replace('/', '-')}",
-            rest_api=api.id,
-            resource_id=parent_id,
-            http_method=aws_method.http_method,
-            type="AWS_PROXY",
-            integration_http_method="POST",  # AWS Proxy integrations use POST
-            uri=lambda_function.invoke_arn,
-            opts=pulumi.ResourceOptions(depends_on=[aws_method]))
-
-        # Create Lambda permission if not already created for this function
-        if lambda_function.id not in lambda_permissions:
-            lambda_permission = aws.lambda_.Permission(f"{name}-api-permission-{i}",
-                action="lambda:InvokeFunction",
-                function=lambda_function.id,
-                principal="apigateway.amazonaws.com",
-                source_arn=pulumi.Output.concat(api.execution_arn, "/*"))
-            lambda_permissions[lambda_function.id] = lambda_permission
-
-    # Create API Gateway Deployment
-    deployment = aws.apigateway.Deployment(f"{name}-deployment",
-        rest_api=api.id,
-        opts=pulumi.ResourceOptions(depends_on=[api] + list(resource_map.values())))
-
-    # Create the API Gateway Stage
-    stage_name = stage  # Avoid variable name conflict
-    api_stage = aws.apigateway.Stage(f"{name}-stage-{stage_name}",
-        rest_api=api.id,
-        deployment=deployment.id,
-        stage_name=stage_name)
-
-    # Export API Gateway endpoint
-    pulumi.export(f"{name}-api-endpoint", pulumi.Output.format(
-        "https://{api_id}.execute-api.{region}.amazonaws.com/{stage}",
-        api_id=api.id,
-        region=aws.get_region().name,
-        stage=api_stage.stage_name))
-    
-    return api
+def route_hash(endpoints: list):
+    """Stable hash of the route table: sorted (method, path, function invoke ARN, cache key parameters) entries.
+    The cache keys are also the method request parameters, a change needs a new deployment."""
+    return pulumi.Output.all(*[
+        pulumi.Output.concat(ep["method"].upper(), " ", normalize_path(ep["path"]), " ", ep["function"].invoke_arn,
+                             " ", ",".join(sorted(ep.get("cache_key_parameters") or [])))
+        for ep in endpoints
+    ]).apply(lambda routes: hashlib.sha256("\n".join(sorted(routes)).encode()).hexdigest())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
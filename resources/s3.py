@@ -4,34 +4,47 @@ https://www.pulumi.com/registry/packages/aws/api-docs/s3/bucketv2/
 https://www.pulumi.com/registry/packages/aws/api-docs/s3/bucketaclv2/
 
 '''
+from fnmatch import fnmatch
+from pathlib import Path
+import mimetypes
+import os
 import pulumi
 from pulumi import ResourceOptions
 import pulumi_aws as aws
-import pulumi_std as std
+from pulumi_config.config import CACHE_DIR
+from resources.components import Component
+from resources.hash_cache import hash_files, reference
+from resources.lookups import get_account_id
 
-def bucket(name):
-    try:
-        name = name.lower().strip()
+HASH_MANIFEST_PATH = os.path.join(CACHE_DIR, "s3", "md5.json")
+
+class S3Bucket(Component):
+    """Private bucket readable by CloudFront and writable by Lambda (same account), with its ACL and policy."""
+
+    def __init__(self, name: str, opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:s3:Bucket", name, opts)
 
         # Create Bucket
         bucket_resource = aws.s3.BucketV2(f"{name}",
             bucket=f"{name}",
-            force_destroy=True)
+            force_destroy=True,
+            opts=self.child_opts())
         
         ownership_controls = aws.s3.BucketOwnershipControls(f"{name}",
             bucket=bucket_resource.id,
             rule={
                 "object_ownership": "BucketOwnerPreferred",
-            })
+            },
+            opts=self.child_opts())
         
         # Configure ACL
         bucket_acl_v2 = aws.s3.BucketAclV2(f"{name}",
             bucket=bucket_resource.id,
             acl="private",
-            opts = pulumi.ResourceOptions(depends_on=[ownership_controls]))
+            opts=self.child_opts(depends_on=[ownership_controls]))
         
         # Retrieve the AWS account ID
-        account_id = aws.get_caller_identity().account_id
+        account_id = get_account_id()
 
         # Configure Bucket Policy
         # Doc: https://www.pulumi.com/registry/packages/aws/api-docs/iam/getpolicydocument/
@@ -80,18 +93,73 @@ def bucket(name):
 
         assign_bucket_policy = aws.s3.BucketPolicy(f"{name}",
             bucket=bucket_resource.id,
-            policy=restrict_access.json)
+            policy=restrict_access.json,
+            opts=self.child_opts())
+
+        # Same outputs as the aws.s3.BucketV2 returned before, callers keep using bucket.id / .arn / ...
+        self.bucket_resource = bucket_resource
+        self.id = bucket_resource.id
+        self.arn = bucket_resource.arn
+        self.bucket = bucket_resource.bucket
+        self.bucket_regional_domain_name = bucket_resource.bucket_regional_domain_name
+        self.finish({"bucket_name": bucket_resource.bucket, "bucket_arn": bucket_resource.arn})
+
 
-        # Export the bucket name and arn
-        bucket_name = pulumi.export("bucket_name", bucket_resource.bucket)
-        bucket_arn = pulumi.export("bucket_arn", bucket_resource.arn)
-        return bucket_resource
+def bucket(name, opts: pulumi.ResourceOptions = None):
+    """Create an S3Bucket component, export its outputs with export_outputs (bucket_name, bucket_arn)."""
+    try:
+        name = name.lower().strip()
+        return S3Bucket(name, opts)
     except Exception as e:
         return f"ERROR Deploying S3 Bucket: {e}"
 
 def upload_object(bucket, object_path, key_path, DependsOn=None):
+    # ETag is computed locally from the cached MD5 instead of a std.filemd5 provider invoke
+    etag = hash_files([object_path], HASH_MANIFEST_PATH, algorithm="md5")[object_path]
     object_file = aws.s3.BucketObject(object_path.replace("/","-").strip().lower(),
     bucket=bucket,
     key=f"{key_path}",
     source=pulumi.FileAsset(f"{object_path}"),
-    etag=std.filemd5(input=f"{object_path}").result, opts=ResourceOptions(depends_on=[DependsOn]) if DependsOn else None)
\ No newline at end of file
+    etag=etag, opts=ResourceOptions(depends_on=[DependsOn]) if DependsOn else None)
+    return object_file
+
+def list_directory(directory: str, include: list = None, exclude: list = None):
+    """Return {relative_key: local_path} for the files under directory matching the include/exclude globs.
+    Globs are matched against the path relative to directory, e.g. "*.html", "assets/**", "*.map"."""
+    reference(directories=[directory])
+    files = {}
+    for root, dirs, filenames in os.walk(directory):
+        dirs.sort()
+        for filename in sorted(filenames):
+            local_path = os.path.join(root, filename)
+            relative_key = Path(local_path).relative_to(directory).as_posix()
+            if include and not any(fnmatch(relative_key, pattern) for pattern in include):
+                continue
+            if exclude and any(fnmatch(relative_key, pattern) for pattern in exclude):
+                continue
+            files[relative_key] = local_path
+    return files
+
+def content_type(path: str):
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+def upload_directory(bucket, directory: str, key_prefix: str = "", include: list = None, exclude: list = None, name: str = None, max_workers: int = None, DependsOn=None):
+    """Upload every file under directory as one aws.s3.BucketObject.
+    MD5/ETags are computed in a thread pool and cached on (path, size, mtime), content types are inferred from the file extension.
+    Returns {key: BucketObject}."""
+    files = list_directory(directory, include, exclude)
+    etags = hash_files(list(files.values()), HASH_MANIFEST_PATH, algorithm="md5", max_workers=max_workers)
+    prefix = key_prefix.strip("/")
+    name = (name or Path(directory).resolve().name).lower().strip()
+
+    objects = {}
+    for relative_key, local_path in files.items():
+        key = f"{prefix}/{relative_key}" if prefix else relative_key
+        objects[key] = aws.s3.BucketObject(f"{name}/{key}",
+            bucket=bucket,
+            key=key,
+            source=pulumi.FileAsset(local_path),
+            content_type=content_type(local_path),
+            etag=etags[local_path],
+            opts=ResourceOptions(depends_on=[DependsOn]) if DependsOn else None)
+    return objects
\ No newline at end of file
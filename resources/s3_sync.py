@@ -0,0 +1,195 @@
+# Doc: Dynamic providers - https://www.pulumi.com/docs/iac/concepts/resources/dynamic-providers/
+# Doc: boto3 transfers     - https://boto3.amazonaws.com/v1/documentation/api/latest/guide/s3.html
+# Delta sync of a local directory to S3, tracked as ONE Pulumi resource instead of one BucketObject per file.
+# The state only holds the hash of the local manifest; the full manifest ({key: etag}) is stored in the bucket itself
+# and every update uploads, deletes or skips only the changed keys. Large files use concurrent multipart uploads.
+# The sync functions take a boto3 client so they can be tested against a local S3 stand-in (e.g. moto).
+# The manifest object records the resource owning the prefix (OWNER_METADATA): when a replacement (rename, bucket
+# recreated with the same name) takes the prefix over, deleting the former resource leaves the synced keys alone.
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import pulumi
+from pulumi.dynamic import CreateResult, DiffResult, ResourceProvider, UpdateResult
+from pulumi_config.config import CACHE_DIR
+from resources.hash_cache import hash_files, write_atomic
+from resources.s3 import content_type, list_directory
+
+MANIFEST_KEY = ".pulumi-sync-manifest.json"
+MULTIPART_THRESHOLD = 64 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+OWNER_METADATA = "pulumi-sync-owner"
+
+
+def remote_key(key_prefix: str, key: str):
+    prefix = (key_prefix or "").strip("/")
+    return f"{prefix}/{key}" if prefix else key
+
+
+def build_local_manifest(directory: str, include: list = None, exclude: list = None, max_workers: int = None):
+    """Return {key: {"path", "etag", "content_type"}} for the local directory, ETags come from the cached MD5s."""
+    files = list_directory(directory, include, exclude)
+    etags = hash_files(list(files.values()), os.path.join(CACHE_DIR, "s3", "md5.json"), algorithm="md5", max_workers=max_workers)
+    return {
+        key: {"path": os.path.abspath(path), "etag": etags[path], "content_type": content_type(path)}
+        for key, path in files.items()
+    }
+
+
+def manifest_hash(manifest: dict):
+    """Stable hash of the {key: etag} pairs, changes only when a key is added, removed or modified."""
+    digest = hashlib.sha256()
+    for key in sorted(manifest):
+        digest.update(f"{key}\0{manifest[key]['etag']}\n".encode())
+    return digest.hexdigest()
+
+
+def plan_sync(local: dict, remote: dict):
+    """Compare the local manifest with the remote {key: etag} manifest.
+    Returns (keys to upload, keys to delete, number of unchanged keys)."""
+    upload = sorted(key for key, entry in local.items() if remote.get(key) != entry["etag"])
+    delete = sorted(key for key in remote if key not in local)
+    return upload, delete, len(local) - len(upload)
+
+
+def load_remote_manifest(client, bucket: str, key_prefix: str = ""):
+    """Read the {key: etag} manifest stored in the bucket, empty if the directory was never synced."""
+    try:
+        response = client.get_object(Bucket=bucket, Key=remote_key(key_prefix, MANIFEST_KEY))
+    except client.exceptions.NoSuchKey:
+        return {}
+    return json.loads(response["Body"].read())
+
+
+def manifest_owner(client, bucket: str, key_prefix: str = ""):
+    """Owner recorded on the remote manifest, None if the directory was never synced or has no owner."""
+    try:
+        response = client.head_object(Bucket=bucket, Key=remote_key(key_prefix, MANIFEST_KEY))
+    except client.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return None
+        raise
+    return response.get("Metadata", {}).get(OWNER_METADATA)
+
+
+def sync_manifest(client, bucket: str, local: dict, key_prefix: str = "", max_workers: int = 16,
+                  multipart_threshold: int = MULTIPART_THRESHOLD, dry_run: bool = False, owner: str = None):
+    """Upload the changed keys, delete the removed ones and store the new manifest (owned by `owner`) in the bucket.
+    Returns {"uploaded", "deleted", "skipped"} counts."""
+    from boto3.s3.transfer import TransferConfig
+
+    remote = load_remote_manifest(client, bucket, key_prefix)
+    upload, delete, skipped = plan_sync(local, remote)
+    if dry_run:
+        return {"uploaded": len(upload), "deleted": len(delete), "skipped": skipped}
+
+    # Files above the threshold are split in parts uploaded concurrently by boto3
+    transfer_config = TransferConfig(multipart_threshold=multipart_threshold, multipart_chunksize=MULTIPART_CHUNKSIZE, max_concurrency=4)
+
+    def upload_file(key):
+        entry = local[key]
+        client.upload_file(entry["path"], bucket, remote_key(key_prefix, key),
+                           ExtraArgs={"ContentType": entry["content_type"]}, Config=transfer_config)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(upload_file, upload))
+
+    delete_keys(client, bucket, [remote_key(key_prefix, key) for key in delete])
+
+    client.put_object(Bucket=bucket, Key=remote_key(key_prefix, MANIFEST_KEY),
+                      Body=json.dumps({key: entry["etag"] for key, entry in local.items()}, sort_keys=True).encode(),
+                      ContentType="application/json", Metadata={OWNER_METADATA: owner} if owner else {})
+    return {"uploaded": len(upload), "deleted": len(delete), "skipped": skipped}
+
+
+def delete_keys(client, bucket: str, keys: list):
+    # DeleteObjects accepts at most 1000 keys per request
+    for i in range(0, len(keys), 1000):
+        client.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": key} for key in keys[i:i + 1000]], "Quiet": True})
+
+
+def delete_synced(client, bucket: str, key_prefix: str = "", owner: str = None):
+    """Delete every key listed in the remote manifest and the manifest itself.
+    Nothing is deleted when the manifest is owned by another resource (a replacement syncing the same prefix)."""
+    current_owner = manifest_owner(client, bucket, key_prefix)
+    if current_owner and current_owner != owner:
+        return 0
+    remote = load_remote_manifest(client, bucket, key_prefix)
+    delete_keys(client, bucket, [remote_key(key_prefix, key) for key in remote] + [remote_key(key_prefix, MANIFEST_KEY)])
+    return len(remote)
+
+
+def s3_client(region: str = None):
+    import boto3
+    return boto3.client("s3", region_name=region) if region else boto3.client("s3")
+
+
+def manifest_path(name: str):
+    """Local manifest file of a sync resource, under the cache directory of the current checkout."""
+    return os.path.join(CACHE_DIR, "s3", f"sync-{name}.json")
+
+
+class S3SyncProvider(ResourceProvider):
+    """Dynamic provider syncing a local manifest file to a bucket prefix."""
+
+    def sync(self, props, owner):
+        with open(manifest_path(props["manifest"])) as file:
+            local = json.load(file)
+        return sync_manifest(s3_client(props.get("region")), props["bucket"], local, props.get("key_prefix", ""),
+                             max_workers=int(props.get("max_workers", 16)),
+                             multipart_threshold=int(props.get("multipart_threshold", MULTIPART_THRESHOLD)),
+                             owner=owner)
+
+    def create(self, props):
+        import uuid
+        owner = uuid.uuid4().hex
+        stats = self.sync(props, owner)
+        return CreateResult(id_=f"{props['bucket']}/{props.get('key_prefix', '')}", outs={**props, **stats, "owner": owner})
+
+    def diff(self, _id, olds, news):
+        # The region is only where the client connects, a new bucket or prefix is a new resource
+        replaces = [key for key in ("bucket", "key_prefix") if olds.get(key) != news.get(key)]
+        changes = bool(replaces) or any(olds.get(key) != news.get(key) for key in ("manifest_hash", "region"))
+        return DiffResult(changes=changes, replaces=replaces, delete_before_replace=False)
+
+    def update(self, _id, olds, news):
+        # Resources created before the owner was recorded take the prefix over on their next update
+        owner = olds.get("owner")
+        if not owner:
+            import uuid
+            owner = uuid.uuid4().hex
+        return UpdateResult(outs={**news, **self.sync(news, owner), "owner": owner})
+
+    def delete(self, _id, props):
+        delete_synced(s3_client(props.get("region")), props["bucket"], props.get("key_prefix", ""), owner=props.get("owner"))
+
+
+class S3DirectorySync(pulumi.dynamic.Resource):
+    uploaded: pulumi.Output[int]
+    deleted: pulumi.Output[int]
+    skipped: pulumi.Output[int]
+
+    def __init__(self, name, props: dict, opts=None):
+        super().__init__(S3SyncProvider(), name, {"uploaded": None, "deleted": None, "skipped": None, **props}, opts)
+
+
+def s3_sync(name: str, bucket, directory: str, key_prefix: str = "", include: list = None, exclude: list = None,
+            region: str = None, max_workers: int = 16, multipart_threshold: int = MULTIPART_THRESHOLD, DependsOn=None):
+    """Sync a local directory to the bucket as a single resource.
+    Only the hash of the local manifest is kept in the stack state; unchanged directories produce no diff."""
+    name = name.lower().strip()
+    local = build_local_manifest(directory, include, exclude)
+    write_atomic(manifest_path(name), json.dumps(local, sort_keys=True).encode())
+
+    # The state holds the manifest name, not its path: the stack can be run from any checkout
+    return S3DirectorySync(f"{name}-sync", {
+        "bucket": bucket,
+        "key_prefix": key_prefix.strip("/"),
+        "region": region,
+        "manifest": name,
+        "manifest_hash": manifest_hash(local),
+        "object_count": len(local),
+        "max_workers": max_workers,
+        "multipart_threshold": multipart_threshold,
+    }, opts=pulumi.ResourceOptions(depends_on=[DependsOn]) if DependsOn else None)
@@ -0,0 +1,154 @@
+# Doc: https://www.pulumi.com/registry/packages/aws/api-docs/scheduler/schedulegroup/
+# Doc: https://docs.aws.amazon.com/scheduler/latest/UserGuide/schedule-types.html#cron-based
+# Spreads a large set of schedules with the same cadence across time: every job gets a deterministic offset from the
+# hash of its name inside its window, so the downstream load stays flat instead of every schedule firing at 00:00.
+# Offsets do not move when jobs are added or removed. The expected invocations per minute of the day are computed
+# before deploying (histogram, peak); check them with: python -m resources.schedule_planner jobs.json
+from dataclasses import dataclass
+from typing import Optional, Union
+import argparse
+import hashlib
+import json
+import pulumi
+import pulumi_aws as aws
+from resources.components import Component
+from resources.event_bridge import scheduler
+
+MINUTES_PER_DAY = 1440
+
+CADENCES = {"daily": MINUTES_PER_DAY, "hourly": 60}
+
+
+@dataclass
+class ScheduledJob:
+    """A job run every `cadence` ("daily", "hourly" or minutes), at an offset inside the first `window` minutes
+    of the period after `start` (default: the whole period). `target` is the scheduler target ({"arn", "role_arn", "input"})."""
+    name: str
+    target: Optional[dict] = None
+    cadence: Union[str, int] = "daily"
+    window: Optional[int] = None
+    start: int = 0
+    group: Optional[str] = None
+
+
+@dataclass
+class PlannedSchedule:
+    job: ScheduledJob
+    period: int
+    # Minute of the period of the first invocation
+    minute: int
+    expression: str
+
+
+def period_minutes(cadence: Union[str, int]):
+    """Period in minutes of a cadence, it must divide an hour or be whole hours dividing a day."""
+    period = CADENCES.get(cadence, cadence)
+    if not isinstance(period, int) or period < 1 or (60 % period and (period % 60 or MINUTES_PER_DAY % period)):
+        raise ValueError(f"Unsupported cadence {cadence!r}: use {sorted(CADENCES)}, minutes dividing 60 or hours dividing 24")
+    return period
+
+
+def offset(name: str, window: int):
+    """Deterministic offset in [0, window) from the hash of the job name."""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big") % window
+
+
+def cron_expression(period: int, minute: int):
+    """EventBridge Scheduler cron expression running every `period` minutes, first at `minute` past midnight UTC."""
+    if period == MINUTES_PER_DAY:
+        return f"cron({minute % 60} {minute // 60} * * ? *)"
+    if period == 60:
+        return f"cron({minute} * * * ? *)"
+    if 60 % period == 0:
+        return f"cron({minute}/{period} * * * ? *)"
+    return f"cron({minute % 60} {minute // 60}/{period // 60} * * ? *)"
+
+
+def plan_schedules(jobs: list):
+    """Return the PlannedSchedule of every job (ScheduledJob or dict of its fields), sorted by name."""
+    jobs = [job if isinstance(job, ScheduledJob) else ScheduledJob(**job) for job in jobs]
+    names = [job.name for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("plan_schedules: the job names must be unique")
+    plan = []
+    for job in sorted(jobs, key=lambda job: job.name):
+        period = period_minutes(job.cadence)
+        window = job.window or period
+        if not 1 <= window <= period:
+            raise ValueError(f"{job.name}: window must be between 1 and {period} minutes, got {window}")
+        minute = (job.start + offset(job.name, window)) % period
+        plan.append(PlannedSchedule(job, period, minute, cron_expression(period, minute)))
+    return plan
+
+
+def histogram(plan: list):
+    """Expected invocations per minute of the day: [count] * 1440."""
+    counts = [0] * MINUTES_PER_DAY
+    for planned in plan:
+        for minute in range(planned.minute, MINUTES_PER_DAY, planned.period):
+            counts[minute] += 1
+    return counts
+
+
+def format_histogram(counts: list, bucket_minutes: int = 60, width: int = 50):
+    """Text histogram of the invocations per bucket of minutes, with the peak minute."""
+    buckets = [sum(counts[start:start + bucket_minutes]) for start in range(0, MINUTES_PER_DAY, bucket_minutes)]
+    scale = width / max(max(buckets), 1)
+    lines = [f"{i * bucket_minutes // 60:02d}:{i * bucket_minutes % 60:02d}  {count:7}  {'#' * round(count * scale)}"
+             for i, count in enumerate(buckets)]
+    peak = max(range(MINUTES_PER_DAY), key=counts.__getitem__)
+    lines.append(f"Peak: {counts[peak]} invocations at {peak // 60:02d}:{peak % 60:02d} UTC, {sum(counts)} per day")
+    return "\n".join(lines)
+
+
+class ScheduleFanOut(Component):
+    """Schedules ("<name>-<job name>") of the planned jobs in their schedule groups (job.group, default "<name>-<cadence>")."""
+
+    def __init__(self, name: str, jobs: list, max_per_minute: int = None, flexible_time_window="OFF", opts: pulumi.ResourceOptions = None):
+        super().__init__("resources:scheduler:FanOut", name, opts)
+        plan = plan_schedules(jobs)
+        counts = histogram(plan)
+        pulumi.log.info(f"{name}: expected invocations per hour (UTC)\n{format_histogram(counts)}")
+        if max_per_minute and max(counts) > max_per_minute:
+            raise ValueError(f"{name}: {max(counts)} invocations in the same minute exceed max_per_minute={max_per_minute}, "
+                             f"widen the job windows or lower the cadences")
+
+        self.groups = {}
+        self.schedules = {}
+        for planned in plan:
+            job = planned.job
+            group = f"{name}-{job.group or job.cadence}".lower()
+            if group not in self.groups:
+                self.groups[group] = aws.scheduler.ScheduleGroup(group, name=group, opts=self.child_opts())
+            # Prefixed with the fan-out name: several fan-outs of a stack can plan jobs with the same names
+            self.schedules[job.name] = scheduler(name=f"{name}-{job.name}", schedule_expression=planned.expression, target=job.target,
+                                                 group_name=self.groups[group].name, flexible_time_window=flexible_time_window,
+                                                 opts=self.child_opts())
+        self.plan = plan
+        self.histogram = counts
+        self.peak = max(counts)
+        self.finish({"schedule_groups": [group.name for group in self.groups.values()], "schedules": len(plan), "peak_per_minute": self.peak})
+
+
+def schedule_fanout(name: str, jobs: list, max_per_minute: int = None, flexible_time_window="OFF", opts: pulumi.ResourceOptions = None):
+    """
+    Create the schedules of many jobs spread across time (see plan_schedules), grouped in schedule groups.
+    e.g. schedule_fanout("tenants", [{"name": f"sync-{tenant}", "target": pipeline.target, "cadence": "daily", "window": 360} for tenant in tenants])
+    `max_per_minute` fails before deploying when the peak of invocations in one minute is above it.
+    Outputs (export_outputs): schedule_groups, schedules, peak_per_minute.
+    """
+    return ScheduleFanOut(name, jobs, max_per_minute, flexible_time_window, opts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan the offsets of a list of jobs and print the invocations histogram")
+    parser.add_argument("jobs", help="JSON file with the jobs: [{\"name\", \"cadence\", \"window\", \"start\", \"group\"}]")
+    parser.add_argument("--bucket", type=int, default=60, help="Histogram bucket in minutes (default: 60)")
+    parser.add_argument("--plan", action="store_true", help="Also print the cron expression of every job")
+    args = parser.parse_args()
+    with open(args.jobs) as file:
+        plan = plan_schedules(json.load(file))
+    if args.plan:
+        for planned in plan:
+            print(f"{planned.job.name}  {planned.expression}")
+    print(format_histogram(histogram(plan), args.bucket))
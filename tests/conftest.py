@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+# Local caches (packages, hashes, lookups) of the tests stay out of the project .pulumi_cache
+os.environ["PULUMI_CACHE_DIR"] = tempfile.mkdtemp(prefix="pulumi-tests-")
+os.environ.setdefault("PULUMI_LOOKUP_TTL", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def mocks():
+    """Fresh ProgramMocks for the test, the per-run caches of the resource modules are cleared."""
+    import pulumi
+    from resources import lambda_layer, lookups
+    from tests.mocks import ProgramMocks
+    lookups.clear_lookups()
+    lambda_layer._unrooted_layers.clear()
+    mocks = ProgramMocks()
+    pulumi.runtime.set_mocks(mocks, project="tests", stack="test", preview=False)
+    return mocks
@@ -0,0 +1,65 @@
+'''
+Pulumi mocks of the AWS resources and lookups used by the tests and by benchmarks/scale.py.
+Every resource returns its inputs plus an id, an ARN and the computed outputs the builders read (invoke_arn,
+execution_arn, root_resource_id, ...), so Output.concat/apply on them never sees None. Registered resources are kept
+in `resources` (pulumi.runtime.MockResourceArgs) for the assertions.
+'''
+import pulumi
+
+ACCOUNT_ID = "123456789012"
+REGION = "us-east-1"
+
+
+def computed_outputs(typ: str, name: str, inputs: dict):
+    """Outputs computed by the provider for the resource type (camelCase, as returned by the engine)."""
+    resource_id = f"{name}-id"
+    arn = f"arn:aws:mock:{REGION}:{ACCOUNT_ID}:{name}"
+    outputs = {"arn": arn}
+    if typ in ("aws:lambda/function:Function", "aws:lambda/alias:Alias"):
+        arn = f"arn:aws:lambda:{REGION}:{ACCOUNT_ID}:function:{inputs.get('name', name)}"
+        outputs = {"arn": arn, "qualifiedArn": f"{arn}:1", "version": "1",
+                   "invokeArn": f"arn:aws:apigateway:{REGION}:lambda:path/2015-03-31/functions/{arn}/invocations"}
+    elif typ == "aws:apigateway/restApi:RestApi":
+        outputs["executionArn"] = f"arn:aws:execute-api:{REGION}:{ACCOUNT_ID}:{resource_id}"
+        outputs["rootResourceId"] = f"{name}-root"
+    elif typ == "aws:apigatewayv2/api:Api":
+        outputs["executionArn"] = f"arn:aws:execute-api:{REGION}:{ACCOUNT_ID}:{resource_id}"
+        outputs["apiEndpoint"] = f"https://{resource_id}.execute-api.{REGION}.amazonaws.com"
+    elif typ in ("aws:apigateway/stage:Stage", "aws:apigatewayv2/stage:Stage"):
+        outputs["invokeUrl"] = f"https://{resource_id}.execute-api.{REGION}.amazonaws.com/{inputs.get('stageName') or inputs.get('name')}"
+    elif typ == "aws:sqs/queue:Queue":
+        outputs["arn"] = f"arn:aws:sqs:{REGION}:{ACCOUNT_ID}:{inputs.get('name', name)}"
+        outputs["url"] = f"https://sqs.{REGION}.amazonaws.com/{ACCOUNT_ID}/{inputs.get('name', name)}"
+    elif typ == "aws:s3/bucketV2:BucketV2":
+        outputs["bucket"] = inputs.get("bucket", name)
+        outputs["bucketRegionalDomainName"] = f"{outputs['bucket']}.s3.{REGION}.amazonaws.com"
+    elif typ == "aws:cloudfront/distribution:Distribution":
+        outputs["domainName"] = f"{resource_id}.cloudfront.net"
+        outputs["hostedZoneId"] = "Z2FDTNDATAQYW2"
+    elif typ == "aws:ecr/repository:Repository":
+        outputs["repositoryUrl"] = f"{ACCOUNT_ID}.dkr.ecr.{REGION}.amazonaws.com/{inputs.get('name', name)}"
+    elif typ == "aws:lambda/layerVersion:LayerVersion":
+        outputs["arn"] = f"arn:aws:lambda:{REGION}:{ACCOUNT_ID}:layer:{inputs.get('layerName', name)}:1"
+    return resource_id, outputs
+
+
+class ProgramMocks(pulumi.runtime.Mocks):
+    def __init__(self):
+        self.resources = []
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        self.resources.append(args)
+        resource_id, outputs = computed_outputs(args.typ, args.name, args.inputs)
+        return [resource_id, {**outputs, **args.inputs}]
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        # Lookups used by the builders: caller identity, region, partition, policy documents
+        return {"accountId": ACCOUNT_ID, "arn": f"arn:aws:iam::{ACCOUNT_ID}:user/mock", "userId": "mock", "id": "mock",
+                "name": REGION, "region": REGION, "partition": "aws", "dnsSuffix": "amazonaws.com", "json": "{}"}
+
+    def of_type(self, typ: str):
+        """Registered resources of a type ("aws:apigateway/methodSettings:MethodSettings" or its last part "MethodSettings")."""
+        return [resource for resource in self.resources if resource.typ == typ or resource.typ.rsplit(":", 1)[-1] == typ]
+
+    def named(self, name: str):
+        return next(resource for resource in self.resources if resource.name == name)
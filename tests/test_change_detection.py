@@ -0,0 +1,31 @@
+import os
+from pulumi_config.change_detection import compute_fingerprint, source_files
+
+
+def write(path, content=b""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(content)
+
+
+def test_local_activity_keeps_the_fingerprint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write(tmp_path / "app.py", b"print('program')")
+    write(tmp_path / "resources" / "s3.py", b"BUCKET = 1")
+    fingerprint = compute_fingerprint({"stack": "dev"}, fingerprint_dir=str(tmp_path / "fingerprints"))
+
+    # A test run, a state export, a virtualenv of any name, tool caches
+    write(tmp_path / "tests" / "test_app.py", b"def test(): pass")
+    write(tmp_path / ".pytest_cache" / "v" / "cache.py", b"")
+    write(tmp_path / ".mypy_cache" / "app.py", b"")
+    write(tmp_path / "exports" / "dev.json", b"{}")
+    write(tmp_path / "node_modules" / "pkg" / "index.py", b"")
+    write(tmp_path / "py311" / "pyvenv.cfg", b"home = /usr/bin")
+    write(tmp_path / "py311" / "lib" / "site.py", b"")
+    write(tmp_path / "project.egg-info" / "setup.py", b"")
+
+    assert [os.path.relpath(path) for path in source_files()] == ["app.py", os.path.join("resources", "s3.py")]
+    assert compute_fingerprint({"stack": "dev"}, fingerprint_dir=str(tmp_path / "fingerprints")) == fingerprint
+
+    write(tmp_path / "resources" / "s3.py", b"BUCKET = 2")
+    assert compute_fingerprint({"stack": "dev"}, fingerprint_dir=str(tmp_path / "fingerprints")) != fingerprint
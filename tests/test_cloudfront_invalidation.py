@@ -0,0 +1,101 @@
+from resources.cloudfront_invalidation import (MAX_PATHS_PER_INVALIDATION, MAX_WILDCARD_PATHS, CloudFrontInvalidationProvider,
+                                               changed_keys, plan_invalidation)
+
+
+def test_changed_keys():
+    olds = {"same.txt": "a", "modified.txt": "b1", "removed.txt": "c"}
+    news = {"same.txt": "a", "modified.txt": "b2", "added.txt": "d"}
+    assert changed_keys(olds, news) == ["added.txt", "modified.txt", "removed.txt"]
+
+
+def test_nothing_changed():
+    assert plan_invalidation([], ["a.txt"]) == []
+
+
+def test_complete_folder_collapses_to_wildcard():
+    all_keys = ["index.html", "about.html", "assets/app.js", "assets/app.css", "assets/img/logo.png"]
+    changed = ["index.html", "assets/app.js", "assets/app.css", "assets/img/logo.png"]
+    assert plan_invalidation(changed, all_keys) == ["/assets/*", "/index.html"]
+
+
+def test_folder_with_unchanged_objects_is_not_collapsed():
+    all_keys = ["assets/app.js", "assets/app.css", "assets/vendor.js"]
+    assert plan_invalidation(["assets/app.js", "assets/app.css"], all_keys) == ["/assets/app.css", "/assets/app.js"]
+
+
+def test_without_all_keys_no_wildcard_under_the_limit():
+    assert plan_invalidation(["a/1.txt", "a/2.txt"]) == ["/a/1.txt", "/a/2.txt"]
+
+
+def test_everything_changed_falls_back_to_root():
+    all_keys = ["index.html", "assets/app.js", "assets/app.css"]
+    assert plan_invalidation(all_keys, all_keys) == ["/*"]
+
+
+def test_paths_are_quoted():
+    assert plan_invalidation(["my file.txt"], ["my file.txt", "other.txt"]) == ["/my%20file.txt"]
+
+
+def test_max_paths_collapses_the_densest_folders():
+    changed = [f"big/{i}.txt" for i in range(10)] + ["small/1.txt", "small/2.txt"]
+    all_keys = changed + ["big/unchanged.txt", "small/unchanged.txt"]
+    paths = plan_invalidation(changed, all_keys, max_paths=5)
+    assert len(paths) <= 5
+    assert "/big/*" in paths
+    assert "/small/1.txt" in paths and "/small/2.txt" in paths
+
+
+def test_default_max_paths():
+    changed = [f"d{i % 10}/{i}.txt" for i in range(MAX_PATHS_PER_INVALIDATION + 1)]
+    # Many unchanged objects at the root: a folder wildcard is preferred to "/*"
+    all_keys = changed + [f"d{i}/unchanged.txt" for i in range(10)] + [f"page{i}.html" for i in range(1000)]
+    paths = plan_invalidation(changed, all_keys)
+    assert "/*" not in paths
+    assert len(paths) <= MAX_PATHS_PER_INVALIDATION
+    assert sum(path.endswith("*") for path in paths) <= MAX_WILDCARD_PATHS
+
+
+def test_max_wildcards_limits_the_complete_folders():
+    changed = [f"f{i:02d}/{name}" for i in range(MAX_WILDCARD_PATHS + 5) for name in ("a.txt", "b.txt")]
+    all_keys = changed + ["unchanged.txt"]
+    paths = plan_invalidation(changed, all_keys)
+    wildcards = [path for path in paths if path.endswith("*")]
+    assert len(wildcards) == MAX_WILDCARD_PATHS
+    assert len(paths) == MAX_WILDCARD_PATHS + 5 * 2
+
+
+def test_wildcard_limit_reached_falls_back_to_root():
+    changed = [f"f{i}/{name}" for i in range(4) for name in ("a.txt", "b.txt", "c.txt")]
+    all_keys = changed + [f"f{i}/unchanged.txt" for i in range(4)] + ["unchanged.txt"]
+    assert plan_invalidation(changed, all_keys, max_paths=3, max_wildcards=2) == ["/*"]
+
+
+class FakeCloudFront:
+    def __init__(self):
+        self.batches = []
+
+    def create_invalidation(self, DistributionId, InvalidationBatch):
+        self.batches.append((DistributionId, InvalidationBatch["Paths"]["Items"]))
+        return {"Invalidation": {"Id": f"I{len(self.batches)}"}}
+
+
+def test_provider_update_invalidates_changed_keys():
+    client = FakeCloudFront()
+    provider = CloudFrontInvalidationProvider(client_factory=lambda: client)
+    olds = {"distribution_id": "E1", "objects": {"index.html": "a", "about.html": "b"}}
+    news = {"distribution_id": "E1", "objects": {"index.html": "a2", "about.html": "b"}}
+
+    assert provider.diff("id", olds, news).changes
+    result = provider.update("id", olds, news)
+    assert result.outs["paths"] == ["/index.html"]
+    assert result.outs["invalidation_ids"] == ["I1"]
+    assert client.batches == [("E1", ["/index.html"])]
+
+
+def test_provider_update_without_changes():
+    client = FakeCloudFront()
+    provider = CloudFrontInvalidationProvider(client_factory=lambda: client)
+    props = {"distribution_id": "E1", "objects": {"index.html": "a"}}
+    assert not provider.diff("id", props, props).changes
+    assert provider.update("id", props, props).outs["invalidation_ids"] == []
+    assert client.batches == []
@@ -0,0 +1,64 @@
+import pulumi
+import pytest
+from resources.http_api_gateway import api_gateway_http, validate_endpoints
+
+
+def lambda_function(name):
+    import pulumi_aws as aws
+    return aws.lambda_.Function(name, role="arn:aws:iam::123456789012:role/test", runtime="python3.13", handler="handler.handler")
+
+
+def test_integrations_are_named_after_the_function(mocks):
+    @pulumi.runtime.test
+    def program():
+        items, users = lambda_function("items"), lambda_function("users")
+        api_gateway_http("api", [{"method": "GET", "path": "/users", "function": users},
+                                 {"method": "GET", "path": "/items", "function": items},
+                                 {"method": "POST", "path": "/items", "function": items}])
+    program()
+
+    assert sorted(resource.name for resource in mocks.of_type("aws:apigatewayv2/integration:Integration")) == \
+        ["api-integration-items", "api-integration-users"]
+    assert sorted(resource.name for resource in mocks.of_type("aws:lambda/permission:Permission")) == \
+        ["api-api-permission-items", "api-api-permission-users"]
+
+
+def test_paths_are_normalized(mocks):
+    @pulumi.runtime.test
+    def program():
+        api_gateway_http("api", [{"method": "get", "path": "/path/", "function": lambda_function("items")}])
+    program()
+
+    route, = mocks.of_type("aws:apigatewayv2/route:Route")
+    assert route.name == "api-route-GET/path"
+    assert route.inputs["routeKey"] == "GET /path"
+
+
+def test_outputs_are_registered_on_the_component(mocks):
+    @pulumi.runtime.test
+    def program():
+        api = api_gateway_http("api", [{"method": "GET", "path": "/items", "function": lambda_function("items")}])
+        assert api.pulumi_resource_type == "resources:apigatewayv2:HttpApi"
+        return api.outputs["api_endpoint"].apply(lambda endpoint: assert_endpoint(endpoint))
+    program()
+
+
+def assert_endpoint(endpoint):
+    assert endpoint == "https://api-api-id.execute-api.us-east-1.amazonaws.com"
+
+
+def test_duplicate_routes_after_normalization():
+    endpoints = [{"method": "GET", "path": "/items/", "function": None}, {"method": "GET", "path": "items", "function": None}]
+    with pytest.raises(ValueError, match="Duplicate route: GET /items"):
+        validate_endpoints(endpoints)
+
+
+@pytest.mark.parametrize("throttling, route_throttling", [
+    ({"burst_limit": -1}, None),
+    ({"burst": 10}, None),
+    (None, {"rate_limit": "fast"}),
+])
+def test_invalid_throttling(throttling, route_throttling):
+    endpoints = [{"method": "GET", "path": "/items", "function": None, "throttling": route_throttling}]
+    with pytest.raises(ValueError):
+        validate_endpoints(endpoints, throttling=throttling)
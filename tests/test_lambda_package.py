@@ -0,0 +1,33 @@
+import os
+import zipfile
+from resources.lambda_package import build_package, collect_files
+
+
+def write(path, content=b"", mode=0o644):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(content)
+    os.chmod(path, mode)
+
+
+def test_broken_links_are_skipped(tmp_path, capsys):
+    write(tmp_path / "src" / "handler.py", b"def handler(event, context): pass")
+    os.symlink(tmp_path / "missing.py", tmp_path / "src" / "broken.py")
+
+    assert sorted(collect_files([str(tmp_path / "src")])) == ["src/handler.py"]
+    assert "broken.py is a broken link" in capsys.readouterr().out
+    build_package([str(tmp_path / "src")], str(tmp_path / "packages"))
+
+
+def test_executables_keep_their_exec_bit(tmp_path):
+    write(tmp_path / "src" / "handler.py", b"def handler(event, context): pass")
+    write(tmp_path / "src" / "bin" / "tool", b"#!/bin/sh\necho tool", mode=0o775)
+    zip_path, content_hash = build_package([str(tmp_path / "src" / "*")], str(tmp_path / "packages"))
+
+    with zipfile.ZipFile(zip_path) as archive:
+        modes = {info.filename: info.external_attr >> 16 for info in archive.infolist()}
+    assert modes == {"bin/tool": 0o755, "handler.py": 0o644}
+
+    # The permissions are part of the content hash
+    os.chmod(tmp_path / "src" / "bin" / "tool", 0o644)
+    assert build_package([str(tmp_path / "src" / "*")], str(tmp_path / "packages"))[1] != content_hash
@@ -0,0 +1,24 @@
+import logging
+from pulumi_config.operation_options import OperationOptions
+
+
+def test_refresh_and_destroy_accept_diff():
+    options = OperationOptions(diff=True, target=["urn:a"], target_dependents=True)
+    assert {"diff", "target", "target_dependents"} <= set(options.kwargs("refresh"))
+    assert {"diff", "target", "target_dependents"} <= set(options.kwargs("destroy"))
+
+
+def test_unsupported_options_are_reported(caplog):
+    with caplog.at_level(logging.WARNING):
+        kwargs = OperationOptions(replace=["urn:a"], expect_no_changes=True).kwargs("destroy")
+    assert "replace" not in kwargs and "expect_no_changes" not in kwargs
+    assert "--replace is not supported by destroy" in caplog.text
+    assert "--expect-no-changes is not supported by destroy" in caplog.text
+
+
+def test_pre_refresh_keeps_targets_and_parallelism():
+    options = OperationOptions(parallel=4, target=["urn:a"], target_dependents=True, message="deploy", expect_no_changes=True,
+                               replace=["urn:a"], event_handlers=[print])
+    refresh = options.pre_refresh()
+    assert refresh.kwargs("refresh").keys() - {"on_output"} == {"parallel", "target", "target_dependents"}
+    assert refresh.event_handlers == []
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+from pulumi_config.operation_options import OperationOptions
+from pulumi_config.profiler import DeploymentProfiler
+from pulumi_config import multi_stack
+
+URN = "urn:pulumi:test::tests::aws:s3/bucketV2:BucketV2::site"
+
+
+def event(kind, op, urn=URN):
+    metadata = SimpleNamespace(urn=urn, type="aws:s3/bucketV2:BucketV2", op=SimpleNamespace(value=op))
+    fields = {"resource_pre_event": None, "res_outputs_event": None, "res_op_failed_event": None}
+    fields[kind] = SimpleNamespace(metadata=metadata)
+    return SimpleNamespace(**fields)
+
+
+def test_replacement_steps_are_kept_apart():
+    profiler = DeploymentProfiler()
+    for op in ("create-replacement", "replace", "delete-replaced"):
+        profiler.on_event(event("resource_pre_event", op))
+    profiler.on_event(event("res_outputs_event", "create-replacement"))
+    profiler.on_event(event("res_outputs_event", "replace"))
+    profiler.on_event(event("res_op_failed_event", "delete-replaced"))
+
+    steps = {step["op"]: step for step in profiler.durations()}
+    assert set(steps) == {"create-replacement", "replace", "delete-replaced"}
+    assert steps["delete-replaced"]["failed"] and not steps["replace"]["failed"]
+    # The resource stands on the critical path once, with its last step
+    path = profiler.critical_path({})
+    assert [step["op"] for step in path] == ["delete-replaced"]
+
+
+def test_run_stack_profiles_every_stack(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    reports = []
+    shared = OperationOptions()
+
+    def run_pulumi(stack, operation, log=None, options=None):
+        handlers = [handler for handler in options.event_handlers if handler.__self__.__class__ is DeploymentProfiler]
+        assert len(handlers) == 1
+        handlers[0](event("resource_pre_event", "create"))
+        handlers[0](event("res_outputs_event", "create"))
+        return object()
+
+    monkeypatch.setattr(multi_stack.auto, "create_or_select_stack", lambda **kwargs: None)
+    monkeypatch.setattr(multi_stack, "setting_up_stack", lambda *args, **kwargs: None)
+    monkeypatch.setattr(multi_stack, "run_pulumi", run_pulumi)
+    monkeypatch.setattr(DeploymentProfiler, "write_report", lambda self, stack, name, log=None: reports.append((name, len(self.steps))))
+
+    for stack_name in ("dev", "prod"):
+        result = multi_stack.run_stack({"name": stack_name}, "tests", print, "destroy", log_dir=str(tmp_path), options=shared, profile=True)
+        assert result["ok"], result
+    assert reports == [("dev-destroy", 1), ("prod-destroy", 1)]
+    assert shared.event_handlers == []
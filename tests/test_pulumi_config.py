@@ -0,0 +1,24 @@
+import argparse
+import time
+import pytest
+from pulumi_config.pulumi_config import refresh_due, refresh_policy
+
+
+@pytest.mark.parametrize("value", ["always", "never", "30", "0.5"])
+def test_refresh_policy_accepted(value):
+    assert refresh_policy(value) == value
+
+
+@pytest.mark.parametrize("value", ["soon", "", "-5"])
+def test_refresh_policy_is_a_usage_error(value):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--refresh", default="always", type=refresh_policy)
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--refresh", value])
+
+
+def test_refresh_due():
+    assert refresh_due(None, "30")
+    assert not refresh_due(time.time(), "30")
+    assert refresh_due(time.time() - 3600, "30")
+    assert not refresh_due(None, "never")
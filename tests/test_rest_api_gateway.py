@@ -0,0 +1,157 @@
+import pulumi
+import pytest
+from resources.rest_api_gateway import CACHE_CLUSTER_SIZES, MAX_CACHE_TTL, MAX_COMPRESSION_SIZE, api_gateway_rest, route_hash, validate_stage_options
+
+
+def lambda_function(name="handler"):
+    import pulumi_aws as aws
+    return aws.lambda_.Function(name, role="arn:aws:iam::123456789012:role/test", runtime="python3.13", handler="handler.handler")
+
+
+def endpoints(function, **route):
+    return [{"method": "GET", "path": "/items", "function": function, **route},
+            {"method": "POST", "path": "/items", "function": function}]
+
+
+def test_stage_cache_cluster(mocks):
+    @pulumi.runtime.test
+    def program():
+        api_gateway_rest("api", endpoints(lambda_function()), cache_cluster_size="0.5")
+    program()
+
+    stage, = mocks.of_type("aws:apigateway/stage:Stage")
+    assert stage.inputs["cacheClusterEnabled"] is True
+    assert stage.inputs["cacheClusterSize"] == "0.5"
+
+
+def test_no_cache_cluster_by_default(mocks):
+    @pulumi.runtime.test
+    def program():
+        api_gateway_rest("api", endpoints(lambda_function()))
+    program()
+
+    stage, = mocks.of_type("aws:apigateway/stage:Stage")
+    assert not stage.inputs.get("cacheClusterEnabled")
+    assert mocks.of_type("MethodSettings") == []
+
+
+def test_per_method_settings_override_stage(mocks):
+    @pulumi.runtime.test
+    def program():
+        api_gateway_rest("api", endpoints(lambda_function(), cache_ttl=60, cache_key_parameters=["method.request.querystring.id"]),
+                         cache_cluster_size="0.5", cache_ttl=300)
+    program()
+
+    settings = {resource.inputs["methodPath"]: resource.inputs["settings"] for resource in mocks.of_type("MethodSettings")}
+    assert settings["*/*"] == {"cachingEnabled": True, "cacheTtlInSeconds": 300}
+    assert settings["items/GET"] == {"cachingEnabled": True, "cacheTtlInSeconds": 60}
+    assert "items/POST" not in settings
+
+    method = mocks.named("api-method-GET/items")
+    assert method.inputs["requestParameters"] == {"method.request.querystring.id": False}
+    integration = mocks.named("api-integration-GET/items")
+    assert integration.inputs["cacheKeyParameters"] == ["method.request.querystring.id"]
+
+
+def test_throttling(mocks):
+    @pulumi.runtime.test
+    def program():
+        api_gateway_rest("api", endpoints(lambda_function(), throttling={"burst_limit": 5, "rate_limit": 2.5}),
+                         throttling={"burst_limit": 100, "rate_limit": 50})
+    program()
+
+    settings = {resource.inputs["methodPath"]: resource.inputs["settings"] for resource in mocks.of_type("MethodSettings")}
+    assert settings["*/*"] == {"throttlingBurstLimit": 100, "throttlingRateLimit": 50}
+    assert settings["items/GET"] == {"throttlingBurstLimit": 5, "throttlingRateLimit": 2.5}
+
+
+def test_minimum_compression_size(mocks):
+    @pulumi.runtime.test
+    def program():
+        api_gateway_rest("api", endpoints(lambda_function()), minimum_compression_size=1024)
+    program()
+
+    api, = mocks.of_type("aws:apigateway/restApi:RestApi")
+    assert api.inputs["minimumCompressionSize"] == "1024"
+
+
+def test_route_hash_changes_with_cache_keys(mocks):
+    @pulumi.runtime.test
+    def program():
+        function = lambda_function()
+        plain = route_hash(endpoints(function))
+        cached = route_hash(endpoints(function, cache_key_parameters=["method.request.querystring.id"]))
+        return pulumi.Output.all(plain, cached).apply(lambda hashes: assert_different(*hashes))
+    program()
+
+
+def assert_different(first, second):
+    assert first != second
+
+
+@pytest.mark.parametrize("size", ["2", "0.25", "500"])
+def test_invalid_cache_cluster_size(size):
+    assert size not in CACHE_CLUSTER_SIZES
+    with pytest.raises(ValueError, match="cache_cluster_size"):
+        validate_stage_options([], cache_cluster_size=size)
+
+
+def test_cache_ttl_above_maximum():
+    with pytest.raises(ValueError, match="cache_ttl must be between"):
+        validate_stage_options([], cache_cluster_size="0.5", cache_ttl=MAX_CACHE_TTL + 1)
+    with pytest.raises(ValueError, match="GET /items: cache_ttl must be between"):
+        validate_stage_options([{"method": "GET", "path": "/items", "cache_ttl": MAX_CACHE_TTL + 1}], cache_cluster_size="0.5")
+
+
+def test_cache_ttl_requires_cluster():
+    with pytest.raises(ValueError, match="requires a cache_cluster_size"):
+        validate_stage_options([], cache_ttl=60)
+
+
+@pytest.mark.parametrize("size", [-1, MAX_COMPRESSION_SIZE + 1])
+def test_compression_size_bounds(size):
+    with pytest.raises(ValueError, match="minimum_compression_size"):
+        validate_stage_options([], minimum_compression_size=size)
+
+
+def test_compression_size_limits_accepted():
+    validate_stage_options([], minimum_compression_size=0)
+    validate_stage_options([], minimum_compression_size=MAX_COMPRESSION_SIZE)
+
+
+def test_invalid_throttling():
+    with pytest.raises(ValueError, match="unknown throttling"):
+        validate_stage_options([], throttling={"burst": 10})
+    with pytest.raises(ValueError, match="rate_limit must be a positive number"):
+        validate_stage_options([{"method": "GET", "path": "/items", "throttling": {"rate_limit": -1}}])
+
+
+def test_same_path_part_under_different_parents(mocks):
+    @pulumi.runtime.test
+    def program():
+        function = lambda_function()
+        api_gateway_rest("api", [{"method": "GET", "path": "/a/items", "function": function},
+                                 {"method": "GET", "path": "/b/items", "function": function}])
+    program()
+
+    resources = {resource.name: resource.inputs for resource in mocks.of_type("aws:apigateway/resource:Resource")}
+    assert sorted(resources) == ["api-resource/a", "api-resource/a/items", "api-resource/b", "api-resource/b/items"]
+    assert resources["api-resource/a"]["parentId"] == "api-rest-api-root"
+    assert resources["api-resource/a/items"]["parentId"] == "api-resource/a-id"
+    assert resources["api-resource/b/items"]["parentId"] == "api-resource/b-id"
+    assert resources["api-resource/a/items"]["pathPart"] == resources["api-resource/b/items"]["pathPart"] == "items"
+    methods = {resource.name: resource.inputs["resourceId"] for resource in mocks.of_type("aws:apigateway/method:Method")}
+    assert methods == {"api-method-GET/a/items": "api-resource/a/items-id", "api-method-GET/b/items": "api-resource/b/items-id"}
+
+
+def test_route_hash_ignores_endpoint_order(mocks):
+    @pulumi.runtime.test
+    def program():
+        function = lambda_function()
+        routes = endpoints(function) + [{"method": "GET", "path": "/users/", "function": function}]
+        return pulumi.Output.all(route_hash(routes), route_hash(list(reversed(routes)))).apply(lambda hashes: assert_equal(*hashes))
+    program()
+
+
+def assert_equal(first, second):
+    assert first == second
@@ -0,0 +1,145 @@
+import os
+import pytest
+import json
+from resources.hash_cache import write_atomic
+from resources.s3_sync import (MANIFEST_KEY, S3SyncProvider, build_local_manifest, delete_synced, load_remote_manifest,
+                               manifest_path, plan_sync, sync_manifest)
+
+BUCKET = "sync-tests"
+
+
+def entry(etag):
+    return {"path": f"/tmp/{etag}", "etag": etag, "content_type": "text/plain"}
+
+
+def test_plan_sync():
+    local = {"same.txt": entry("a"), "changed.txt": entry("b2"), "new.txt": entry("c")}
+    remote = {"same.txt": "a", "changed.txt": "b1", "removed.txt": "d"}
+    upload, delete, skipped = plan_sync(local, remote)
+    assert upload == ["changed.txt", "new.txt"]
+    assert delete == ["removed.txt"]
+    assert skipped == 1
+
+
+def test_plan_sync_empty_remote():
+    assert plan_sync({"a.txt": entry("a")}, {}) == (["a.txt"], [], 0)
+    assert plan_sync({}, {"a.txt": "a"}) == ([], ["a.txt"], 0)
+
+
+@pytest.fixture
+def s3():
+    moto = pytest.importorskip("moto")
+    import boto3
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(content)
+
+
+def remote_keys(client, prefix=""):
+    return sorted(item["Key"] for item in client.list_objects_v2(Bucket=BUCKET, Prefix=prefix).get("Contents", []))
+
+
+def test_upload(s3, tmp_path):
+    write(tmp_path / "index.html", b"<html></html>")
+    write(tmp_path / "assets" / "app.js", b"console.log(1)")
+    stats = sync_manifest(s3, BUCKET, build_local_manifest(str(tmp_path)), key_prefix="site")
+
+    assert stats == {"uploaded": 2, "deleted": 0, "skipped": 0}
+    assert remote_keys(s3) == ["site/" + MANIFEST_KEY, "site/assets/app.js", "site/index.html"]
+    assert s3.head_object(Bucket=BUCKET, Key="site/index.html")["ContentType"] == "text/html"
+    assert set(load_remote_manifest(s3, BUCKET, "site")) == {"index.html", "assets/app.js"}
+
+
+def test_unchanged_files_are_skipped(s3, tmp_path):
+    write(tmp_path / "a.txt", b"a")
+    write(tmp_path / "b.txt", b"b")
+    sync_manifest(s3, BUCKET, build_local_manifest(str(tmp_path)))
+
+    write(tmp_path / "b.txt", b"bb")
+    stats = sync_manifest(s3, BUCKET, build_local_manifest(str(tmp_path)))
+    assert stats == {"uploaded": 1, "deleted": 0, "skipped": 1}
+    assert s3.get_object(Bucket=BUCKET, Key="b.txt")["Body"].read() == b"bb"
+
+    assert sync_manifest(s3, BUCKET, build_local_manifest(str(tmp_path))) == {"uploaded": 0, "deleted": 0, "skipped": 2}
+
+
+def test_delete(s3, tmp_path):
+    write(tmp_path / "keep.txt", b"keep")
+    write(tmp_path / "old" / "remove.txt", b"remove")
+    sync_manifest(s3, BUCKET, build_local_manifest(str(tmp_path)))
+
+    os.remove(tmp_path / "old" / "remove.txt")
+    stats = sync_manifest(s3, BUCKET, build_local_manifest(str(tmp_path)))
+    assert stats == {"uploaded": 0, "deleted": 1, "skipped": 1}
+    assert remote_keys(s3) == [MANIFEST_KEY, "keep.txt"]
+
+    assert delete_synced(s3, BUCKET) == 1
+    assert remote_keys(s3) == []
+
+
+def test_dry_run(s3, tmp_path):
+    write(tmp_path / "a.txt", b"a")
+    assert sync_manifest(s3, BUCKET, build_local_manifest(str(tmp_path)), dry_run=True) == {"uploaded": 1, "deleted": 0, "skipped": 0}
+    assert remote_keys(s3) == []
+
+
+def test_multipart(s3, tmp_path):
+    write(tmp_path / "large.bin", os.urandom(6 * 1024 * 1024))
+    write(tmp_path / "small.txt", b"small")
+    threshold = 5 * 1024 * 1024
+    sync_manifest(s3, BUCKET, build_local_manifest(str(tmp_path)), multipart_threshold=threshold)
+
+    # Multipart uploads have a "<md5 of the parts>-<part count>" ETag
+    assert "-" in s3.head_object(Bucket=BUCKET, Key="large.bin")["ETag"]
+    assert "-" not in s3.head_object(Bucket=BUCKET, Key="small.txt")["ETag"]
+    assert s3.head_object(Bucket=BUCKET, Key="large.bin")["ContentLength"] == 6 * 1024 * 1024
+
+
+def provider_props(name, directory, **props):
+    local = build_local_manifest(directory)
+    write_atomic(manifest_path(name), json.dumps(local, sort_keys=True).encode())
+    return {"bucket": BUCKET, "key_prefix": "site", "region": "us-east-1", "manifest": name, **props}
+
+
+def test_region_change_is_an_update():
+    diff = S3SyncProvider().diff("id", {"bucket": BUCKET, "region": "us-east-1", "manifest_hash": "h"},
+                                 {"bucket": BUCKET, "region": "eu-west-1", "manifest_hash": "h"})
+    assert diff.changes and not diff.replaces
+    diff = S3SyncProvider().diff("id", {"bucket": BUCKET, "key_prefix": "a"}, {"bucket": BUCKET, "key_prefix": "b"})
+    assert diff.replaces == ["key_prefix"]
+
+
+def test_replacement_keeps_the_synced_keys(s3, tmp_path):
+    write(tmp_path / "index.html", b"<html></html>")
+    provider = S3SyncProvider()
+    old = provider.create(provider_props("old", str(tmp_path)))
+    # Create before delete: the renamed resource syncs the same prefix, then the former one is deleted
+    new = provider.create(provider_props("new", str(tmp_path)))
+    assert new.outs["owner"] != old.outs["owner"]
+    provider.delete(old.id, old.outs)
+    assert remote_keys(s3) == ["site/" + MANIFEST_KEY, "site/index.html"]
+
+    provider.delete(new.id, new.outs)
+    assert remote_keys(s3) == []
+
+
+def test_replacement_to_another_prefix_cleans_up(s3, tmp_path):
+    write(tmp_path / "index.html", b"<html></html>")
+    provider = S3SyncProvider()
+    old = provider.create(provider_props("site", str(tmp_path)))
+    provider.create(provider_props("site", str(tmp_path), key_prefix="www"))
+    provider.delete(old.id, old.outs)
+    assert remote_keys(s3) == ["www/" + MANIFEST_KEY, "www/index.html"]
+
+
+def test_state_holds_no_local_path(s3, tmp_path):
+    write(tmp_path / "index.html", b"<html></html>")
+    outs = S3SyncProvider().create(provider_props("site", str(tmp_path))).outs
+    assert not any(isinstance(value, str) and str(tmp_path) in value for value in outs.values())
@@ -0,0 +1,28 @@
+import pulumi
+from resources.schedule_planner import histogram, plan_schedules, schedule_fanout
+
+TARGET = {"arn": "arn:aws:sqs:us-east-1:123456789012:queue", "role_arn": "arn:aws:iam::123456789012:role/scheduler"}
+
+
+def test_offsets_are_stable_and_inside_the_window():
+    jobs = [{"name": f"job-{i}", "window": 120, "start": 60} for i in range(50)]
+    plan = plan_schedules(jobs)
+    assert all(60 <= planned.minute < 180 for planned in plan)
+    # Adding a job does not move the others
+    moved = {planned.job.name: planned.minute for planned in plan_schedules(jobs + [{"name": "job-new", "window": 120, "start": 60}])}
+    assert all(moved[planned.job.name] == planned.minute for planned in plan)
+    assert sum(histogram(plan)) == 50
+
+
+def test_two_fanouts_with_the_same_jobs(mocks):
+    @pulumi.runtime.test
+    def program():
+        jobs = [{"name": "sync", "target": TARGET}, {"name": "report", "target": TARGET}]
+        schedule_fanout("tenants", jobs)
+        schedule_fanout("partners", jobs)
+    program()
+
+    names = sorted(resource.name for resource in mocks.of_type("aws:scheduler/schedule:Schedule"))
+    assert names == ["partners-report", "partners-sync", "tenants-report", "tenants-sync"]
+    groups = sorted(resource.name for resource in mocks.of_type("aws:scheduler/scheduleGroup:ScheduleGroup"))
+    assert groups == ["partners-daily", "tenants-daily"]
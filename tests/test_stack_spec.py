@@ -0,0 +1,32 @@
+import os
+import pulumi
+from pulumi_config.stack_spec import compile_spec, load_spec, resolve_value
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_references_inside_a_string_of_variables_stay_plain():
+    assert resolve_value("${project}-http", {}, {"project": "demo"}) == "demo-http"
+
+
+def test_example_spec_matches_the_program(mocks, monkeypatch):
+    import app
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(app, "PROJECT_NAME", "demo")
+
+    @pulumi.runtime.test
+    def spec():
+        compile_spec(load_spec("data/stack.example.yaml"), {"project": "demo", "stack": "test", "region": "us-east-1"})
+    spec()
+    spec_types = {resource.typ for resource in mocks.resources}
+    schedule, = mocks.of_type("aws:scheduler/schedule:Schedule")
+    assert schedule.inputs["flexibleTimeWindow"] == {"mode": "FLEXIBLE", "maximumWindowInMinutes": 15}
+    assert schedule.inputs["target"]["arn"].startswith("arn:aws:sqs:")
+
+    mocks.resources.clear()
+
+    @pulumi.runtime.test
+    def program():
+        assert app.pulumi_program()
+    program()
+    assert spec_types == {resource.typ for resource in mocks.resources}